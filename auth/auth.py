@@ -1,33 +1,60 @@
-import secrets
 from fastapi import HTTPException
-from sqlalchemy.orm import Session
-from passlib.context import CryptContext
+from sqlalchemy.ext.asyncio import AsyncSession
 
 import models
+from auth import hashing
+from auth.sessions import session_store
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-active_tokens = {}  # token: user_id map (in-memory; can later use Redis/db)
+pwd_context = hashing.pwd_context
 
 def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+    return hashing.verify_password(plain_password, hashed_password)
 
 def get_password_hash(password):
-    return pwd_context.hash(password)
+    return hashing.hash_password(password)
 
-def authenticate_user(username: str, password: str, db: Session):
-    user = db.query(models.User).filter(models.User.username == username).first()
+def load_user(db, username: str):
+    return db.query(models.User).filter(models.User.username == username).first()
 
-    if not user or not verify_password(password, user.password_hash):
+
+def save_password_hash(db, user_id: int, new_hash: str):
+    db.query(models.User).filter(models.User.id == user_id).update({models.User.password_hash: new_hash})
+    db.commit()
+
+
+async def authenticate_user(username: str, password: str, db: AsyncSession):
+    user = await db.run_sync(load_user, username)
+    # ✅ Hand the connection back to the pool before queueing for bcrypt;
+    # closing keeps the loaded attributes on the (now detached) user.
+    await db.close()
+
+    if not user:
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+
+    # ✅ bcrypt runs on the hashing pool; the event loop stays free for orders
+    matches, new_hash = await hashing.verify_and_update_async(password, user.password_hash)
+    if not matches:
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
     if not user.is_active:
         raise HTTPException(status_code=403, detail="This account has been deactivated")
 
+    # ✅ Transparently upgrade hashes made with an older cost setting
+    if new_hash:
+        await db.run_sync(save_password_hash, user.id, new_hash)
+        user.password_hash = new_hash
+
     return user
 
 
 
 def create_session_token(user_id: int):
-    token = secrets.token_hex(32)
-    active_tokens[token] = user_id
-    return token
+    return session_store.create(user_id)
+
+
+def revoke_session_token(token: str):
+    session_store.revoke(token)
+
+
+def revoke_user_sessions(user_id: int):
+    session_store.revoke_user(user_id)
@@ -1,17 +1,60 @@
-from fastapi import Header, HTTPException, Depends
-from sqlalchemy.orm import Session
-from database import get_db
+import os
+from contextlib import asynccontextmanager
+from typing import Optional
+from fastapi import Header, HTTPException, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_async_db
 import models
-from auth.auth import active_tokens
+from auth.sessions import session_store
+from cache import TTLCache
 
-def get_current_user(token: str = Header(...), db: Session = Depends(get_db)) -> models.User:
-    user_id = active_tokens.get(token)
+# ✅ Per-process cache of who a user id is; changes made through the users router
+# invalidate it immediately, other workers pick them up within USER_CACHE_TTL_SECONDS.
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "30"))
+USER_CACHE_MAX_ENTRIES = int(os.getenv("USER_CACHE_MAX_ENTRIES", "1024"))
+USER_CACHE_COLUMNS = (models.User.id, models.User.username, models.User.role, models.User.is_active, models.User.created_at)
+
+_user_cache = TTLCache(maxsize=USER_CACHE_MAX_ENTRIES, ttl=USER_CACHE_TTL_SECONDS)
+
+
+def invalidate_cached_user(user_id: int):
+    _user_cache.pop(user_id)
+
+
+def load_user_fields(db, user_id: int):
+    row = db.query(*USER_CACHE_COLUMNS).filter(models.User.id == user_id).first()
+    return row._asdict() if row else None
+
+
+async def get_current_user(token: str = Header(...), db: AsyncSession = Depends(get_async_db)) -> models.User:
+    return await authenticate_token(token, db)
+
+
+async def authenticate_token(token: Optional[str], db) -> models.User:
+    user_id = await session_store.aget(token) if token else None
     if not user_id:
         raise HTTPException(status_code=401, detail="Invalid or expired token")
-    user = db.query(models.User).filter(models.User.id == user_id).first()
-    if not user or not user.is_active:
+
+    fields = _user_cache.get(user_id)
+    if fields is None:
+        fields = await db.run_sync(load_user_fields, user_id)
+        if fields:
+            _user_cache.set(user_id, fields)
+
+    if not fields or not fields["is_active"]:
         raise HTTPException(status_code=403, detail="Inactive user")
-    return user
+    # A detached snapshot; load the row through `db` before changing it
+    return models.User(**fields)
+
+
+async def get_feed_user(
+    token: Optional[str] = Header(None),
+    token_param: Optional[str] = Query(None, alias="token", description="for EventSource / browser WebSocket clients"),
+) -> models.User:
+    # Live feeds: browsers can't set headers on EventSource or WebSocket, and the
+    # session is closed right away instead of being held for the whole stream.
+    async with asynccontextmanager(get_async_db)() as db:
+        return await authenticate_token(token or token_param, db)
 
 def is_admin(current_user: models.User = Depends(get_current_user)) -> models.User:
     if current_user.role != "admin":
@@ -0,0 +1,61 @@
+# auth/hashing.py
+# All bcrypt work runs on a small dedicated thread pool (bcrypt releases the GIL),
+# so a burst of logins can use at most HASH_WORKERS cores and never the event loop
+# or Starlette's request threadpool.
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from passlib.context import CryptContext
+
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
+
+# Hashes stored with a different cost are flagged by verify_and_update and rehashed on login
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+
+_executor = ThreadPoolExecutor(max_workers=HASH_WORKERS, thread_name_prefix="bcrypt")
+_lock = threading.Lock()
+_stats = {"in_flight": 0, "completed": 0}
+
+
+def _done(_future):
+    with _lock:
+        _stats["in_flight"] -= 1
+        _stats["completed"] += 1
+
+
+def _submit(fn, *args):
+    with _lock:
+        _stats["in_flight"] += 1
+    future = _executor.submit(fn, *args)
+    future.add_done_callback(_done)
+    return future
+
+
+def queue_depth() -> int:
+    # Jobs waiting for a hashing thread (running ones excluded)
+    with _lock:
+        return max(0, _stats["in_flight"] - HASH_WORKERS)
+
+
+def hash_stats() -> dict:
+    with _lock:
+        return {"workers": HASH_WORKERS, "queue_depth": max(0, _stats["in_flight"] - HASH_WORKERS), **_stats}
+
+
+def hash_password(password: str) -> str:
+    return _submit(pwd_context.hash, password).result()
+
+
+def verify_password(plain: str, hashed: str) -> bool:
+    return _submit(pwd_context.verify, plain, hashed).result()
+
+
+async def hash_password_async(password: str) -> str:
+    return await asyncio.wrap_future(_submit(pwd_context.hash, password))
+
+
+async def verify_and_update_async(plain: str, hashed: str):
+    # (matches, new_hash_or_None) without blocking the event loop
+    return await asyncio.wrap_future(_submit(pwd_context.verify_and_update, plain, hashed))
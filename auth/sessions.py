@@ -0,0 +1,252 @@
+# auth/sessions.py
+# Login session stores. Pick one with SESSION_BACKEND:
+#   memory - per-process TTL + LRU map (single worker / tests)
+#   sql    - auth_sessions table in the main database (shared by every worker)
+#   redis  - any Redis-protocol server at REDIS_URL (shared by every worker and node)
+import hashlib
+import os
+import secrets
+import socket
+import threading
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+from typing import Optional
+from urllib.parse import urlparse
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import delete, insert, select
+
+from cache import TTLCache
+
+SESSION_BACKEND = os.getenv("SESSION_BACKEND", "memory")
+SESSION_TTL_SECONDS = int(os.getenv("SESSION_TTL_SECONDS", str(12 * 3600)))
+SESSION_MAX_ENTRIES = int(os.getenv("SESSION_MAX_ENTRIES", "10000"))
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+
+def _token_hash(token: str) -> str:
+    # Shared backends only ever see a digest, never the bearer token itself
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+class SessionStore(ABC):
+    def create(self, user_id: int) -> str:
+        token = secrets.token_hex(32)
+        self.put(token, user_id)
+        return token
+
+    @abstractmethod
+    def put(self, token: str, user_id: int):
+        ...
+
+    @abstractmethod
+    def get(self, token: str) -> Optional[int]:
+        ...
+
+    async def aget(self, token: str) -> Optional[int]:
+        # Network-backed stores block, so look them up off the event loop
+        return await run_in_threadpool(self.get, token)
+
+    @abstractmethod
+    def revoke(self, token: str):
+        ...
+
+    @abstractmethod
+    def revoke_user(self, user_id: int):
+        ...
+
+
+# ------------------ In-process ------------------
+class MemorySessionStore(SessionStore):
+    def __init__(self, ttl: int = SESSION_TTL_SECONDS, max_entries: int = SESSION_MAX_ENTRIES):
+        # Least recently used sessions are dropped first once max_entries is reached
+        self._tokens = TTLCache(maxsize=max_entries, ttl=ttl)
+
+    def put(self, token, user_id):
+        self._tokens.set(token, user_id)
+
+    def get(self, token):
+        return self._tokens.get(token)
+
+    async def aget(self, token):
+        return self._tokens.get(token)
+
+    def revoke(self, token):
+        self._tokens.pop(token)
+
+    def revoke_user(self, user_id):
+        self._tokens.remove_where(lambda value: value == user_id)
+
+
+# ------------------ SQL table ------------------
+class SqlSessionStore(SessionStore):
+    PURGE_EVERY = 500  # logins between sweeps of expired rows
+
+    def __init__(self, engine=None, ttl: int = SESSION_TTL_SECONDS):
+        if engine is None:
+            from database import engine
+        from models import AuthSession
+
+        self.engine = engine
+        self.ttl = ttl
+        self.table = AuthSession.__table__
+        self._logins = 0
+
+    def put(self, token, user_id):
+        now = datetime.utcnow()
+        with self.engine.begin() as conn:
+            conn.execute(insert(self.table).values(
+                token_hash=_token_hash(token),
+                user_id=user_id,
+                created_at=now,
+                expires_at=now + timedelta(seconds=self.ttl),
+            ))
+            self._logins += 1
+            if self._logins % self.PURGE_EVERY == 0:
+                conn.execute(delete(self.table).where(self.table.c.expires_at <= now))
+
+    def get(self, token):
+        with self.engine.connect() as conn:
+            return conn.execute(
+                select(self.table.c.user_id).where(
+                    self.table.c.token_hash == _token_hash(token),
+                    self.table.c.expires_at > datetime.utcnow(),
+                )
+            ).scalar()
+
+    def revoke(self, token):
+        with self.engine.begin() as conn:
+            conn.execute(delete(self.table).where(self.table.c.token_hash == _token_hash(token)))
+
+    def revoke_user(self, user_id):
+        with self.engine.begin() as conn:
+            conn.execute(delete(self.table).where(self.table.c.user_id == user_id))
+
+
+# ------------------ Redis protocol ------------------
+class RedisError(Exception):
+    pass
+
+
+class RespClient:
+    """Just enough of the Redis wire protocol (RESP2) for the session store; one socket per thread."""
+
+    def __init__(self, url: str = REDIS_URL, timeout: float = 2.0):
+        parsed = urlparse(url)
+        self.address = (parsed.hostname or "localhost", parsed.port or 6379)
+        self.password = parsed.password
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            sock = socket.create_connection(self.address, timeout=self.timeout)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            conn = self._local.conn = (sock, sock.makefile("rb"))
+            if self.password:
+                self._roundtrip(conn, [("AUTH", self.password)])
+            if self.db:
+                self._roundtrip(conn, [("SELECT", self.db)])
+        return conn
+
+    @staticmethod
+    def _encode(command) -> bytes:
+        parts = [b"*%d\r\n" % len(command)]
+        for arg in command:
+            data = arg if isinstance(arg, bytes) else str(arg).encode()
+            parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        return b"".join(parts)
+
+    def _read(self, reader):
+        line = reader.readline()
+        if not line:
+            raise ConnectionError("Redis connection closed")
+        kind, body = line[:1], line[1:-2]
+        if kind == b"+":
+            return body.decode()
+        if kind == b"-":
+            raise RedisError(body.decode())
+        if kind == b":":
+            return int(body)
+        if kind == b"$":
+            length = int(body)
+            if length < 0:
+                return None
+            return reader.read(length + 2)[:-2].decode()
+        if kind == b"*":
+            length = int(body)
+            return None if length < 0 else [self._read(reader) for _ in range(length)]
+        raise RedisError(f"Unexpected reply: {line!r}")
+
+    def _roundtrip(self, conn, commands):
+        sock, reader = conn
+        sock.sendall(b"".join(self._encode(command) for command in commands))
+        return [self._read(reader) for _ in commands]
+
+    def pipeline(self, *commands):
+        # Sends every command in one write, then reads the replies in order
+        try:
+            return self._roundtrip(self._connection(), commands)
+        except (OSError, ConnectionError):
+            self.close()
+            raise
+
+    def execute(self, *command):
+        return self.pipeline(command)[0]
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            self._local.conn = None
+            conn[0].close()
+
+
+class RedisSessionStore(SessionStore):
+    PREFIX = "pos:session:"
+    USER_PREFIX = "pos:user_sessions:"
+
+    def __init__(self, url: str = REDIS_URL, ttl: int = SESSION_TTL_SECONDS):
+        self.client = RespClient(url)
+        self.ttl = ttl
+
+    def put(self, token, user_id):
+        digest = _token_hash(token)
+        self.client.pipeline(
+            ("SET", self.PREFIX + digest, user_id, "EX", self.ttl),
+            ("SADD", f"{self.USER_PREFIX}{user_id}", digest),
+            ("EXPIRE", f"{self.USER_PREFIX}{user_id}", self.ttl),
+        )
+
+    def get(self, token):
+        user_id = self.client.execute("GET", self.PREFIX + _token_hash(token))
+        return int(user_id) if user_id is not None else None
+
+    def revoke(self, token):
+        digest = _token_hash(token)
+        user_id = self.client.execute("GET", self.PREFIX + digest)
+        commands = [("DEL", self.PREFIX + digest)]
+        if user_id is not None:
+            commands.append(("SREM", f"{self.USER_PREFIX}{user_id}", digest))
+        self.client.pipeline(*commands)
+
+    def revoke_user(self, user_id):
+        digests = self.client.execute("SMEMBERS", f"{self.USER_PREFIX}{user_id}") or []
+        self.client.pipeline(
+            *[("DEL", self.PREFIX + digest) for digest in digests],
+            ("DEL", f"{self.USER_PREFIX}{user_id}"),
+        )
+
+
+def build_session_store(backend: str = SESSION_BACKEND) -> SessionStore:
+    if backend == "memory":
+        return MemorySessionStore()
+    if backend == "sql":
+        return SqlSessionStore()
+    if backend == "redis":
+        return RedisSessionStore()
+    raise ValueError(f"Unknown SESSION_BACKEND '{backend}' (expected memory, sql or redis)")
+
+
+session_store = build_session_store()
@@ -0,0 +1,91 @@
+# benchmarks/_harness.py
+# Shared setup for the benchmark scripts. Points the app at a throwaway database
+# (SQLite in the temp dir unless BENCH_DATABASE_URL is set) and builds a fresh schema
+# with the admin/admin account, as `python manage.py setup` would. The admin is
+# users.id 1: scripts seeding their own users let the database assign the ids (or,
+# like seed_sales_history, use ids well past it).
+import os
+import random
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+from sqlalchemy import DefaultClause, MetaData, text
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_URL = f"sqlite:///{os.path.join(tempfile.gettempdir(), 'pos_bench.db')}"
+
+
+def bootstrap():
+    url = os.getenv("BENCH_DATABASE_URL", DEFAULT_URL)
+    os.environ["DATABASE_URL"] = url
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+
+    import database
+    import models
+
+    is_sqlite = url.startswith("sqlite")
+    if not is_sqlite and os.getenv("BENCH_ALLOW_RESET") != "1":
+        sys.exit("Refusing to reset a non-SQLite database; set BENCH_ALLOW_RESET=1 if it is a scratch DB.")
+
+    database.Base.metadata.drop_all(database.engine)
+    if is_sqlite:
+        # assets.updated_at uses MySQL's ON UPDATE clause, which SQLite can't parse;
+        # create a plain copy first so later create_all calls skip the table.
+        assets = models.Asset.__table__.to_metadata(MetaData())
+        assets.c.updated_at.server_default = DefaultClause(text("CURRENT_TIMESTAMP"))
+        assets.create(database.engine)
+    database.Base.metadata.create_all(database.engine)
+
+    import startup
+    startup.initialize_admin()
+    return database, models
+
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def seed_sales_history(database, models, days: int, orders_per_day: int, menu_items: int = 120, staff: int = 12):
+    """Staff (ids 100+), menu items (ids 1..menu_items, untracked stock) and `days` of completed orders
+    ending yesterday, with lunch and dinner peaks. Returns (first_day, order count, item count)."""
+    from sqlalchemy import insert
+
+    db = database.SessionLocal()
+    db.execute(insert(models.User), [
+        {"id": 100 + i, "username": f"staff{i}", "password_hash": "x", "role": "staff"} for i in range(staff)
+    ])
+    db.execute(insert(models.MenuItem), [
+        {"id": i, "name": f"Dish {i}", "price": 50.0 + 10 * (i % 30), "stock_quantity": None, "category": f"Cat {i % 6}"}
+        for i in range(1, menu_items + 1)
+    ])
+    first_day = datetime.utcnow().date() - timedelta(days=days)
+    order_id = item_id = 0
+    for offset in range(days):
+        day = datetime.combine(first_day + timedelta(days=offset), datetime.min.time())
+        orders, items = [], []
+        for _ in range(orders_per_day):
+            order_id += 1
+            stamp = day + timedelta(hours=random.choice((8, 11, 12, 12, 13, 13, 14, 18, 19, 19, 20)),
+                                    minutes=random.randrange(60), seconds=random.randrange(60))
+            total = 0.0
+            for menu_item in random.sample(range(1, menu_items + 1), k=random.choice((1, 2, 2, 3, 3, 4, 6))):
+                item_id += 1
+                quantity = random.randint(1, 3)
+                price = 50.0 + 10 * (menu_item % 30)
+                items.append({"id": item_id, "order_id": order_id, "menu_item_id": menu_item,
+                              "quantity": quantity, "unit_price": price, "subtotal": price * quantity})
+                total += price * quantity
+            orders.append({"id": order_id, "user_id": 100 + random.randrange(staff), "total_amount": total,
+                           "status": "cancelled" if random.random() < 0.03 else "completed",
+                           "order_date": stamp, "created_at": stamp})
+        db.execute(insert(models.Order), orders)
+        db.execute(insert(models.OrderItem), items)
+    db.commit()
+    db.close()
+    return first_day, order_id, item_id
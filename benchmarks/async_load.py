@@ -0,0 +1,117 @@
+# benchmarks/async_load.py
+# Throughput of the sync (threadpool) and async (DB_ASYNC=1) database layers under
+# many concurrent clients.
+#
+#   python benchmarks/async_load.py --clients 500 --seconds 10
+#
+# Each mode runs in its own subprocess (DB_ASYNC is read at import time) against a
+# fresh database and drives the real FastAPI app in-process over httpx with a mix
+# of till traffic: place orders, order stats, order history pages and menu reads.
+# SQLite serializes every write, so compare on MySQL (BENCH_DATABASE_URL=mysql+pymysql://...
+# with BENCH_ALLOW_RESET=1) to see the difference the async driver makes.
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--clients", type=int, default=500)
+parser.add_argument("--seconds", type=float, default=10.0)
+parser.add_argument("--mode", choices=["sync", "async"], help="run one mode (used internally)")
+args = parser.parse_args()
+
+MIX = [("order", 4), ("stats", 2), ("history", 2), ("menu", 2)]
+
+
+def compare():
+    results = {}
+    for mode in ("sync", "async"):
+        env = dict(os.environ, DB_ASYNC="1" if mode == "async" else "0")
+        out = subprocess.run(
+            [sys.executable, __file__, "--mode", mode, "--clients", str(args.clients), "--seconds", str(args.seconds)],
+            env=env, check=True, capture_output=True, text=True,
+        ).stdout
+        results[mode] = json.loads(out.strip().splitlines()[-1])
+
+    print(f"{args.clients} concurrent clients, {args.seconds:.0f}s per mode")
+    for mode, r in results.items():
+        print(
+            f"{mode:<6} {r['rps']:8.1f} req/s   p50 {r['p50']:7.1f} ms   p99 {r['p99']:7.1f} ms   "
+            f"errors {r['errors']}/{r['requests']}"
+        )
+    print(f"async / sync throughput: {results['async']['rps'] / max(results['sync']['rps'], 1e-9):.2f}x")
+
+
+def run_mode():
+    from _harness import bootstrap, percentile
+
+    database, models = bootstrap()
+
+    import httpx
+    import main
+
+    def seed():
+        db = database.SessionLocal()
+        db.add_all(models.MenuItem(name=f"Dish {i}", price=120.0 + i, category=f"Cat {i % 4}", stock_quantity=None)
+                   for i in range(1, 41))
+        db.commit()
+        db.close()
+
+    async def client_loop(client, headers, deadline, latencies, errors):
+        kinds = [kind for kind, weight in MIX for _ in range(weight)]
+        while time.perf_counter() < deadline:
+            kind = random.choice(kinds)
+            started = time.perf_counter()
+            try:
+                if kind == "order":
+                    items = [{"menu_item_id": random.randint(1, 40), "quantity": random.randint(1, 3)} for _ in range(3)]
+                    response = await client.post("/orders/", json={"user_id": 1, "items": items})
+                elif kind == "stats":
+                    response = await client.get("/orders/stats", headers=headers)
+                elif kind == "history":
+                    response = await client.get("/orders/", params={"limit": 20}, headers=headers)
+                else:
+                    response = await client.get("/menu/public", params={"category": f"Cat {random.randint(0, 3)}"})
+                ok = response.status_code == 200
+            except Exception:
+                ok = False
+            latencies.append(time.perf_counter() - started)
+            if not ok:
+                errors.append(kind)
+
+    async def run():
+        seed()
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            login = await client.post("/auth/login", json={"username": "admin", "password": "admin"})
+            headers = {"token": login.json()["token"]}
+
+            latencies, errors = [], []
+            deadline = time.perf_counter() + args.seconds
+            started = time.perf_counter()
+            await asyncio.gather(*[
+                client_loop(client, headers, deadline, latencies, errors) for _ in range(args.clients)
+            ])
+            elapsed = time.perf_counter() - started
+        await database.dispose_async_engine()
+
+        print(json.dumps({
+            "requests": len(latencies),
+            "errors": len(errors),
+            "rps": len(latencies) / elapsed,
+            "p50": percentile(latencies, 50) * 1000,
+            "p99": percentile(latencies, 99) * 1000,
+        }))
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    if args.mode:
+        run_mode()
+    else:
+        compare()
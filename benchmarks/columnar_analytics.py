@@ -0,0 +1,90 @@
+# benchmarks/columnar_analytics.py
+# Multi-year report queries: SQL (rollup tables and raw order scans) vs the columnar
+# export read by reporting/analytics.py.
+#
+#   python benchmarks/columnar_analytics.py --days 730 --orders-per-day 400
+#
+# Seeds synthetic history, rebuilds the rollups, exports every month to a temp
+# directory, checks both paths give the same insights, then times each query.
+import argparse
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from _harness import bootstrap, seed_sales_history
+
+database, models = bootstrap()
+
+from reporting import aggregates, analytics, columnar, rollups  # noqa: E402
+
+def seed(days: int, per_day: int):
+    first_day, orders, items = seed_sales_history(database, models, days, per_day)
+    db = database.SessionLocal()
+    rollups.rebuild_all(db)
+    db.close()
+    return first_day, orders, items
+
+
+def timed(fn, *args, repeat=5):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn(*args)
+        samples.append(time.perf_counter() - started)
+    return result, statistics.median(samples) * 1000
+
+
+def raw_sql_insights(db, start, end):
+    # The pre-rollup path: group by over orders/order_items directly
+    from sqlalchemy import func
+    Order, OrderItem = models.Order, models.OrderItem
+    in_range = (Order.order_date >= start, Order.order_date < end + timedelta(days=1), Order.status != "cancelled")
+    day = aggregates.order_day()
+    by_day = db.query(day, func.count(Order.id), func.sum(Order.total_amount),
+                      func.max(Order.total_amount), func.min(Order.total_amount)).filter(*in_range).group_by(day).all()
+    hour = aggregates.order_hour()
+    by_hour = db.query(hour, func.count(Order.id)).filter(*in_range).group_by(hour).all()
+    by_item = db.query(models.MenuItem.name, func.sum(OrderItem.quantity))\
+        .join(Order, Order.id == OrderItem.order_id).join(models.MenuItem, models.MenuItem.id == OrderItem.menu_item_id)\
+        .filter(*in_range).group_by(models.MenuItem.name).all()
+    by_staff = db.query(models.User.username, func.sum(Order.total_amount))\
+        .join(models.User, models.User.id == Order.user_id).filter(*in_range).group_by(models.User.username).all()
+    return aggregates.build_insights(by_day, by_hour, by_item, by_staff)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--days", type=int, default=730)
+    parser.add_argument("--orders-per-day", type=int, default=400)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    first_day, orders, items = seed(args.days, args.orders_per_day)
+    print(f"seeded {orders} orders / {items} items over {args.days} days in {time.perf_counter() - started:.1f}s")
+
+    root = tempfile.mkdtemp(prefix="pos_columnar_")
+    db = database.SessionLocal()
+    started = time.perf_counter()
+    columnar.export(db, since=first_day, root=root)
+    print(f"exported in {time.perf_counter() - started:.1f}s to {root}")
+
+    start, end = first_day, datetime.utcnow().date() - timedelta(days=1)
+    raw, raw_ms = timed(raw_sql_insights, db, start, end, repeat=1)
+    rolled, rollup_ms = timed(aggregates.sales_insights, db, start, end)
+    columns, columnar_ms = timed(analytics.sales_insights, start, end, root)
+    print(f"insights match: raw SQL {raw == columns}, rollups {rolled == columns}")
+    print(f"insights   raw SQL {raw_ms:9.1f} ms   rollups {rollup_ms:8.1f} ms   columnar {columnar_ms:7.1f} ms")
+
+    _, rollup_ms = timed(aggregates.daily_totals, db, start, end)
+    _, columnar_ms = timed(analytics.daily_totals, start, end, root)
+    print(f"chart data                     rollups {rollup_ms:8.1f} ms   columnar {columnar_ms:7.1f} ms")
+
+    _, heatmap_ms = timed(analytics.item_hour_heatmap, start, end, 20, root)
+    pairs, baskets_ms = timed(analytics.basket_pairs, start, end, 20, root)
+    print(f"heatmap {heatmap_ms:.1f} ms, basket pairs {baskets_ms:.1f} ms over {pairs['orders']} orders")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
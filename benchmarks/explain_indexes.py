@@ -0,0 +1,120 @@
+# benchmarks/explain_indexes.py
+# Runs EXPLAIN (MySQL) / EXPLAIN QUERY PLAN (SQLite) on the reporting queries and
+# fails if any of them stops range-scanning the index it was written for.
+#
+#   python benchmarks/explain_indexes.py   # exit status 1 if any check fails
+import random
+import sys
+from datetime import datetime, timedelta
+
+from _harness import bootstrap
+
+database, models = bootstrap()
+
+from sqlalchemy import func, select  # noqa: E402
+from models import Order, OrderItem, Expense, DailySales, ItemDailySales  # noqa: E402
+from reporting.aggregates import order_day  # noqa: E402
+
+START, END = datetime(2025, 3, 1), datetime(2025, 4, 1)
+
+CHECKS = [
+    (
+        "order date range (rollup rebuild)",
+        "ix_orders_date_user_total",
+        select(order_day(), func.count(Order.id), func.sum(Order.total_amount))
+        .where(Order.order_date >= START, Order.order_date < END)
+        .group_by(order_day()),
+    ),
+    (
+        "order -> item quantities",
+        "ix_order_items_order_item_qty",
+        select(OrderItem.menu_item_id, func.sum(OrderItem.quantity))
+        .join(Order, Order.id == OrderItem.order_id)
+        .where(Order.order_date >= START, Order.order_date < END)
+        .group_by(OrderItem.menu_item_id),
+    ),
+    (
+        "expense summary range",
+        "ix_expenses_created_at",
+        select(Expense.category, func.sum(Expense.amount))
+        .where(Expense.created_at >= START, Expense.created_at < END)
+        .group_by(Expense.category),
+    ),
+    (
+        "daily rollup range",
+        "PRIMARY" if database.engine.dialect.name == "mysql" else "sqlite_autoindex_sales_daily_1",
+        select(DailySales.day, DailySales.total_sales).where(DailySales.day >= START.date(), DailySales.day < END.date()),
+    ),
+    (
+        "item rollup range",
+        "PRIMARY" if database.engine.dialect.name == "mysql" else "sqlite_autoindex_sales_item_daily_1",
+        select(ItemDailySales.menu_item_id, func.sum(ItemDailySales.quantity))
+        .where(ItemDailySales.day >= START.date(), ItemDailySales.day < END.date())
+        .group_by(ItemDailySales.menu_item_id),
+    ),
+]
+
+
+def seed(orders=20000):
+    random.seed(5)
+    db = database.SessionLocal()
+    till = models.User(username="till", password_hash="x")  # id from the database: the harness seeds the admin
+    db.add(till)
+    db.add_all(models.MenuItem(id=i, name=f"Item {i}", price=100.0) for i in range(1, 41))
+    db.commit()
+    till_id = till.id
+
+    first = datetime(2023, 1, 1)
+    order_rows, item_rows, expense_rows = [], [], []
+    for order_id in range(1, orders + 1):
+        when = first + timedelta(minutes=random.randint(0, 60 * 24 * 900))
+        order_rows.append({"id": order_id, "user_id": till_id, "total_amount": 300.0, "order_date": when, "status": "completed"})
+        item_rows.append({"order_id": order_id, "menu_item_id": random.randint(1, 40), "quantity": 3, "unit_price": 100.0, "subtotal": 300.0})
+        if order_id % 10 == 0:
+            expense_rows.append({"category": "Supplies", "amount": 50.0, "date": when, "created_at": when})
+    db.execute(Order.__table__.insert(), order_rows)
+    db.execute(OrderItem.__table__.insert(), item_rows)
+    db.execute(Expense.__table__.insert(), expense_rows)
+    db.commit()
+
+    from reporting.rollups import rebuild_all
+    rebuild_all(db)
+    db.close()
+
+
+def plan(conn, stmt):
+    compiled = stmt.compile(bind=conn)
+    params = compiled.params
+    if compiled.positional:
+        params = tuple(params[name] for name in compiled.positiontup)
+
+    if conn.dialect.name == "mysql":
+        rows = conn.exec_driver_sql("EXPLAIN " + str(compiled), params).mappings().all()
+        return [str(row["key"]) for row in rows], rows
+    rows = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + str(compiled), params).all()
+    return [row[-1] for row in rows], rows
+
+
+def main():
+    seed()
+    with database.engine.connect() as conn:
+        if conn.dialect.name == "mysql":
+            conn.exec_driver_sql("ANALYZE TABLE orders, order_items, expenses")
+        else:
+            conn.exec_driver_sql("ANALYZE")
+
+        failures = 0
+        for label, index, stmt in CHECKS:
+            details, rows = plan(conn, stmt)
+            ok = any(index in detail for detail in details)
+            failures += not ok
+            print(f"[{'ok' if ok else 'FAIL'}] {label}: expected {index}")
+            for row in rows:
+                print(f"       {tuple(row)}")
+
+    print(f"{len(CHECKS) - failures}/{len(CHECKS)} index checks passed")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
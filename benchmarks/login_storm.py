@@ -0,0 +1,100 @@
+# benchmarks/login_storm.py
+# Order latency with and without a burst of concurrent logins (shift change).
+#
+#   python benchmarks/login_storm.py --seconds 5 --order-workers 4 --logins 30
+#
+# Drives the real FastAPI app in-process over httpx. --rounds sets BCRYPT_ROUNDS
+# for the run (production default is 12).
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--seconds", type=float, default=5.0)
+parser.add_argument("--order-workers", type=int, default=4)
+parser.add_argument("--logins", type=int, default=30)
+parser.add_argument("--rounds", type=int, default=12)
+args = parser.parse_args()
+os.environ["BCRYPT_ROUNDS"] = str(args.rounds)
+
+from _harness import bootstrap, percentile  # noqa: E402
+
+database, models = bootstrap()
+
+import httpx  # noqa: E402
+from auth import hashing  # noqa: E402
+import main  # noqa: E402
+
+STAFF = 10
+
+
+def seed():
+    db = database.SessionLocal()
+    password_hash = hashing.hash_password("shift-pass")
+    db.add_all(models.User(username=f"staff{i}", password_hash=password_hash, role="staff") for i in range(STAFF))
+    db.add_all(models.MenuItem(name=f"Dish {i}", price=350.0, stock_quantity=None) for i in range(20))
+    db.commit()
+    db.close()
+
+
+async def order_worker(client, deadline, latencies):
+    payload = {"user_id": 1, "items": [{"menu_item_id": 1, "quantity": 2}, {"menu_item_id": 5, "quantity": 1}]}
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        response = await client.post("/orders/", json=payload)
+        response.raise_for_status()
+        latencies.append(time.perf_counter() - started)
+
+
+async def login(client, index, results):
+    started = time.perf_counter()
+    response = await client.post("/auth/login", json={"username": f"staff{index % STAFF}", "password": "shift-pass"})
+    results.append((response.status_code, time.perf_counter() - started))
+
+
+async def sample_queue(deadline, depths):
+    while time.perf_counter() < deadline:
+        depths.append(hashing.queue_depth())
+        await asyncio.sleep(0.01)
+
+
+async def phase(client, storm):
+    deadline = time.perf_counter() + args.seconds
+    latencies, logins, depths = [], [], []
+    tasks = [order_worker(client, deadline, latencies) for _ in range(args.order_workers)]
+    tasks.append(sample_queue(deadline, depths))
+    if storm:
+        tasks += [login(client, i, logins) for i in range(args.logins)]
+    await asyncio.gather(*tasks)
+    return latencies, logins, depths
+
+
+def report(label, latencies, logins, depths):
+    print(
+        f"{label:<12} orders {len(latencies) / args.seconds:7.1f}/s   "
+        f"p50 {percentile(latencies, 50) * 1000:7.1f} ms   "
+        f"p95 {percentile(latencies, 95) * 1000:7.1f} ms   "
+        f"p99 {percentile(latencies, 99) * 1000:7.1f} ms"
+    )
+    if logins:
+        ok = sum(status == 200 for status, _ in logins)
+        print(
+            f"{'':<12} logins {ok}/{len(logins)} ok, "
+            f"p99 {percentile([t for _, t in logins], 99) * 1000:.0f} ms, "
+            f"max hash queue depth {max(depths, default=0)} ({hashing.HASH_WORKERS} hashing threads)"
+        )
+
+
+async def run():
+    seed()
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await phase(client, storm=False)  # warm-up
+        report("baseline", *await phase(client, storm=False))
+        report("login storm", *await phase(client, storm=True))
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(run()))
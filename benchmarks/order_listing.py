@@ -0,0 +1,85 @@
+# benchmarks/order_listing.py
+# Cost of listing a long order history through GET /orders/ (JSON pages) and
+# GET /orders/?format=ndjson, plus the other admin list endpoints.
+#
+#   python benchmarks/order_listing.py --orders 10000 --page-size 1000
+#
+# Seeds ORDERS orders (about three items each) and drives the real app in-process
+# over httpx. Every listing is repeated and the median reported, with the CPU time
+# of the process over the same run (the listing is CPU-bound once the rows are read).
+import argparse
+import asyncio
+import statistics
+import time
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--orders", type=int, default=10000)
+parser.add_argument("--page-size", type=int, default=1000)
+parser.add_argument("--repeat", type=int, default=5)
+args = parser.parse_args()
+
+from _harness import bootstrap, seed_sales_history  # noqa: E402
+
+database, models = bootstrap()
+
+import httpx  # noqa: E402
+
+import main  # noqa: E402
+
+ORDERS_PER_DAY = 100
+
+
+async def full_listing(client, headers):
+    pages, size, params = 0, 0, {"limit": args.page_size}
+    while True:
+        response = await client.get("/orders/", params=params, headers=headers)
+        response.raise_for_status()
+        pages += 1
+        size += len(response.content)
+        cursor = response.headers.get("x-next-cursor")
+        if not cursor:
+            return pages, size
+        params = {"limit": args.page_size, "cursor": cursor}
+
+
+async def get(client, headers, path, **params):
+    response = await client.get(path, params=params, headers=headers)
+    response.raise_for_status()
+    return 1, len(response.content)
+
+
+async def timed(listing):
+    wall, cpu = [], []
+    for _ in range(args.repeat):
+        started, started_cpu = time.perf_counter(), time.process_time()
+        result = await listing()
+        wall.append(time.perf_counter() - started)
+        cpu.append(time.process_time() - started_cpu)
+    return result, statistics.median(wall) * 1000, statistics.median(cpu) * 1000
+
+
+async def run():
+    days = max(1, args.orders // ORDERS_PER_DAY)
+    _, orders, items = seed_sales_history(database, models, days, ORDERS_PER_DAY)
+    print(f"{orders} orders, {items} items")
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        login = await client.post("/auth/login", json={"username": "admin", "password": "admin"})
+        headers = {"token": login.json()["token"]}
+
+        cases = {
+            f"orders, JSON pages of {args.page_size}": lambda: full_listing(client, headers),
+            "orders, one page of 50": lambda: get(client, headers, "/orders/", limit=50),
+            "orders, NDJSON export": lambda: get(client, headers, "/orders/", format="ndjson"),
+            "menu items (admin)": lambda: get(client, headers, "/menu/"),
+            "users": lambda: get(client, headers, "/users/"),
+        }
+        for label, listing in cases.items():
+            (requests, size), wall, cpu = await timed(listing)
+            print(f"{label:<32} {wall:8.1f} ms   cpu {cpu:8.1f} ms   {requests:3d} request(s)   {size / 1024:8.0f} KiB")
+    await database.dispose_async_engine()
+
+
+if __name__ == "__main__":
+    asyncio.run(run())
@@ -0,0 +1,133 @@
+# benchmarks/session_store.py
+# Token validations per second for each session backend.
+#
+#   python benchmarks/session_store.py --tokens 2000 --lookups 20000 --threads 8
+#
+# The redis backend runs against REDIS_URL when it is set, otherwise against the
+# small in-process Redis-protocol stand-in below (GET/SET EX/DEL/SADD/SREM/SMEMBERS/EXPIRE).
+import argparse
+import os
+import random
+import socketserver
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from _harness import bootstrap
+
+database, models = bootstrap()
+
+from auth.sessions import MemorySessionStore, RedisSessionStore, SqlSessionStore  # noqa: E402
+
+
+class FakeRedisHandler(socketserver.StreamRequestHandler):
+    def _reply(self, value):
+        if value is None:
+            self.wfile.write(b"$-1\r\n")
+        elif isinstance(value, int):
+            self.wfile.write(b":%d\r\n" % value)
+        elif isinstance(value, list):
+            self.wfile.write(b"*%d\r\n" % len(value))
+            for item in value:
+                self._reply(item)
+        elif value == "OK":
+            self.wfile.write(b"+OK\r\n")
+        else:
+            data = value.encode()
+            self.wfile.write(b"$%d\r\n%s\r\n" % (len(data), data))
+
+    def _command(self):
+        header = self.rfile.readline()
+        if not header:
+            return None
+        args = []
+        for _ in range(int(header[1:])):
+            length = int(self.rfile.readline()[1:])
+            args.append(self.rfile.read(length + 2)[:-2].decode())
+        return args
+
+    def handle(self):
+        store, lock = self.server.store, self.server.lock
+        while True:
+            args = self._command()
+            if args is None:
+                return
+            name, rest = args[0].upper(), args[1:]
+            with lock:
+                now = time.monotonic()
+                for key in [k for k, (_, expires) in store.items() if expires and expires <= now][:10]:
+                    del store[key]
+                if name == "GET":
+                    entry = store.get(rest[0])
+                    reply = entry[0] if entry and not (entry[1] and entry[1] <= now) else None
+                elif name == "SET":
+                    expires = now + int(rest[3]) if len(rest) > 3 and rest[2].upper() == "EX" else None
+                    store[rest[0]] = (rest[1], expires)
+                    reply = "OK"
+                elif name == "DEL":
+                    reply = sum(store.pop(key, None) is not None for key in rest)
+                elif name == "SADD":
+                    members = store.setdefault(rest[0], (set(), None))[0]
+                    reply = len(set(rest[1:]) - members)
+                    members.update(rest[1:])
+                elif name == "SREM":
+                    members = store.get(rest[0], (set(), None))[0]
+                    reply = len(members & set(rest[1:]))
+                    members.difference_update(rest[1:])
+                elif name == "SMEMBERS":
+                    reply = sorted(store.get(rest[0], (set(), None))[0])
+                elif name == "EXPIRE":
+                    if rest[0] in store:
+                        store[rest[0]] = (store[rest[0]][0], now + int(rest[1]))
+                    reply = int(rest[0] in store)
+                else:
+                    reply = "OK"
+            self._reply(reply)
+            self.wfile.flush()
+
+
+def start_fake_redis():
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), FakeRedisHandler)
+    server.daemon_threads = True
+    server.store, server.lock = {}, threading.Lock()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"redis://127.0.0.1:{server.server_address[1]}/0"
+
+
+def bench(name, store, user_ids, tokens, lookups, threads):
+    issued = [store.create(random.choice(user_ids)) for _ in range(tokens)]
+    sample = [random.choice(issued) for _ in range(lookups)]
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        found = sum(user_id is not None for user_id in pool.map(store.get, sample))
+    elapsed = time.perf_counter() - started
+
+    store.revoke(issued[0])
+    assert store.get(issued[0]) is None, "revoked token still valid"
+    print(f"{name:<8} {lookups / elapsed:>12,.0f} validations/s   ({found}/{lookups} valid, {threads} threads)")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tokens", type=int, default=2000)
+    parser.add_argument("--lookups", type=int, default=20000)
+    parser.add_argument("--threads", type=int, default=8)
+    args = parser.parse_args()
+
+    # Ids from the database: the harness has already seeded the admin
+    db = database.SessionLocal()
+    staff = [models.User(username=f"staff{i}", password_hash="x") for i in range(50)]
+    db.add_all(staff)
+    db.commit()
+    user_ids = [user.id for user in staff]
+    db.close()
+
+    redis_url = os.getenv("REDIS_URL") or start_fake_redis()
+    bench("memory", MemorySessionStore(), user_ids, args.tokens, args.lookups, args.threads)
+    bench("sql", SqlSessionStore(database.engine), user_ids, args.tokens, args.lookups, args.threads)
+    bench("redis", RedisSessionStore(redis_url), user_ids, args.tokens, args.lookups, args.threads)
+
+
+if __name__ == "__main__":
+    main()
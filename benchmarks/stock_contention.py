@@ -0,0 +1,105 @@
+# benchmarks/stock_contention.py
+# Fires many parallel orders at the same few hot menu items and reports throughput,
+# rejected (409) tickets and oversell.
+#
+#   python benchmarks/stock_contention.py --orders 400 --workers 32 --stock 150
+#
+# Uses SQLite by default; point BENCH_DATABASE_URL at a scratch MySQL database
+# (with BENCH_ALLOW_RESET=1) to exercise real InnoDB row locking. Orders go through
+# the same session and retry path as POST /orders/ (DB_ASYNC=1 for the async driver).
+import argparse
+import asyncio
+import random
+import time
+from contextlib import asynccontextmanager
+
+from _harness import bootstrap, percentile
+
+database, models = bootstrap()
+
+from fastapi import HTTPException  # noqa: E402
+from sqlalchemy import func  # noqa: E402
+import schemas  # noqa: E402
+from routers.orders import place_order  # noqa: E402
+from stock import run_with_retry_async  # noqa: E402
+
+TILL_USER = 2  # id 1 is the admin the harness seeds
+
+
+def seed(hot_items, stock):
+    db = database.SessionLocal()
+    db.add(models.User(id=TILL_USER, username="till", password_hash="x", role="staff"))
+    for item_id in range(1, hot_items + 1):
+        db.add(models.MenuItem(id=item_id, name=f"Hot item {item_id}", price=250.0, stock_quantity=stock))
+    db.add(models.MenuItem(id=hot_items + 1, name="Untracked soda", price=80.0, stock_quantity=None))
+    db.commit()
+    db.close()
+
+
+async def place(hot_items, slots):
+    items = [
+        {"menu_item_id": item_id, "quantity": random.randint(1, 2)}
+        for item_id in random.sample(range(1, hot_items + 1), k=min(2, hot_items))
+    ]
+    items.append({"menu_item_id": hot_items + 1, "quantity": 1})
+    payload = schemas.OrderCreate(user_id=TILL_USER, items=items)
+
+    async with slots, asynccontextmanager(database.get_async_db)() as db:
+        started = time.perf_counter()
+        try:
+            await run_with_retry_async(db, place_order, payload)
+            return "ok", time.perf_counter() - started
+        except HTTPException as exc:
+            return ("rejected" if exc.status_code == 409 else "error"), time.perf_counter() - started
+        except Exception:
+            return "error", time.perf_counter() - started
+
+
+async def place_all(args):
+    slots = asyncio.Semaphore(args.workers)  # orders in flight at once
+    results = await asyncio.gather(*[place(args.hot_items, slots) for _ in range(args.orders)])
+    await database.dispose_async_engine()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--orders", type=int, default=400)
+    parser.add_argument("--workers", type=int, default=32)
+    parser.add_argument("--hot-items", type=int, default=3)
+    parser.add_argument("--stock", type=int, default=150)
+    args = parser.parse_args()
+
+    seed(args.hot_items, args.stock)
+
+    started = time.perf_counter()
+    results = asyncio.run(place_all(args))
+    elapsed = time.perf_counter() - started
+
+    db = database.SessionLocal()
+    sold = dict(
+        db.query(models.OrderItem.menu_item_id, func.sum(models.OrderItem.quantity))
+        .group_by(models.OrderItem.menu_item_id)
+        .all()
+    )
+    remaining = dict(db.query(models.MenuItem.id, models.MenuItem.stock_quantity).all())
+    db.close()
+
+    oversell = sum(max(0, (sold.get(i) or 0) - args.stock) for i in range(1, args.hot_items + 1))
+    drift = sum(abs(args.stock - (sold.get(i) or 0) - remaining[i]) for i in range(1, args.hot_items + 1))
+    latencies = [latency for _, latency in results]
+    outcomes = [outcome for outcome, _ in results]
+
+    print(f"database        {database.engine.url.render_as_string(hide_password=True)}")
+    print(f"orders          {args.orders} ({args.workers} workers, {args.hot_items} hot items x {args.stock} stock)")
+    print(f"accepted        {outcomes.count('ok')}")
+    print(f"rejected (409)  {outcomes.count('rejected')}")
+    print(f"errors          {outcomes.count('error')}")
+    print(f"throughput      {args.orders / elapsed:.1f} orders/s")
+    print(f"latency p50/p99 {percentile(latencies, 50) * 1000:.1f} / {percentile(latencies, 99) * 1000:.1f} ms")
+    print(f"oversell        {oversell} units")
+    print(f"stock drift     {drift} units")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+# benchmarks/suite.py
+# End-to-end latency of the hot endpoints against a realistic amount of history,
+# with a saved baseline to catch regressions between commits.
+#
+#   python benchmarks/suite.py                                  # run and print
+#   python benchmarks/suite.py --save-baseline benchmarks/baseline.json
+#   python benchmarks/suite.py --compare benchmarks/baseline.json   # exit 1 on regression
+#
+# Seeds DAYS of orders (default three years, ~33k orders / ~100k items) plus the
+# rollups, then drives the real FastAPI app in-process over httpx. Each scenario
+# reports throughput, p50/p95/p99 and SQL statements per request (read from the
+# Server-Timing header instrumentation.py adds). A scenario regresses when its p95
+# grows by more than --tolerance or it runs more SQL statements than the baseline.
+# Latencies are only comparable on the same machine and database; the statement
+# counts are comparable anywhere. BENCH_DATABASE_URL (with BENCH_ALLOW_RESET=1)
+# runs it against MySQL.
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import re
+import sys
+import time
+from datetime import datetime
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--days", type=int, default=1095)
+parser.add_argument("--orders-per-day", type=int, default=30)
+parser.add_argument("--requests", type=int, default=200, help="measured requests per scenario")
+parser.add_argument("--concurrency", type=int, default=8)
+parser.add_argument("--only", help="comma-separated scenario names")
+parser.add_argument("--save-baseline", metavar="PATH")
+parser.add_argument("--compare", metavar="PATH")
+parser.add_argument("--tolerance", type=float, default=0.25, help="allowed p95 growth (0.25 = +25%%)")
+args = parser.parse_args()
+
+os.environ.setdefault("SERVER_TIMING", "1")
+
+from _harness import bootstrap, percentile, seed_sales_history  # noqa: E402
+
+database, models = bootstrap()
+
+import httpx  # noqa: E402
+
+import main  # noqa: E402
+from reporting import rollups  # noqa: E402
+from reporting.result_cache import report_cache  # noqa: E402
+
+MENU_ITEMS = 120
+STAFF = 12
+WARMUP = 5
+MIN_P95_DELTA_MS = 2.0  # smaller p95 changes are timer noise, whatever the percentage
+SQL_COUNT = re.compile(r'desc="(\d+) queries"')
+
+
+# ------------------ Scenarios ------------------
+# name -> (share of --requests, serial, request coroutine). Serial scenarios run one
+# request at a time because they reset shared state (the report cache) per request.
+async def login(client, headers):
+    return await client.post("/auth/login", json={"username": "admin", "password": "admin"})
+
+
+async def menu_public(client, headers):
+    params = {"category": f"Cat {random.randrange(6)}"} if random.random() < 0.5 else {}
+    return await client.get("/menu/public", params=params)
+
+
+async def orders_list(client, headers):
+    return await client.get("/orders/", params={"limit": 50}, headers=headers)
+
+
+async def orders_stats(client, headers):
+    return await client.get("/orders/stats", headers=headers)
+
+
+async def reports_insights_cold(client, headers):
+    report_cache.clear()
+    return await client.get("/reports/insights", params={"period": "all"}, headers=headers)
+
+
+async def reports_insights_cached(client, headers):
+    return await client.get("/reports/insights", params={"period": "all"}, headers=headers)
+
+
+async def reports_chart_cold(client, headers):
+    report_cache.clear()
+    return await client.get("/reports/chart-data", params={"period": "all"}, headers=headers)
+
+
+async def orders_create(client, headers):
+    items = [{"menu_item_id": menu_item, "quantity": random.randint(1, 3)}
+             for menu_item in random.sample(range(1, MENU_ITEMS + 1), k=random.randint(1, 4))]
+    return await client.post("/orders/", json={"user_id": 100 + random.randrange(STAFF), "items": items})
+
+
+# Writes last, so every read runs against the same seeded data
+SCENARIOS = {
+    "login": (0.1, False, login),  # bcrypt dominates; a few requests are enough
+    "menu_public": (1, False, menu_public),
+    "orders_list": (1, False, orders_list),
+    "orders_stats": (1, False, orders_stats),
+    "reports_insights_all_cold": (0.25, True, reports_insights_cold),
+    "reports_insights_all_cached": (1, False, reports_insights_cached),
+    "reports_chart_all_cold": (0.25, True, reports_chart_cold),
+    "orders_create": (1, False, orders_create),
+}
+
+
+# ------------------ Runner ------------------
+async def run_scenario(client, headers, request, count: int, concurrency: int) -> dict:
+    for _ in range(WARMUP):
+        (await request(client, headers)).raise_for_status()
+
+    latencies, statements, errors = [], [], 0
+    remaining = iter(range(count))
+
+    async def worker():
+        nonlocal errors
+        for _ in remaining:
+            started = time.perf_counter()
+            response = await request(client, headers)
+            latencies.append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                errors += 1
+            match = SQL_COUNT.search(response.headers.get("server-timing", ""))
+            if match:
+                statements.append(int(match.group(1)))
+
+    started = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    elapsed = time.perf_counter() - started
+    return {
+        "requests": count,
+        "errors": errors,
+        "rps": round(count / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "sql_per_request": round(sum(statements) / len(statements), 2) if statements else None,
+    }
+
+
+def regressions(results: dict, baseline: dict, tolerance: float):
+    found = []
+    for name, current in results.items():
+        before = baseline["scenarios"].get(name)
+        if before is None:
+            continue
+        if current["p95_ms"] > before["p95_ms"] * (1 + tolerance) and current["p95_ms"] - before["p95_ms"] > MIN_P95_DELTA_MS:
+            found.append(f"{name}: p95 {before['p95_ms']:.1f} -> {current['p95_ms']:.1f} ms")
+        if (current["sql_per_request"] or 0) > (before["sql_per_request"] or 0) + 0.5:
+            found.append(f"{name}: SQL per request {before['sql_per_request']} -> {current['sql_per_request']}")
+        if current["errors"]:
+            found.append(f"{name}: {current['errors']} failed requests")
+    return found
+
+
+def report(results: dict, baseline: dict = None):
+    print(f"{'scenario':<30}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'sql/req':>9}{'vs base p95':>13}")
+    for name, r in results.items():
+        before = (baseline or {}).get("scenarios", {}).get(name)
+        delta = f"{(r['p95_ms'] / before['p95_ms'] - 1) * 100:+.0f}%" if before and before["p95_ms"] else ""
+        print(f"{name:<30}{r['rps']:9.1f}{r['p50_ms']:9.1f}{r['p95_ms']:9.1f}{r['p99_ms']:9.1f}"
+              f"{r['sql_per_request'] if r['sql_per_request'] is not None else '-':>9}{delta:>13}")
+
+
+async def run() -> int:
+    names = args.only.split(",") if args.only else list(SCENARIOS)
+    unknown = set(names) - set(SCENARIOS)
+    if unknown:
+        sys.exit(f"Unknown scenarios: {', '.join(sorted(unknown))} (expected {', '.join(SCENARIOS)})")
+
+    started = time.perf_counter()
+    _, orders, items = seed_sales_history(database, models, args.days, args.orders_per_day, MENU_ITEMS, STAFF)
+    db = database.SessionLocal()
+    rollups.rebuild_all(db)
+    db.close()
+    print(f"Seeded {orders} orders / {items} items over {args.days} days in {time.perf_counter() - started:.1f}s",
+          file=sys.stderr)
+
+    results = {}
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        login_response = await client.post("/auth/login", json={"username": "admin", "password": "admin"})
+        headers = {"token": login_response.json()["token"]}
+        for name in names:
+            share, serial, request = SCENARIOS[name]
+            count = max(WARMUP, int(args.requests * share))
+            results[name] = await run_scenario(client, headers, request, count, 1 if serial else args.concurrency)
+    await database.dispose_async_engine()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as fh:
+            baseline = json.load(fh)
+    report(results, baseline)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as fh:
+            json.dump({
+                "created_at": datetime.utcnow().isoformat(timespec="seconds"),
+                "database": database.engine.dialect.name,
+                "db_async": database.DB_ASYNC,
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "days": args.days,
+                "orders_per_day": args.orders_per_day,
+                "requests": args.requests,
+                "concurrency": args.concurrency,
+                "scenarios": results,
+            }, fh, indent=2)
+            fh.write("\n")
+        print(f"Baseline written to {args.save_baseline}", file=sys.stderr)
+
+    if baseline is not None:
+        found = regressions(results, baseline, args.tolerance)
+        for line in found:
+            print(f"REGRESSION {line}")
+        return 1 if found else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(run()))
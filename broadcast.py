@@ -0,0 +1,209 @@
+# broadcast.py
+# Live order feed. Routers publish events after their commit; dashboards subscribe
+# over SSE or WebSocket (routers/orders.py) instead of polling GET /orders/.
+# The hub keeps the last ORDER_FEED_BUFFER events, so a client that reconnects with
+# its last event id gets what it missed; if that id is gone it gets a `reset`
+# event and should reload GET /orders/ and /orders/stats once.
+# Pick a backend with ORDER_FEED_BACKEND:
+#   memory - this process only (single worker / tests)
+#   redis  - a Redis stream at REDIS_URL, shared by every worker and node
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from itertools import count
+from typing import Optional
+
+from fastapi.concurrency import run_in_threadpool
+
+from auth.sessions import REDIS_URL, RedisError, RespClient
+from metrics import Counter, Gauge
+
+ORDER_FEED_BACKEND = os.getenv("ORDER_FEED_BACKEND", "memory")
+ORDER_FEED_BUFFER = int(os.getenv("ORDER_FEED_BUFFER", "1000"))
+# Undelivered events a subscriber may queue before it is disconnected (it can resume)
+ORDER_FEED_QUEUE_SIZE = int(os.getenv("ORDER_FEED_QUEUE_SIZE", "256"))
+ORDER_FEED_HEARTBEAT_SECONDS = float(os.getenv("ORDER_FEED_HEARTBEAT_SECONDS", "15"))
+
+logger = logging.getLogger(__name__)
+
+feed_events = Counter("pos_order_feed_events_total", "Events delivered to this worker's order feed", ("type",))
+feed_dropped = Counter("pos_order_feed_dropped_total", "Subscribers disconnected for falling behind")
+feed_errors = Counter("pos_order_feed_publish_errors_total", "Events that could not be published")
+
+
+class Subscription:
+    """Async iterator of events; yields None after ORDER_FEED_HEARTBEAT_SECONDS without one."""
+
+    def __init__(self, backlog, heartbeat: float = ORDER_FEED_HEARTBEAT_SECONDS):
+        self.backlog = deque(backlog)
+        self.queue = asyncio.Queue(maxsize=ORDER_FEED_QUEUE_SIZE)
+        self.heartbeat = heartbeat
+        self.dropped = False
+
+    def push(self, event) -> bool:
+        try:
+            self.queue.put_nowait(event)
+            return True
+        except asyncio.QueueFull:
+            return False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> Optional[dict]:
+        if self.backlog:
+            return self.backlog.popleft()
+        if self.dropped and self.queue.empty():
+            raise StopAsyncIteration
+        try:
+            return await asyncio.wait_for(self.queue.get(), self.heartbeat)
+        except asyncio.TimeoutError:
+            return None
+
+
+class BroadcastHub:
+    def __init__(self, backend, buffer_size: int = ORDER_FEED_BUFFER):
+        self.backend = backend
+        self.buffer = deque(maxlen=buffer_size)
+        self.subscribers = set()
+        backend.attach(self)
+
+    async def start(self):
+        self.backend.start(asyncio.get_running_loop())
+
+    async def stop(self):
+        self.backend.stop()
+
+    async def publish(self, event_type: str, data: dict):
+        # Best effort: the change is already committed, and clients can always reload
+        try:
+            await self.backend.publish(event_type, data)
+        except (OSError, ConnectionError, RedisError):
+            feed_errors.inc()
+            logger.warning("Could not publish %s to the order feed", event_type, exc_info=True)
+
+    def deliver(self, event: dict):
+        # Called on the event loop by the backend, once per event, in order
+        self.buffer.append(event)
+        feed_events.inc(type=event["type"])
+        for subscription in list(self.subscribers):
+            if not subscription.push(event):
+                self.subscribers.discard(subscription)
+                subscription.dropped = True
+                feed_dropped.inc()
+
+    def subscribe(self, last_event_id: Optional[str] = None) -> Subscription:
+        backlog = []
+        if last_event_id:
+            ids = [event["id"] for event in self.buffer]
+            if last_event_id in ids:
+                backlog = list(self.buffer)[ids.index(last_event_id) + 1:]
+            else:
+                latest = self.buffer[-1]["id"] if self.buffer else None
+                backlog = [{"id": latest, "type": "reset", "data": {"reason": "last event id is no longer buffered"}}]
+        subscription = Subscription(backlog)
+        self.subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        self.subscribers.discard(subscription)
+
+
+# ------------------ In-process ------------------
+class MemoryBackend:
+    def __init__(self):
+        # Ids stay unique across restarts so a stale client id never matches a new event
+        self.epoch = int(time.time() * 1000)
+        self.sequence = count(1)
+
+    def attach(self, hub):
+        self.hub = hub
+
+    def start(self, loop):
+        pass
+
+    def stop(self):
+        pass
+
+    async def publish(self, event_type, data):
+        self.hub.deliver({"id": f"{self.epoch}-{next(self.sequence)}", "type": event_type, "data": data})
+
+
+# ------------------ Redis stream ------------------
+class RedisStreamBackend:
+    """XADD on publish; one thread per worker tails the stream with XREAD and hands events to the loop."""
+
+    STREAM = "pos:order_feed"
+    BLOCK_MS = 1000
+
+    def __init__(self, url: str = REDIS_URL, maxlen: int = ORDER_FEED_BUFFER):
+        self.client = RespClient(url)
+        self.reader = RespClient(url, timeout=self.BLOCK_MS / 1000 + 5)
+        self.maxlen = maxlen
+        self._stop = threading.Event()
+        self._thread = None
+
+    def attach(self, hub):
+        self.hub = hub
+
+    def start(self, loop):
+        self.loop = loop
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._listen, name="order-feed", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.BLOCK_MS / 1000 + 1)
+            self._thread = None
+        self.reader.close()
+
+    async def publish(self, event_type, data):
+        await run_in_threadpool(
+            self.client.execute, "XADD", self.STREAM, "MAXLEN", "~", self.maxlen, "*",
+            "type", event_type, "data", json.dumps(data),
+        )
+
+    def _hand_over(self, entries):
+        for entry_id, fields in entries:
+            values = dict(zip(fields[::2], fields[1::2]))
+            event = {"id": entry_id, "type": values["type"], "data": json.loads(values["data"])}
+            self.loop.call_soon_threadsafe(self.hub.deliver, event)
+        return entries[-1][0] if entries else None
+
+    def _listen(self):
+        last_id = None
+        while not self._stop.is_set():
+            try:
+                if last_id is None:
+                    # Prefill the buffer so clients can resume across worker restarts
+                    recent = self.reader.execute("XREVRANGE", self.STREAM, "+", "-", "COUNT", self.maxlen) or []
+                    last_id = self._hand_over(recent[::-1]) or "0-0"
+                reply = self.reader.execute(
+                    "XREAD", "COUNT", 100, "BLOCK", self.BLOCK_MS, "STREAMS", self.STREAM, last_id
+                )
+                if reply:
+                    last_id = self._hand_over(reply[0][1]) or last_id
+            except (OSError, ConnectionError, RedisError):
+                logger.warning("Order feed lost its Redis connection; retrying", exc_info=True)
+                self.reader.close()
+                self._stop.wait(1)
+
+
+def build_order_feed(backend: str = ORDER_FEED_BACKEND) -> BroadcastHub:
+    if backend == "memory":
+        return BroadcastHub(MemoryBackend())
+    if backend == "redis":
+        return BroadcastHub(RedisStreamBackend())
+    raise ValueError(f"Unknown ORDER_FEED_BACKEND '{backend}' (expected memory or redis)")
+
+
+order_feed = build_order_feed()
+
+Gauge("pos_order_feed_subscribers", "Open live order feed connections on this worker",
+      collect=lambda: [((), len(order_feed.subscribers))])
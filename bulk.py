@@ -0,0 +1,176 @@
+# bulk.py
+# CSV / NDJSON imports and streaming CSV exports shared by the menu, expenses and
+# assets routers. Uploads are parsed and validated against the same Pydantic
+# schemas as the single-row endpoints, then inserted in executemany chunks inside
+# one transaction. Exports read through a server-side cursor, a batch at a time.
+import csv
+import io
+import json
+import os
+from typing import Literal, Optional
+
+from fastapi import HTTPException, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+
+from database import DB_ASYNC, read_sessionmaker
+
+BULK_CHUNK_SIZE = int(os.getenv("BULK_CHUNK_SIZE", "500"))  # rows per executemany
+BULK_MAX_ROWS = int(os.getenv("BULK_MAX_ROWS", "50000"))
+BULK_MAX_ERRORS = 100  # row errors listed in a response; the count covers them all
+EXPORT_BATCH_SIZE = 1000
+
+UploadFormat = Literal["csv", "ndjson"]
+
+
+def upload_format(upload: UploadFile, requested: Optional[str]) -> str:
+    if requested:
+        return requested
+    name = (upload.filename or "").lower()
+    if name.endswith((".ndjson", ".jsonl", ".json")) or "json" in (upload.content_type or ""):
+        return "ndjson"
+    return "csv"
+
+
+def _records(file, fmt: str):
+    # (row number, dict or exception); row 1 is the first data row
+    text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    try:
+        if fmt == "csv":
+            for number, record in enumerate(csv.DictReader(text), start=1):
+                # Empty cells mean "not given", so optional fields take their defaults
+                yield number, {key: value for key, value in record.items() if key and value not in ("", None)}
+        else:
+            number = 0
+            for line in text:
+                if not line.strip():
+                    continue
+                number += 1
+                try:
+                    record = json.loads(line)
+                    yield number, record if isinstance(record, dict) else ValueError("Expected a JSON object")
+                except ValueError as exc:
+                    yield number, exc
+    finally:
+        text.detach()  # the upload closes its own file
+
+
+def parse_upload(file, fmt: str, schema):
+    """Validate every row; returns (valid row dicts, error entries, error count)."""
+    rows, errors, error_count = [], [], 0
+    try:
+        for number, record in _records(file, fmt):
+            if number > BULK_MAX_ROWS:
+                raise HTTPException(status_code=413, detail=f"At most {BULK_MAX_ROWS} rows per upload")
+            try:
+                if isinstance(record, Exception):
+                    raise record
+                rows.append(schema.model_validate(record).model_dump())
+            except ValidationError as exc:
+                error_count += 1
+                if len(errors) < BULK_MAX_ERRORS:
+                    errors.append({"row": number, "errors": [
+                        {"field": ".".join(str(part) for part in err["loc"]), "message": err["msg"]}
+                        for err in exc.errors()
+                    ]})
+            except ValueError as exc:
+                error_count += 1
+                if len(errors) < BULK_MAX_ERRORS:
+                    errors.append({"row": number, "errors": [{"field": None, "message": str(exc)}]})
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="Upload must be UTF-8 encoded")
+    except csv.Error as exc:
+        raise HTTPException(status_code=400, detail=f"Malformed CSV: {exc}")
+    return rows, errors, error_count
+
+
+def insert_rows(db, model, rows, **fixed) -> int:
+    """Insert `rows` in BULK_CHUNK_SIZE executemany batches and commit once."""
+    table = model.__table__
+    # Like the ORM: a None for a column with a default means "use the default"
+    defaulted = {column.key for column in table.columns if column.server_default is not None or column.default is not None}
+    for start in range(0, len(rows), BULK_CHUNK_SIZE):
+        # executemany needs the same keys in every row, so group the chunk by its key set
+        groups = {}
+        for row in rows[start:start + BULK_CHUNK_SIZE]:
+            values = {key: value for key, value in row.items() if value is not None or key not in defaulted}
+            values.update(fixed)
+            groups.setdefault(tuple(sorted(values)), []).append(values)
+        for batch in groups.values():
+            db.execute(insert(model), batch)
+    db.commit()
+    return len(rows)
+
+
+async def import_upload(db, upload: UploadFile, fmt: Optional[str], schema, model,
+                        on_error: str = "abort", **fixed) -> dict:
+    """`on_error`: "abort" inserts nothing if any row is invalid (422), "skip" inserts the valid rows."""
+    rows, errors, error_count = await run_in_threadpool(parse_upload, upload.file, upload_format(upload, fmt), schema)
+    if error_count and on_error == "abort":
+        raise HTTPException(status_code=422, detail={
+            "message": "No rows were imported; fix these rows or retry with on_error=skip",
+            "error_count": error_count,
+            "errors": errors,
+        })
+    inserted = await db.run_sync(insert_rows, model, rows, **fixed) if rows else 0
+    return {"inserted": inserted, "error_count": error_count, "errors": errors}
+
+
+# ------------------ Exports ------------------
+def export_query(columns):
+    return select(*columns).execution_options(stream_results=True, yield_per=EXPORT_BATCH_SIZE)
+
+
+class _CsvBatch:
+    def __init__(self, header):
+        self.buffer = io.StringIO()
+        self.writer = csv.writer(self.buffer)
+        self.writer.writerow(header)
+
+    def add(self, row):
+        self.writer.writerow(["" if value is None else getattr(value, "value", value) for value in row])
+
+    def take(self) -> str:
+        data = self.buffer.getvalue()
+        self.buffer.seek(0)
+        self.buffer.truncate()
+        return data
+
+
+def stream_csv(session_factory, query, header):
+    db = session_factory()
+    try:
+        batch = _CsvBatch(header)
+        for number, row in enumerate(db.execute(query), start=1):
+            batch.add(row)
+            if number % EXPORT_BATCH_SIZE == 0:
+                yield batch.take()
+        yield batch.take()
+    finally:
+        db.close()
+
+
+async def stream_csv_async(session_factory, query, header):
+    async with session_factory() as db:
+        batch = _CsvBatch(header)
+        number = 0
+        async for row in await db.stream(query):
+            batch.add(row)
+            number += 1
+            if number % EXPORT_BATCH_SIZE == 0:
+                yield batch.take()
+        yield batch.take()
+
+
+async def export_csv(columns, filename: str, order_by=(), where=()) -> StreamingResponse:
+    query = export_query(columns).where(*where).order_by(*order_by)
+    header = [column.key for column in columns]
+    session_factory = await read_sessionmaker()
+    stream = stream_csv_async if DB_ASYNC else stream_csv
+    return StreamingResponse(
+        stream(session_factory, query, header),
+        media_type="text/csv",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
@@ -1,17 +1,164 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy.ext.declarative import declarative_base
+import logging
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import Optional
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import DBAPIError, TimeoutError as PoolTimeoutError
+from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from fastapi.concurrency import run_in_threadpool
 import os
 from dotenv import load_dotenv
+from metrics import Counter, Gauge, Histogram
+from instrumentation import track_queries
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 DATABASE_URL= os.getenv("DATABASE_URL")
 
-engine = create_engine(DATABASE_URL)
+# ✅ DB_ASYNC=1 serves the routers from an async driver (aiomysql / aiosqlite)
+DB_ASYNC = os.getenv("DB_ASYNC", "0").lower() in ("1", "true", "yes")
+
+ASYNC_DRIVERS = {
+    "mysql": "mysql+aiomysql",
+    "mysql+pymysql": "mysql+aiomysql",
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+}
+
+
+def to_async_url(url: str) -> str:
+    scheme, sep, rest = url.partition("://")
+    return ASYNC_DRIVERS.get(scheme, scheme) + sep + rest
+
+
+# ------------------ ✅ Connection pool ------------------
+# Size the pool against the concurrency that actually reaches it: each worker process
+# has its own pool, and sync requests run on Starlette's 40-thread pool.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))  # seconds to wait for a free connection
+# Recycle before the proxy / MySQL wait_timeout drops idle connections; pre-ping catches the rest
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "1").lower() in ("1", "true", "yes")
+# Compiled SQL kept per engine (SQLAlchemy's default is 500); room for every statement
+# shape the routers, reports and rollups use, so a busy worker never recompiles them
+DB_QUERY_CACHE_SIZE = int(os.getenv("DB_QUERY_CACHE_SIZE", "1200"))
+
+pool_checkouts = Counter("pos_db_pool_checkouts_total", "Connections handed out by the pool", ["pool"])
+pool_connects = Counter("pos_db_pool_connects_total", "New DBAPI connections opened", ["pool"])
+pool_invalidations = Counter("pos_db_pool_invalidations_total", "Connections discarded as dead (pre-ping or errors)", ["pool"])
+pool_timeouts = Counter("pos_db_pool_timeouts_total", "Checkouts that gave up after DB_POOL_TIMEOUT", ["pool"])
+pool_wait_seconds = Histogram("pos_db_pool_wait_seconds", "Time spent waiting for a pooled connection", ["pool"])
+_pools = {}
+
+
+def _pool_status():
+    for name, engine_ in _pools.items():
+        pool = engine_.pool
+        if isinstance(pool, QueuePool):
+            yield (name, "size"), pool.size()
+            yield (name, "checked_out"), pool.checkedout()
+            yield (name, "checked_in"), pool.checkedin()
+            yield (name, "overflow"), max(0, pool.overflow())
+            yield (name, "max_overflow"), pool._max_overflow
+
+
+pool_connections = Gauge("pos_db_pool_connections", "Pool size and connection states", ["pool", "state"], collect=_pool_status)
+
+
+class TimedPoolMixin:
+    """Records how long each checkout waited for a connection under the class's `label`."""
+
+    # _do_get is private QueuePool API (what Pool.connect calls to take a connection,
+    # waiting up to pool_timeout). The public checkout/connect events only fire once a
+    # connection is in hand, so they can't see the wait or the timeout. This relies on
+    # the SQLAlchemy version pinned in requirements.txt (2.0.41): re-check it when upgrading.
+    label = "primary"
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            pool_timeouts.inc(pool=self.label)
+            raise
+        finally:
+            pool_wait_seconds.observe(time.perf_counter() - started, pool=self.label)
+
+
+def timed_pool(base, label: str):
+    # A class per label, since dispose() rebuilds the pool from self.__class__
+    return type(f"Timed{base.__name__}", (TimedPoolMixin, base), {"label": label})
+
+
+def engine_options(url: str, pool_base=QueuePool, label: str = "primary") -> dict:
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:"):
+        return {"query_cache_size": DB_QUERY_CACHE_SIZE}  # single shared connection, nothing to size
+    return {
+        "query_cache_size": DB_QUERY_CACHE_SIZE,
+        "poolclass": timed_pool(pool_base, label),
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+
+def instrument_pool(engine_, label: str):
+    sync_engine = getattr(engine_, "sync_engine", engine_)
+    _pools[label] = sync_engine
+    event.listen(sync_engine, "checkout", lambda *_: pool_checkouts.inc(pool=label))
+    event.listen(sync_engine, "connect", lambda *_: pool_connects.inc(pool=label))
+    event.listen(sync_engine, "invalidate", lambda *_: pool_invalidations.inc(pool=label))
+    track_queries(sync_engine)  # per-request statement counts, see instrumentation.py
+    return engine_
+
+
+engine = instrument_pool(create_engine(DATABASE_URL, **engine_options(DATABASE_URL)), "primary")
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or to_async_url(DATABASE_URL)
+
+async_engine = instrument_pool(
+    create_async_engine(ASYNC_DATABASE_URL, **engine_options(ASYNC_DATABASE_URL, AsyncAdaptedQueuePool, "async")),
+    "async",
+) if DB_ASYNC else None
+
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False) if DB_ASYNC else None
+
+# ------------------ ✅ Read replica ------------------
+# Reports and listings read from READ_DATABASE_URL when it is set and no more than
+# READ_MAX_STALENESS_SECONDS behind the primary; otherwise they use the primary.
+READ_DATABASE_URL = os.getenv("READ_DATABASE_URL")
+READ_MAX_STALENESS_SECONDS = float(os.getenv("READ_MAX_STALENESS_SECONDS", "30"))
+REPLICA_CHECK_INTERVAL_SECONDS = float(os.getenv("REPLICA_CHECK_INTERVAL_SECONDS", "5"))
+
+read_engine = instrument_pool(
+    create_engine(READ_DATABASE_URL, **engine_options(READ_DATABASE_URL, label="replica")), "replica"
+) if READ_DATABASE_URL else None
+
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine) if read_engine else None
+
+ASYNC_READ_DATABASE_URL = os.getenv("ASYNC_READ_DATABASE_URL") or (to_async_url(READ_DATABASE_URL) if READ_DATABASE_URL else None)
+
+async_read_engine = instrument_pool(
+    create_async_engine(ASYNC_READ_DATABASE_URL, **engine_options(ASYNC_READ_DATABASE_URL, AsyncAdaptedQueuePool, "replica_async")),
+    "replica_async",
+) if DB_ASYNC and READ_DATABASE_URL else None
+
+AsyncReadSessionLocal = async_sessionmaker(async_read_engine, autoflush=False, expire_on_commit=False) if async_read_engine else None
+
+# ✅ The one declarative base: models.py maps every table on it, so Base.metadata is the
+# whole schema (create_all, alembic autogenerate, the benchmark harness)
 Base = declarative_base()
 
 
@@ -20,4 +167,138 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+async def dispose_async_engine():
+    # aiosqlite/aiomysql connections keep worker threads alive until closed
+    for engine_ in (async_engine, async_read_engine):
+        if engine_ is not None:
+            await engine_.dispose()
+
+
+class ThreadpoolSession:
+    """Sync-mode stand-in for AsyncSession: `await db.run_sync(fn, ...)` runs fn(session, ...) in the threadpool."""
+
+    def __init__(self, session):
+        self.sync_session = session
+
+    def _call(self, fn, *args, **kwargs):
+        try:
+            return fn(self.sync_session, *args, **kwargs)
+        finally:
+            # Give the connection back before the thread is: a request must never hold
+            # a pooled connection while it queues for a thread (threadpool > pool size).
+            self.sync_session.close()
+
+    async def run_sync(self, fn, *args, **kwargs):
+        return await run_in_threadpool(self._call, fn, *args, **kwargs)
+
+    async def rollback(self):
+        pass  # every run_sync already ended its transaction
+
+    async def close(self):
+        pass
+
+
+async def get_async_db():
+    # Routers do their ORM work in one `await db.run_sync(...)` call per request:
+    # on the async driver (greenlet, no thread held) when DB_ASYNC is set,
+    # otherwise in Starlette's threadpool exactly as a sync endpoint would.
+    # Load everything a response needs inside that call: objects aren't expired
+    # on commit, so they serialize afterwards without touching the database.
+    if DB_ASYNC:
+        async with AsyncSessionLocal() as session:
+            yield session
+    else:
+        yield ThreadpoolSession(SessionLocal(expire_on_commit=False))
+
+
+def replica_lag_seconds(conn) -> Optional[float]:
+    """Seconds the replica is behind its source; None when it isn't replicating or the status can't be read."""
+    if conn.dialect.name != "mysql":
+        return 0.0  # e.g. a SQLite file standing in for the replica locally
+    for statement, column in (("SHOW REPLICA STATUS", "Seconds_Behind_Source"),  # MySQL 8.0.22+
+                              ("SHOW SLAVE STATUS", "Seconds_Behind_Master")):
+        try:
+            row = conn.exec_driver_sql(statement).mappings().first()
+        except DBAPIError:
+            continue
+        if row is None:
+            # Not replicating at all (a standalone server or a stale snapshot): its
+            # freshness is unknown, so it never counts as fresh enough
+            return None
+        return row[column]  # NULL while the SQL thread is stopped
+    return None
+
+
+class ReplicaMonitor:
+    """Decides, at most every `interval` seconds, whether the replica is fresh enough to read from."""
+
+    def __init__(self, engine_, max_staleness: float, interval: float):
+        self.engine = engine_
+        self.max_staleness = max_staleness
+        self.interval = interval
+        self.lag: Optional[float] = None
+        self.usable = False
+        self._checked_at = float("-inf")
+        self._lock = threading.Lock()
+
+    def due(self) -> bool:
+        return time.monotonic() - self._checked_at >= self.interval
+
+    def check(self) -> bool:
+        if not self._lock.acquire(blocking=False):
+            return self.usable  # another request is already checking
+        try:
+            try:
+                with self.engine.connect() as conn:
+                    self.lag = replica_lag_seconds(conn)
+            except DBAPIError:
+                logger.warning("Read replica unreachable, reading from the primary", exc_info=True)
+                self.lag = None
+            usable = self.lag is not None and self.lag <= self.max_staleness
+            if self.usable and not usable:
+                logger.warning("Read replica lag %s s over %s s, reading from the primary", self.lag, self.max_staleness)
+            self.usable = usable
+            self._checked_at = time.monotonic()
+            return usable
+        finally:
+            self._lock.release()
+
+
+replica_monitor = ReplicaMonitor(read_engine, READ_MAX_STALENESS_SECONDS, REPLICA_CHECK_INTERVAL_SECONDS) if read_engine else None
+
+
+def _replica_status():
+    if replica_monitor is not None:
+        yield ("lag_seconds",), replica_monitor.lag if replica_monitor.lag is not None else -1
+        yield ("in_use",), int(replica_monitor.usable)
+
+
+replica_status = Gauge("pos_db_replica", "Read replica lag (-1 = unknown) and whether reads use it", ["state"], collect=_replica_status)
+
+
+async def read_sessionmaker():
+    """Session factory for read-only work: the replica while it is fresh enough, else the primary."""
+    if replica_monitor is not None:
+        usable = await run_in_threadpool(replica_monitor.check) if replica_monitor.due() else replica_monitor.usable
+        if usable:
+            return AsyncReadSessionLocal if DB_ASYNC else ReadSessionLocal
+    return AsyncSessionLocal if DB_ASYNC else SessionLocal
+
+
+@asynccontextmanager
+async def read_session():
+    factory = await read_sessionmaker()
+    if DB_ASYNC:
+        async with factory() as session:
+            yield session
+    else:
+        yield ThreadpoolSession(factory(expire_on_commit=False))
+
+
+async def get_read_db():
+    # Same interface as get_async_db; only use it for endpoints that never write
+    async with read_session() as db:
+        yield db
@@ -0,0 +1,129 @@
+# instrumentation.py
+# Per-request latency and SQL accounting, exported through metrics.py (GET /metrics).
+# RequestMetricsMiddleware opens a RequestStats for each HTTP request in a context
+# variable; the cursor events database.py attaches to every engine add each
+# statement to it. The context follows the request into Starlette's threadpool
+# and into async-driver greenlets, so both DB_ASYNC modes are counted.
+import logging
+import os
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+
+from metrics import Counter, Histogram
+
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", "10"))  # same SELECT this many times in one request
+SERVER_TIMING = os.getenv("SERVER_TIMING", "1") == "1"  # Server-Timing header for browser dev tools
+
+logger = logging.getLogger(__name__)
+
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250, 1000)
+
+http_requests = Counter("pos_http_requests_total", "HTTP requests", ("method", "route", "status"))
+http_duration = Histogram("pos_http_request_duration_seconds", "Time to handle a request, including streaming the body",
+                          ("method", "route"))
+http_db_statements = Histogram("pos_http_request_db_statements", "SQL statements executed per request",
+                               ("method", "route"), buckets=STATEMENT_BUCKETS)
+http_db_seconds = Histogram("pos_http_request_db_seconds", "Time spent in SQL per request", ("method", "route"))
+http_n_plus_one = Counter("pos_http_n_plus_one_total",
+                          "Requests that repeated one SELECT at least N_PLUS_ONE_THRESHOLD times", ("method", "route"))
+
+
+class RequestStats:
+    __slots__ = ("statements", "db_seconds", "repeats")
+
+    def __init__(self):
+        self.statements = 0
+        self.db_seconds = 0.0
+        self.repeats = {}  # SELECT text -> times run; parameters are bound separately, so loops repeat the text
+
+    def record(self, statement: str, seconds: float):
+        self.statements += 1
+        self.db_seconds += seconds
+        if statement.lstrip()[:6].upper() == "SELECT":
+            self.repeats[statement] = self.repeats.get(statement, 0) + 1
+
+    def worst_repeat(self):
+        if not self.repeats:
+            return None, 0
+        statement = max(self.repeats, key=self.repeats.get)
+        return statement, self.repeats[statement]
+
+
+_current: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def current_stats() -> Optional[RequestStats]:
+    return _current.get()
+
+
+# ------------------ SQLAlchemy cursor events (attached in database.py) ------------------
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        # One value, not a stack: a statement that raises never reaches after_cursor_execute,
+        # and the next execution on this connection simply overwrites its start time
+        conn.info["query_started"] = time.perf_counter()
+
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    if stats is not None:
+        started = conn.info.pop("query_started", None)
+        elapsed = time.perf_counter() - started if started is not None else 0.0
+        stats.record(statement, elapsed)
+
+
+def track_queries(engine_):
+    sync_engine = getattr(engine_, "sync_engine", engine_)
+    event.listen(sync_engine, "before_cursor_execute", before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", after_cursor_execute)
+    return engine_
+
+
+# ------------------ ASGI middleware ------------------
+class RequestMetricsMiddleware:
+    def __init__(self, app, skip_paths=("/metrics",)):
+        self.app = app
+        self.skip_paths = set(skip_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.skip_paths:
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _current.set(stats)
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if SERVER_TIMING:
+                    timing = (f'db;dur={stats.db_seconds * 1000:.1f};desc="{stats.statements} queries", '
+                              f"app;dur={(time.perf_counter() - started) * 1000:.1f}")
+                    message["headers"] = list(message.get("headers", [])) + [(b"server-timing", timing.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            self.observe(scope, status, stats, time.perf_counter() - started)
+
+    def observe(self, scope, status: int, stats: RequestStats, elapsed: float):
+        # Route templates ("/orders/{order_id}") keep label cardinality bounded
+        route = getattr(scope.get("route"), "path", None) or "unmatched"
+        method = scope["method"]
+        http_requests.inc(method=method, route=route, status=status)
+        http_duration.observe(elapsed, method=method, route=route)
+        http_db_statements.observe(stats.statements, method=method, route=route)
+        http_db_seconds.observe(stats.db_seconds, method=method, route=route)
+
+        statement, repeats = stats.worst_repeat()
+        if repeats >= N_PLUS_ONE_THRESHOLD:
+            http_n_plus_one.inc(method=method, route=route)
+            logger.warning("Possible N+1 on %s %s: ran %d times: %s", method, route, repeats, " ".join(statement.split())[:300])
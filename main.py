@@ -1,19 +1,44 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from database import engine, Base
+from sqlalchemy.orm import configure_mappers
+from database import dispose_async_engine
+from broadcast import order_feed
+from print_queue import print_queue
+from instrumentation import RequestMetricsMiddleware
 from models import*
+# Routers are imported eagerly on purpose: every route has to be registered before the
+# worker accepts a request, and their ~80 ms is FastAPI analysing the endpoints, so a
+# deferred import would only move it into startup. Heavy libraries used by a single
+# endpoint load on first use instead (numpy in reports, jinja2 in receipts).
 from routers import assets, users, menu, orders, expenses, reports,printer
+from routers import metrics as metrics_router
 from routers import auth as auth_router
-from startup import initialize_admin
+from startup import verify_schema
 
-# Create DB tables
-Base.metadata.create_all(bind=engine)
 
-# Initialize default admin
-initialize_admin()
+# ✅ Tables and the admin account come from `python manage.py setup` (once per deploy);
+# a worker only checks the schema version, so booting one stays cheap
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # ✅ Resolve relationships now rather than inside the first request that touches a model
+    configure_mappers()
+    await run_in_threadpool(verify_schema)
+    # ✅ Live order feed (ORDER_FEED_BACKEND=redis tails the shared stream from here)
+    await order_feed.start()
+    try:
+        yield
+    finally:
+        await order_feed.stop()
+        # ✅ Let the print workers finish queued receipts
+        print_queue.stop()
+        # ✅ Close pooled async-driver connections (DB_ASYNC=1)
+        await dispose_async_engine()
+
 
 # Initialize FastAPI app
-app = FastAPI(title="Dede's Kitchen Backend")
+app = FastAPI(title="Dede's Kitchen Backend", lifespan=lifespan)
 
 # ✅ Enable CORS
 
@@ -29,8 +54,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],  # ✅ keyset cursor for GET /orders/
 )
 
+# ✅ Per-route latency, SQL statement counts and N+1 warnings (GET /metrics)
+app.add_middleware(RequestMetricsMiddleware)
+
 # Routers
 app.include_router(auth_router.router, prefix="/auth", tags=["Auth"])
 app.include_router(users.router, prefix="/users", tags=["Users"])
@@ -41,3 +70,4 @@ app.include_router(assets.router, prefix="/inventory", tags=["Inventory"])
 app.include_router(reports.router, prefix="/reports", tags=["Reports"])
 app.include_router(assets.router, prefix="/assets", tags=["Assets"])
 app.include_router(printer.router, prefix="/printer", tags=["Printer"])
+app.include_router(metrics_router.router, prefix="/metrics", tags=["Metrics"])
@@ -0,0 +1,38 @@
+# manage.py
+# One-shot deploy commands; run them once before starting (or scaling) the workers.
+#
+#   python manage.py setup     # migrate + seed
+#   python manage.py migrate   # create or upgrade the schema (alembic)
+#   python manage.py seed      # default admin account
+#   python manage.py check     # exit 1 if the schema is behind the code
+import argparse
+import sys
+
+import startup
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Database setup for the POS backend")
+    parser.add_argument("command", choices=["setup", "migrate", "seed", "check"])
+    args = parser.parse_args(argv)
+
+    if args.command in ("setup", "migrate"):
+        backfilled = startup.migrate()
+        print(f"Schema at {startup.head_revision()}")
+        if backfilled:
+            print("Sales rollups backfilled for {} .. {}".format(*backfilled))
+    if args.command in ("setup", "seed"):
+        startup.initialize_admin()
+        print("Admin account ready")
+    if args.command == "check":
+        try:
+            startup.verify_schema("strict")
+        except startup.SchemaOutOfDate as exc:
+            print(exc, file=sys.stderr)
+            return 1
+        print(f"Schema at {startup.head_revision()}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
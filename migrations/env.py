@@ -0,0 +1,36 @@
+# migrations/env.py
+from logging.config import fileConfig
+from alembic import context
+from database import Base, engine
+import models  # noqa: F401  (maps every table on Base)
+
+config = context.config
+if config.config_file_name is not None:
+    # manage.py migrates in-process: leave the app's own loggers enabled
+    fileConfig(config.config_file_name, disable_existing_loggers=False)
+
+target_metadata = Base.metadata
+
+
+def run_migrations_offline():
+    context.configure(
+        url=engine.url.render_as_string(hide_password=False),
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    with engine.connect() as connection:
+        context.configure(connection=connection, target_metadata=target_metadata)
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
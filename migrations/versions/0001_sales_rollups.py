@@ -0,0 +1,61 @@
+"""sales rollup tables
+
+Revision ID: 0001_sales_rollups
+Revises:
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0001_sales_rollups"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+ROLLUP_TABLES = ("sales_daily", "sales_hourly", "sales_item_daily", "sales_staff_daily")
+
+
+def upgrade():
+    # `python -m reporting.rollups rebuild` may already have created these
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if "sales_daily" not in existing:
+        op.create_table(
+            "sales_daily",
+            sa.Column("day", sa.Date(), primary_key=True),
+            sa.Column("order_count", sa.Integer(), nullable=False, server_default=sa.text("0")),
+            sa.Column("total_sales", sa.Float(), nullable=False, server_default=sa.text("0")),
+            sa.Column("max_order", sa.Float(), nullable=True),
+            sa.Column("min_order", sa.Float(), nullable=True),
+        )
+    if "sales_hourly" not in existing:
+        op.create_table(
+            "sales_hourly",
+            sa.Column("day", sa.Date(), primary_key=True),
+            sa.Column("hour", sa.Integer(), primary_key=True, autoincrement=False),
+            sa.Column("order_count", sa.Integer(), nullable=False, server_default=sa.text("0")),
+            sa.Column("total_sales", sa.Float(), nullable=False, server_default=sa.text("0")),
+        )
+    if "sales_item_daily" not in existing:
+        op.create_table(
+            "sales_item_daily",
+            sa.Column("day", sa.Date(), primary_key=True),
+            sa.Column("menu_item_id", sa.Integer(), sa.ForeignKey("menu_items.id"), primary_key=True, autoincrement=False),
+            sa.Column("quantity", sa.Integer(), nullable=False, server_default=sa.text("0")),
+            sa.Column("total_sales", sa.Float(), nullable=False, server_default=sa.text("0")),
+        )
+    if "sales_staff_daily" not in existing:
+        op.create_table(
+            "sales_staff_daily",
+            sa.Column("day", sa.Date(), primary_key=True),
+            sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), primary_key=True, autoincrement=False),
+            sa.Column("order_count", sa.Integer(), nullable=False, server_default=sa.text("0")),
+            sa.Column("total_sales", sa.Float(), nullable=False, server_default=sa.text("0")),
+        )
+
+
+def downgrade():
+    for table in reversed(ROLLUP_TABLES):
+        op.drop_table(table)
@@ -0,0 +1,37 @@
+"""composite indexes for order / expense reporting
+
+Revision ID: 0002_reporting_indexes
+Revises: 0001_sales_rollups
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0002_reporting_indexes"
+down_revision = "0001_sales_rollups"
+branch_labels = None
+depends_on = None
+
+INDEXES = (
+    # name, table, columns
+    ("ix_orders_date_user_total", "orders", ["order_date", "user_id", "total_amount"]),
+    ("ix_order_items_order_item_qty", "order_items", ["order_id", "menu_item_id", "quantity"]),
+    ("ix_order_items_menu_item", "order_items", ["menu_item_id"]),
+    ("ix_expenses_date", "expenses", ["date"]),
+    ("ix_expenses_created_at", "expenses", ["created_at"]),
+)
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    for name, table, columns in INDEXES:
+        # Fresh databases built with create_all already carry the model indexes
+        if name not in {index["name"] for index in inspector.get_indexes(table)}:
+            op.create_index(name, table, columns)
+
+
+def downgrade():
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,24 @@
+"""(order_date, id) index for keyset-paginated order listing
+
+Revision ID: 0003_orders_keyset_index
+Revises: 0002_reporting_indexes
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0003_orders_keyset_index"
+down_revision = "0002_reporting_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if "ix_orders_date_id" not in {index["name"] for index in sa.inspect(op.get_bind()).get_indexes("orders")}:
+        op.create_index("ix_orders_date_id", "orders", ["order_date", "id"])
+
+
+def downgrade():
+    op.drop_index("ix_orders_date_id", table_name="orders")
@@ -0,0 +1,33 @@
+"""shared login session table
+
+Revision ID: 0004_auth_sessions
+Revises: 0003_orders_keyset_index
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0004_auth_sessions"
+down_revision = "0003_orders_keyset_index"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if "auth_sessions" in sa.inspect(op.get_bind()).get_table_names():
+        return
+    op.create_table(
+        "auth_sessions",
+        sa.Column("token_hash", sa.String(64), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.text("CURRENT_TIMESTAMP")),
+        sa.Column("expires_at", sa.DateTime(), nullable=False),
+    )
+    op.create_index("ix_auth_sessions_user_id", "auth_sessions", ["user_id"])
+    op.create_index("ix_auth_sessions_expires_at", "auth_sessions", ["expires_at"])
+
+
+def downgrade():
+    op.drop_table("auth_sessions")
@@ -0,0 +1,28 @@
+"""client_order_id idempotency key for batched till sync
+
+Revision ID: 0005_orders_client_order_id
+Revises: 0004_auth_sessions
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0005_orders_client_order_id"
+down_revision = "0004_auth_sessions"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    if "client_order_id" not in {column["name"] for column in inspector.get_columns("orders")}:
+        op.add_column("orders", sa.Column("client_order_id", sa.String(64), nullable=True))
+    if "ux_orders_client_order_id" not in {index["name"] for index in inspector.get_indexes("orders")}:
+        op.create_index("ux_orders_client_order_id", "orders", ["client_order_id"], unique=True)
+
+
+def downgrade():
+    op.drop_index("ux_orders_client_order_id", table_name="orders")
+    op.drop_column("orders", "client_order_id")
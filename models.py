@@ -1,9 +1,8 @@
-from sqlalchemy import Column, text, Date, Integer, String, Float, DateTime, ForeignKey, Boolean, func, Enum as SqlEnum
-from sqlalchemy.orm import relationship, declarative_base
+from sqlalchemy import Column, Index, text, Date, Integer, String, Float, DateTime, ForeignKey, Boolean, func, Enum as SqlEnum
+from sqlalchemy.orm import relationship
 from datetime import date
 from enum import Enum 
-
-Base = declarative_base()
+from database import Base
 
 class User(Base):
     __tablename__ = "users"
@@ -34,7 +33,17 @@ class Order(Base):
     status = Column(String(20), server_default=text("'pending'"))
     is_active = Column(Boolean, server_default=text("1"))
     created_at = Column(DateTime, server_default=text("CURRENT_TIMESTAMP"))
-    items = relationship("OrderItem", back_populates="order")
+    client_order_id = Column(String(64), nullable=True)  # idempotency key from offline tills (POST /orders/batch)
+    items = relationship("OrderItem", back_populates="order", order_by="OrderItem.id")  # as submitted
+
+    __table_args__ = (
+        # ✅ Covers date-range report scans (no table lookups for user/total)
+        Index("ix_orders_date_user_total", "order_date", "user_id", "total_amount"),
+        # ✅ Keyset pagination of GET /orders/ on (order_date, id)
+        Index("ix_orders_date_id", "order_date", "id"),
+        # ✅ A replayed order is recognised instead of inserted twice
+        Index("ux_orders_client_order_id", "client_order_id", unique=True),
+    )
 
 class OrderItem(Base):
     __tablename__ = "order_items"
@@ -46,14 +55,20 @@ class OrderItem(Base):
     subtotal = Column(Float)
     order = relationship("Order", back_populates="items")
 
+    __table_args__ = (
+        # ✅ Covers order -> items joins for per-item quantities
+        Index("ix_order_items_order_item_qty", "order_id", "menu_item_id", "quantity"),
+        Index("ix_order_items_menu_item", "menu_item_id"),
+    )
+
 class Expense(Base):
     __tablename__ = "expenses"
     id = Column(Integer, primary_key=True, index=True)
     category = Column(String(100), nullable=False)
     amount = Column(Float, nullable=False)
     description = Column(String(255), nullable=True)
-    date = Column(DateTime, server_default=text("CURRENT_TIMESTAMP"))
-    created_at = Column(DateTime, server_default=text("CURRENT_TIMESTAMP"))
+    date = Column(DateTime, server_default=text("CURRENT_TIMESTAMP"), index=True)
+    created_at = Column(DateTime, server_default=text("CURRENT_TIMESTAMP"), index=True)
 
 # ***************************
 
@@ -74,3 +89,43 @@ class Asset(Base):
     status = Column(String(50), server_default=text("'working'"))
     added_at = Column(DateTime(timezone=True), server_default=text("CURRENT_TIMESTAMP"))
     updated_at = Column(DateTime(timezone=True), server_default=text("CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP"))
+
+# ************* Sales rollups (maintained on write, see reporting/rollups.py) *************
+
+class DailySales(Base):
+    __tablename__ = "sales_daily"
+    day = Column(Date, primary_key=True)
+    order_count = Column(Integer, nullable=False, server_default=text("0"))
+    total_sales = Column(Float, nullable=False, server_default=text("0"))
+    max_order = Column(Float, nullable=True)
+    min_order = Column(Float, nullable=True)
+
+class HourlySales(Base):
+    __tablename__ = "sales_hourly"
+    day = Column(Date, primary_key=True)
+    hour = Column(Integer, primary_key=True, autoincrement=False)
+    order_count = Column(Integer, nullable=False, server_default=text("0"))
+    total_sales = Column(Float, nullable=False, server_default=text("0"))
+
+class ItemDailySales(Base):
+    __tablename__ = "sales_item_daily"
+    day = Column(Date, primary_key=True)
+    menu_item_id = Column(Integer, ForeignKey("menu_items.id"), primary_key=True, autoincrement=False)
+    quantity = Column(Integer, nullable=False, server_default=text("0"))
+    total_sales = Column(Float, nullable=False, server_default=text("0"))
+
+class StaffDailySales(Base):
+    __tablename__ = "sales_staff_daily"
+    day = Column(Date, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True, autoincrement=False)
+    order_count = Column(Integer, nullable=False, server_default=text("0"))
+    total_sales = Column(Float, nullable=False, server_default=text("0"))
+
+# ************* Login sessions (SESSION_BACKEND=sql, see auth/sessions.py) *************
+
+class AuthSession(Base):
+    __tablename__ = "auth_sessions"
+    token_hash = Column(String(64), primary_key=True)  # sha256 of the bearer token
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    created_at = Column(DateTime, server_default=text("CURRENT_TIMESTAMP"))
+    expires_at = Column(DateTime, nullable=False, index=True)
@@ -0,0 +1,256 @@
+# print_queue.py
+# Receipt printing off the request path. POST /printer/print queues a job and returns
+# its id; one worker thread per printer sends each job as a single write and
+# retries failures. Pick the driver with PRINTER_BACKEND:
+#   auto    - win32 spooler on Windows, CUPS on Linux when pycups is installed
+#   windows - win32print, RAW job
+#   cups    - pycups, one unique spool file per job
+#   fake    - keeps jobs in memory (tests / machines without a printer)
+import logging
+import os
+import queue
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Optional
+
+from cache import TTLCache
+from metrics import Counter, Gauge
+
+PRINTER_BACKEND = os.getenv("PRINTER_BACKEND", "auto")
+PRINT_MAX_ATTEMPTS = int(os.getenv("PRINT_MAX_ATTEMPTS", "3"))
+PRINT_RETRY_DELAY_SECONDS = float(os.getenv("PRINT_RETRY_DELAY_SECONDS", "2"))  # doubles per attempt
+PRINT_JOB_TTL_SECONDS = int(os.getenv("PRINT_JOB_TTL_SECONDS", "3600"))  # how long finished jobs stay queryable
+PRINT_MAX_JOBS = int(os.getenv("PRINT_MAX_JOBS", "10000"))
+
+logger = logging.getLogger(__name__)
+
+print_jobs = Counter("pos_print_jobs_total", "Finished print jobs", ("printer", "result"))
+print_attempts = Counter("pos_print_attempts_failed_total", "Print attempts that raised", ("printer",))
+
+
+class PrinterError(Exception):
+    pass
+
+
+class PrinterUnavailable(PrinterError):
+    pass
+
+
+# ------------------ Drivers ------------------
+class WindowsBackend:
+    def __init__(self):
+        import win32print
+        self.win32print = win32print
+
+    def default_printer(self) -> Optional[str]:
+        return self.win32print.GetDefaultPrinter()
+
+    def has_printer(self, name: str) -> bool:
+        return True  # OpenPrinter reports unknown names when the job runs
+
+    def send(self, printer_name: str, payload):
+        # Whole receipt in one WritePrinter call instead of a write (and sleep) per line
+        if isinstance(payload, str):
+            lines = payload.replace("\r", "").split("\n")
+            payload = ("".join(line.strip() + "\r\n" for line in lines) + "\n\n\n").encode("utf-8")
+        handle = self.win32print.OpenPrinter(printer_name)
+        try:
+            self.win32print.StartDocPrinter(handle, 1, ("Receipt", None, "RAW"))
+            try:
+                self.win32print.StartPagePrinter(handle)
+                self.win32print.WritePrinter(handle, payload)
+                self.win32print.EndPagePrinter(handle)
+            finally:
+                self.win32print.EndDocPrinter(handle)
+        finally:
+            self.win32print.ClosePrinter(handle)
+
+
+class CupsBackend:
+    def __init__(self):
+        import cups
+        self.cups = cups
+        self._local = threading.local()
+
+    def _connection(self):
+        # cups.Connection isn't thread-safe; each worker keeps its own
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self.cups.Connection()
+        return conn
+
+    def default_printer(self):
+        return self._connection().getDefault()
+
+    def has_printer(self, name):
+        return name in self._connection().getPrinters()
+
+    def send(self, printer_name, payload):
+        raw = isinstance(payload, bytes)  # ready-made printer commands (ESC/POS) skip the CUPS filters
+        fd, path = tempfile.mkstemp(prefix="receipt-", suffix=".bin" if raw else ".txt")
+        try:
+            with os.fdopen(fd, "wb" if raw else "w") as fh:
+                fh.write(payload)
+            self._connection().printFile(printer_name, path, "Receipt", {"raw": "true"} if raw else {})
+        except Exception:
+            self._local.conn = None
+            raise
+        finally:
+            os.remove(path)  # CUPS copies the file into its spool on submit
+
+
+class FakeBackend:
+    """Records what would have been printed; `fail_next` makes that many sends raise."""
+
+    def __init__(self, printers=("Receipt",)):
+        self.printers = list(printers)
+        self.printed = []  # (printer_name, text or bytes)
+        self.fail_next = 0
+        self._lock = threading.Lock()
+
+    def default_printer(self):
+        return self.printers[0] if self.printers else None
+
+    def has_printer(self, name):
+        return name in self.printers
+
+    def send(self, printer_name, payload):
+        with self._lock:
+            if self.fail_next:
+                self.fail_next -= 1
+                raise PrinterError("Simulated printer failure")
+            self.printed.append((printer_name, payload))
+
+
+def build_backend(name: str = PRINTER_BACKEND):
+    if name == "fake":
+        return FakeBackend()
+    if name == "windows" or (name == "auto" and sys.platform == "win32"):
+        return WindowsBackend()
+    if name == "cups" or (name == "auto" and sys.platform.startswith("linux")):
+        try:
+            return CupsBackend()
+        except ImportError:
+            if name == "cups":
+                raise
+            return None
+    if name == "auto":
+        return None
+    raise ValueError(f"Unknown PRINTER_BACKEND '{name}' (expected auto, windows, cups or fake)")
+
+
+# ------------------ Queue ------------------
+class PrintJob:
+    def __init__(self, printer: str, payload):
+        self.id = uuid.uuid4().hex
+        self.printer = printer
+        self.payload = payload  # str: plain text, bytes: raw printer commands
+        self.status = "queued"  # queued -> printing -> done | failed
+        self.attempts = 0
+        self.error = None
+        self.created_at = datetime.utcnow()
+        self.finished_at = None
+
+    def as_dict(self) -> dict:
+        return {
+            "job_id": self.id,
+            "printer": self.printer,
+            "status": self.status,
+            "attempts": self.attempts,
+            "error": self.error,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class PrintQueue:
+    def __init__(self, backend, max_attempts: int = PRINT_MAX_ATTEMPTS, retry_delay: float = PRINT_RETRY_DELAY_SECONDS):
+        self.backend = backend
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.jobs = TTLCache(maxsize=PRINT_MAX_JOBS, ttl=PRINT_JOB_TTL_SECONDS)
+        self._queues = {}  # printer name -> queue.Queue of PrintJob
+        self._workers = []
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+
+    def submit(self, payload, printer_name: Optional[str] = None) -> PrintJob:
+        """Validate the printer and queue the job; blocking driver lookups, so call from a thread."""
+        if self.backend is None:
+            raise PrinterUnavailable("Printing is not supported on this server OS")
+        printer_name = printer_name or self.backend.default_printer()
+        if not printer_name or not self.backend.has_printer(printer_name):
+            raise PrinterError("Printer not found")
+
+        job = PrintJob(printer_name, payload)
+        self.jobs.set(job.id, job)
+        self._queue_for(printer_name).put(job)
+        return job
+
+    def get(self, job_id: str) -> Optional[PrintJob]:
+        return self.jobs.get(job_id)
+
+    def pending(self):
+        with self._lock:
+            return {name: jobs.qsize() for name, jobs in self._queues.items()}
+
+    def _queue_for(self, printer_name: str) -> queue.Queue:
+        with self._lock:
+            jobs = self._queues.get(printer_name)
+            if jobs is None:
+                # One worker per printer: jobs on a printer stay in order, printers don't wait on each other
+                jobs = self._queues[printer_name] = queue.Queue()
+                worker = threading.Thread(target=self._work, args=(jobs,), name=f"printer-{printer_name}", daemon=True)
+                self._workers.append(worker)
+                worker.start()
+            return jobs
+
+    def _work(self, jobs: queue.Queue):
+        while True:
+            job = jobs.get()
+            if job is None:
+                return
+            self._print(job)
+
+    def _print(self, job: PrintJob):
+        job.status = "printing"
+        while True:
+            job.attempts += 1
+            try:
+                self.backend.send(job.printer, job.payload)
+            except Exception as exc:
+                print_attempts.inc(printer=job.printer)
+                job.error = str(exc)
+                logger.warning("Print job %s on %s failed (attempt %d)", job.id, job.printer, job.attempts, exc_info=True)
+                if job.attempts >= self.max_attempts or self._stopping.wait(self.retry_delay * 2 ** (job.attempts - 1)):
+                    job.status = "failed"
+                    break
+            else:
+                job.status = "done"
+                job.error = None
+                break
+        job.finished_at = datetime.utcnow()
+        print_jobs.inc(printer=job.printer, result=job.status)
+
+    def stop(self, timeout: float = 5.0):
+        # Finish what's queued (without waiting out retry delays), then let the workers exit
+        self._stopping.set()
+        with self._lock:
+            for jobs in self._queues.values():
+                jobs.put(None)
+            workers, self._workers = self._workers, []
+            self._queues = {}
+        deadline = time.monotonic() + timeout
+        for worker in workers:
+            worker.join(max(0.0, deadline - time.monotonic()))
+        self._stopping.clear()
+
+
+print_queue = PrintQueue(build_backend())
+
+Gauge("pos_print_queue_jobs", "Print jobs waiting per printer", ("printer",),
+      collect=lambda: [((name,), size) for name, size in print_queue.pending().items()])
@@ -0,0 +1,138 @@
+# receipts.py
+# Server-side receipts: one joined query per order, rendered into ESC/POS bytes by a
+# Jinja2 template that is compiled once, on first use. Rendered receipts are cached
+# per order, so reprints skip both the query and the render.
+#
+# The cache is per process. A status change clears it only in the worker that made
+# the change, so the other workers can print the old receipt (e.g. without the
+# CANCELLED banner) until RECEIPT_CACHE_TTL_SECONDS runs out. Order statuses can
+# change at any time, so the TTL is kept to about as long as a reprint takes.
+import os
+from functools import lru_cache
+from typing import NamedTuple, Optional
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from cache import TTLCache
+from metrics import Counter
+from models import MenuItem, Order, OrderItem, User
+
+RECEIPT_WIDTH = int(os.getenv("RECEIPT_WIDTH", "32"))  # characters per line: 32 on 58 mm paper, 48 on 80 mm
+RECEIPT_ENCODING = os.getenv("RECEIPT_ENCODING", "cp437")  # the printer's code page
+RECEIPT_HEADER = os.getenv("RECEIPT_HEADER", "Dede's Kitchen")
+RECEIPT_FOOTER = os.getenv("RECEIPT_FOOTER", "Thank you!")
+RECEIPT_CACHE_TTL_SECONDS = int(os.getenv("RECEIPT_CACHE_TTL_SECONDS", "60"))  # how stale other workers may be
+RECEIPT_CACHE_MAX_ENTRIES = int(os.getenv("RECEIPT_CACHE_MAX_ENTRIES", "2000"))
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates")
+
+# ESC/POS commands, available to templates as {{ esc.<name> }}
+ESC_POS = {
+    "init": "\x1b@",
+    "left": "\x1ba\x00",
+    "center": "\x1ba\x01",
+    "bold_on": "\x1bE\x01",
+    "bold_off": "\x1bE\x00",
+    "double": "\x1d!\x11",  # double width and height
+    "single": "\x1d!\x00",
+    "cut": "\x1dVB\x03",  # feed 3 lines, then partial cut
+}
+
+receipt_requests = Counter("pos_receipt_cache_requests_total", "Receipt lookups by cache result", ("result",))
+
+
+def money(value) -> str:
+    return f"{value or 0:,.2f}"
+
+
+def columns(left, right, width: int = RECEIPT_WIDTH) -> str:
+    # `left` padded (or cut) so `right` ends on the last column
+    right = str(right)
+    room = max(width - len(right) - 1, 1)
+    return str(left)[:room].ljust(room) + " " + right
+
+
+@lru_cache(maxsize=None)
+def receipt_template():
+    # Jinja2 loads with the first receipt rather than with every worker
+    from jinja2 import Environment, FileSystemLoader, StrictUndefined
+
+    env = Environment(
+        loader=FileSystemLoader(TEMPLATE_DIR),
+        undefined=StrictUndefined,
+        trim_blocks=True,
+        lstrip_blocks=True,
+        keep_trailing_newline=True,
+        autoescape=False,
+    )
+    env.filters["money"] = money
+    env.filters["columns"] = columns
+    return env.get_template("receipt.escpos.j2")
+
+
+class Receipt(NamedTuple):
+    data: dict  # schemas.OrderReceipt fields
+    escpos: bytes
+
+
+_receipts = TTLCache(maxsize=RECEIPT_CACHE_MAX_ENTRIES, ttl=RECEIPT_CACHE_TTL_SECONDS)
+
+
+def load_receipt(db: Session, order_id: int) -> Optional[dict]:
+    rows = db.execute(
+        select(
+            Order.id, Order.total_amount, Order.status, Order.order_date, User.username,
+            OrderItem.id.label("item_id"), OrderItem.menu_item_id, MenuItem.name,
+            OrderItem.quantity, OrderItem.unit_price, OrderItem.subtotal,
+        )
+        .select_from(Order)
+        .outerjoin(User, User.id == Order.user_id)
+        .outerjoin(OrderItem, OrderItem.order_id == Order.id)
+        .outerjoin(MenuItem, MenuItem.id == OrderItem.menu_item_id)
+        .where(Order.id == order_id)
+        .order_by(OrderItem.id)
+    ).all()
+    if not rows:
+        return None
+    order = rows[0]
+    return {
+        "order_id": order.id,
+        "status": order.status,
+        "total_amount": order.total_amount or 0.0,
+        "served_by": order.username or "-",
+        "served_at": order.order_date.strftime("%Y-%m-%d %H:%M") if order.order_date else "",
+        "items": [
+            {
+                "name": row.name or f"Item #{row.menu_item_id}",
+                "quantity": row.quantity or 0,
+                "unit_price": row.unit_price or 0.0,
+                "subtotal": row.subtotal or 0.0,
+            }
+            for row in rows if row.item_id is not None
+        ],
+    }
+
+
+def render_receipt(receipt: dict) -> bytes:
+    text = receipt_template().render(
+        receipt=receipt, esc=ESC_POS, width=RECEIPT_WIDTH, header=RECEIPT_HEADER, footer=RECEIPT_FOOTER,
+    )
+    return text.encode(RECEIPT_ENCODING, errors="replace")
+
+
+def cached_receipt(order_id: int) -> Optional[Receipt]:
+    receipt = _receipts.get(order_id)
+    receipt_requests.inc(result="hit" if receipt is not None else "miss")
+    return receipt
+
+
+def build_receipt(db: Session, order_id: int) -> Optional[Receipt]:
+    data = load_receipt(db, order_id)
+    if data is None:
+        return None
+    receipt = Receipt(data, render_receipt(data))
+    _receipts.set(order_id, receipt)
+    return receipt
+
+
+def invalidate_receipt(order_id: int):
+    _receipts.pop(order_id)
@@ -0,0 +1,132 @@
+# reporting/aggregates.py
+# Computes each sales grouping once (per day, per hour, per item, per staff member)
+# and derives every min/max answer for /reports/insights from those result sets.
+# Groupings are read from the rollup tables kept by reporting/rollups.py, so their
+# cost depends on the number of days in range rather than the number of orders.
+from datetime import date, datetime, timedelta
+from sqlalchemy import Date, extract, func
+from sqlalchemy.orm import Session
+from models import Order, MenuItem, User, DailySales, HourlySales, ItemDailySales, StaffDailySales
+
+
+def order_day(column=Order.order_date):
+    return func.date(column, type_=Date)
+
+
+def order_hour(column=Order.order_date):
+    return extract("hour", column)
+
+
+def _as_day(value) -> date:
+    return value.date() if isinstance(value, datetime) else value
+
+
+def day_range(model, start: datetime, end: datetime):
+    # Half-open [first day, day after `end`) on the rollup's leading `day` key column
+    return model.day >= _as_day(start), model.day < _as_day(end) + timedelta(days=1)
+
+
+def sales_by_day(db: Session, start: datetime, end: datetime):
+    # (day, order_count, total_sales, largest_order, smallest_order)
+    return db.query(
+        DailySales.day,
+        DailySales.order_count,
+        DailySales.total_sales,
+        DailySales.max_order,
+        DailySales.min_order,
+    ).filter(*day_range(DailySales, start, end)).order_by(DailySales.day).all()
+
+
+def orders_by_hour(db: Session, start: datetime, end: datetime):
+    # (hour, order_count)
+    return db.query(HourlySales.hour, func.sum(HourlySales.order_count))\
+        .filter(*day_range(HourlySales, start, end))\
+        .group_by(HourlySales.hour)\
+        .all()
+
+
+def quantity_by_item(db: Session, start: datetime, end: datetime):
+    # (item_name, quantity_sold)
+    return db.query(MenuItem.name, func.sum(ItemDailySales.quantity))\
+        .join(MenuItem, MenuItem.id == ItemDailySales.menu_item_id)\
+        .filter(*day_range(ItemDailySales, start, end))\
+        .group_by(MenuItem.name)\
+        .all()
+
+
+def sales_by_staff(db: Session, start: datetime, end: datetime):
+    # (username, total_sales)
+    return db.query(User.username, func.sum(StaffDailySales.total_sales))\
+        .join(User, User.id == StaffDailySales.user_id)\
+        .filter(*day_range(StaffDailySales, start, end))\
+        .group_by(User.username)\
+        .all()
+
+
+def _pick(rows, key, lowest=False):
+    rows = [row for row in rows if key(row) is not None]
+    if not rows:
+        return None
+    return min(rows, key=key) if lowest else max(rows, key=key)
+
+
+def build_insights(by_day, by_hour, by_item, by_staff) -> dict:
+    busiest_day = _pick(by_day, lambda row: row[1])
+    highest_day = _pick(by_day, lambda row: row[2])
+    lowest_day = _pick(by_day, lambda row: row[2], lowest=True)
+    highest_order = max((row[3] for row in by_day if row[3] is not None), default=None)
+    lowest_order = min((row[4] for row in by_day if row[4] is not None), default=None)
+    busiest_hour = _pick(by_hour, lambda row: row[1])
+    top_item = _pick(by_item, lambda row: row[1])
+    poor_item = _pick(by_item, lambda row: row[1], lowest=True)
+    best_staff = _pick(by_staff, lambda row: row[1])
+    poor_staff = _pick([row for row in by_staff if row[0] != "admin"], lambda row: row[1], lowest=True)
+
+    return {
+        "busiest_day": busiest_day[0].isoformat() if busiest_day else None,
+        "busiest_hour": f"{int(busiest_hour[0])}:00" if busiest_hour else None,
+        "top_selling_item": {
+            "name": top_item[0],
+            "quantity": int(top_item[1])
+        } if top_item else None,
+        "poor_selling_item": {
+            "name": poor_item[0],
+            "quantity": int(poor_item[1])
+        } if poor_item else None,
+        "best_performing_staff": {
+            "username": best_staff[0],
+            "total_sales": float(best_staff[1])
+        } if best_staff else None,
+        "poor_performing_staff": {
+            "username": poor_staff[0],
+            "total_sales": float(poor_staff[1])
+        } if poor_staff else None,
+        "highest_sales_day": {
+            "date": highest_day[0].isoformat(),
+            "total": float(highest_day[2])
+        } if highest_day else None,
+        "lowest_sales_day": {
+            "date": lowest_day[0].isoformat(),
+            "total": float(lowest_day[2])
+        } if lowest_day else None,
+        "highest_order_amount": float(highest_order) if highest_order else 0,
+        "lowest_order_amount": float(lowest_order) if lowest_order else 0
+    }
+
+
+def daily_totals(db: Session, start: datetime, end: datetime):
+    # (day, total_sales) in date order, for /reports/chart-data
+    return db.query(DailySales.day, DailySales.total_sales)\
+        .filter(*day_range(DailySales, start, end))\
+        .order_by(DailySales.day)\
+        .all()
+
+
+def sales_insights(db: Session, start: datetime, end: datetime) -> dict:
+    # Four grouped scans instead of one query per answer
+    return build_insights(
+        sales_by_day(db, start, end),
+        orders_by_hour(db, start, end),
+        quantity_by_item(db, start, end),
+        sales_by_staff(db, start, end),
+    )
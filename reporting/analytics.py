@@ -0,0 +1,217 @@
+# reporting/analytics.py
+# Vectorized sales analytics over the columnar export (reporting/columnar.py).
+# Partitions are memory-mapped and sliced by binary search on their sorted `day`
+# column, so a query only pages in the days it covers and never touches MySQL.
+# Results cover the exported history: everything before the last export's cutoff.
+import json
+import os
+import threading
+from datetime import date, datetime, timedelta
+from typing import Optional
+import numpy as np
+from reporting.aggregates import build_insights
+from reporting.columnar import (
+    ANALYTICS_DIR, DIMENSIONS_FILE, ITEM_COLUMNS, ORDER_COLUMNS, day_number, from_day_number,
+)
+
+_open_lock = threading.Lock()
+_open_partitions = {}  # path -> (manifest mtime, {"orders.day": memmap, ...})
+
+
+def _as_day(value) -> Optional[date]:
+    return value.date() if isinstance(value, datetime) else value
+
+
+def _load_partition(path: str) -> dict:
+    # Re-exports swap the directory, which changes the manifest's mtime
+    mtime = os.stat(os.path.join(path, "manifest.json")).st_mtime_ns
+    with _open_lock:
+        cached = _open_partitions.get(path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+    columns = {}
+    for table, names in (("orders", ORDER_COLUMNS), ("items", ITEM_COLUMNS)):
+        for name in names:
+            columns[f"{table}.{name}"] = np.load(os.path.join(path, f"{table}.{name}.npy"), mmap_mode="r")
+    with _open_lock:
+        _open_partitions[path] = (mtime, columns)
+    return columns
+
+
+def partitions(root: str = ANALYTICS_DIR):
+    if not os.path.isdir(root):
+        return []
+    names = sorted(name for name in os.listdir(root) if len(name) == 7 and name[4] == "-")
+    return [os.path.join(root, name) for name in names if os.path.exists(os.path.join(root, name, "manifest.json"))]
+
+
+def coverage(root: str = ANALYTICS_DIR) -> dict:
+    """First day and exclusive end of the exported history."""
+    paths = partitions(root)
+    if not paths:
+        return {"start": None, "through": None}
+    with open(os.path.join(paths[-1], "manifest.json")) as fh:
+        through = json.load(fh)["through"]
+    return {"start": os.path.basename(paths[0]) + "-01", "through": through}
+
+
+def _dimensions(root: str) -> dict:
+    path = os.path.join(root, DIMENSIONS_FILE)
+    if not os.path.exists(path):
+        return {"menu_items": {}, "users": {}}
+    with open(path) as fh:
+        dims = json.load(fh)
+    return {kind: {int(key): value for key, value in names.items()} for kind, names in dims.items()}
+
+
+def load(table: str, columns, start: date, end: date, root: str = ANALYTICS_DIR) -> dict:
+    """`columns` of `table` for days in [start, end) as contiguous arrays (still sorted by day)."""
+    first, last = day_number(start), day_number(end)
+    parts = {name: [] for name in columns}
+    for path in partitions(root):
+        month = date.fromisoformat(os.path.basename(path) + "-01")
+        if day_number(month) >= last or day_number(month) + 31 <= first:
+            continue  # partition can't overlap
+        data = _load_partition(path)
+        days = data[f"{table}.day"]
+        lo, hi = np.searchsorted(days, first, "left"), np.searchsorted(days, last, "left")
+        if lo == hi:
+            continue
+        for name in columns:
+            parts[name].append(data[f"{table}.{name}"][lo:hi])
+    dtypes = ORDER_COLUMNS if table == "orders" else ITEM_COLUMNS
+    return {
+        name: np.concatenate(chunks) if chunks else np.empty(0, dtype=dtypes[name])
+        for name, chunks in parts.items()
+    }
+
+
+def _range(start, end):
+    # Inclusive `end` day, like the SQL reports
+    return _as_day(start), _as_day(end) + timedelta(days=1)
+
+
+def _segments(sorted_keys):
+    # Start offsets of each run of equal values in a sorted array
+    return np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+
+
+def _by_day(orders):
+    if not len(orders["day"]):
+        return []
+    starts = _segments(orders["day"])
+    days = orders["day"][starts]
+    counts = np.diff(np.r_[starts, len(orders["day"])])
+    totals = np.add.reduceat(orders["total"], starts)
+    largest = np.maximum.reduceat(orders["total"], starts)
+    smallest = np.minimum.reduceat(orders["total"], starts)
+    return [
+        (from_day_number(day), int(count), float(total), float(high), float(low))
+        for day, count, total, high, low in zip(days, counts, totals, largest, smallest)
+    ]
+
+
+def _group_by_name(ids, values, names):
+    # Sum `values` per id, then per display name (the SQL reports group by name)
+    if not len(ids):
+        return []
+    unique, inverse = np.unique(ids, return_inverse=True)
+    sums = np.bincount(inverse, weights=values)
+    grouped = {}
+    for key, total in zip(unique, sums):
+        name = names.get(int(key))
+        if name is not None:
+            grouped[name] = grouped.get(name, 0) + total
+    return list(grouped.items())
+
+
+def sales_insights(start, end, root: str = ANALYTICS_DIR) -> dict:
+    start, end = _range(start, end)
+    orders = load("orders", ("day", "hour", "user_id", "total"), start, end, root)
+    items = load("items", ("menu_item_id", "quantity"), start, end, root)
+    dims = _dimensions(root)
+
+    hours = np.bincount(orders["hour"].astype(np.intp), minlength=24)
+    by_hour = [(hour, int(count)) for hour, count in enumerate(hours) if count]
+    by_item = [(name, int(qty)) for name, qty in _group_by_name(items["menu_item_id"], items["quantity"], dims["menu_items"])]
+    staffed = orders["user_id"] >= 0
+    by_staff = _group_by_name(orders["user_id"][staffed], orders["total"][staffed], dims["users"])
+    return build_insights(_by_day(orders), by_hour, by_item, by_staff)
+
+
+def daily_totals(start, end, root: str = ANALYTICS_DIR):
+    start, end = _range(start, end)
+    return [(day, total) for day, _, total, _, _ in _by_day(load("orders", ("day", "total"), start, end, root))]
+
+
+def item_hour_heatmap(start, end, limit: int = 20, root: str = ANALYTICS_DIR) -> dict:
+    """Quantity sold per item per hour of day for the `limit` best-selling items."""
+    start, end = _range(start, end)
+    items = load("items", ("menu_item_id", "hour", "quantity"), start, end, root)
+    names = _dimensions(root)["menu_items"]
+    if not len(items["menu_item_id"]):
+        return {"hours": list(range(24)), "items": []}
+
+    unique, inverse = np.unique(items["menu_item_id"], return_inverse=True)
+    grid = np.bincount(
+        inverse * 24 + items["hour"].astype(np.intp), weights=items["quantity"], minlength=len(unique) * 24
+    ).reshape(len(unique), 24)
+    top = np.argsort(-grid.sum(axis=1), kind="stable")[:limit]
+    return {
+        "hours": list(range(24)),
+        "items": [
+            {
+                "menu_item_id": int(unique[row]),
+                "name": names.get(int(unique[row])),
+                "quantities": [int(value) for value in grid[row]],
+            }
+            for row in top
+        ],
+    }
+
+
+MAX_BASKET_SIZE = 50  # distinct items per order considered for pairs
+
+
+def basket_pairs(start, end, limit: int = 20, root: str = ANALYTICS_DIR) -> dict:
+    """Item pairs bought in the same order most often, with support, confidence and lift."""
+    start, end = _range(start, end)
+    items = load("items", ("order_id", "menu_item_id"), start, end, root)
+    names = _dimensions(root)["menu_items"]
+    if not len(items["order_id"]):
+        return {"orders": 0, "pairs": []}
+
+    # One row per distinct (order, item), sorted by order then item
+    catalog, item_index = np.unique(items["menu_item_id"], return_inverse=True)
+    width = len(catalog)
+    keys = np.unique(items["order_id"].astype(np.int64) * width + item_index)
+    orders, products = keys // width, keys % width
+    order_count = len(np.unique(orders))
+    item_orders = np.bincount(products, minlength=width)
+
+    # Pair each row with the rows 1, 2, ... places after it in the same order
+    chunks = []
+    for offset in range(1, min(MAX_BASKET_SIZE, len(keys))):
+        same = orders[:-offset] == orders[offset:]
+        if not same.any():
+            break
+        chunks.append(products[:-offset][same] * width + products[offset:][same])
+    if not chunks:
+        return {"orders": order_count, "pairs": []}
+    pair_keys, pair_counts = np.unique(np.concatenate(chunks), return_counts=True)
+
+    pairs = []
+    for index in np.argsort(-pair_counts, kind="stable")[:limit]:
+        together = int(pair_counts[index])
+        a, b = divmod(int(pair_keys[index]), width)
+        pairs.append({
+            "items": [
+                {"menu_item_id": int(catalog[a]), "name": names.get(int(catalog[a]))},
+                {"menu_item_id": int(catalog[b]), "name": names.get(int(catalog[b]))},
+            ],
+            "orders": together,
+            "support": together / order_count,
+            "confidence": [together / int(item_orders[a]), together / int(item_orders[b])],  # a -> b, b -> a
+            "lift": together * order_count / (int(item_orders[a]) * int(item_orders[b])),
+        })
+    return {"orders": order_count, "pairs": pairs}
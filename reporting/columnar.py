@@ -0,0 +1,181 @@
+# reporting/columnar.py
+# Columnar copy of the sales history for reporting/analytics.py: one directory per
+# month under ANALYTICS_DIR holding one .npy file per column, rows sorted by day, plus
+# a manifest. Only orders that count towards sales and are older than today's
+# (UTC) midnight are exported, so a month stops changing once it is over apart
+# from late status changes, which the next nightly run picks up.
+#
+#   python -m reporting.columnar export              # last month + this month (cron, nightly)
+#   python -m reporting.columnar export --since 2023-01 [--until 2024-12]
+import argparse
+import json
+import os
+import shutil
+from datetime import date, datetime, time
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from models import MenuItem, Order, OrderItem, User
+from reporting.rollups import counted_orders
+
+ANALYTICS_DIR = os.getenv(
+    "ANALYTICS_DIR", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "analytics_data")
+)
+EPOCH = date(1970, 1, 1)
+
+# Per-row columns; `day` is days since 1970-01-01 (UTC), `hour` 0-23, missing ids are -1
+ORDER_COLUMNS = {"order_id": np.int64, "day": np.int32, "hour": np.int8, "user_id": np.int32, "total": np.float64}
+ITEM_COLUMNS = {
+    "order_id": np.int64, "day": np.int32, "hour": np.int8,
+    "menu_item_id": np.int32, "quantity": np.int32, "subtotal": np.float64,
+}
+DIMENSIONS_FILE = "dimensions.json"  # id -> name for menu items and users
+
+
+def day_number(value: date) -> int:
+    return (value - EPOCH).days
+
+
+def from_day_number(value: int) -> date:
+    return date.fromordinal(EPOCH.toordinal() + int(value))
+
+
+def month_start(value: date) -> date:
+    return value.replace(day=1)
+
+
+def next_month(value: date) -> date:
+    return date(value.year + value.month // 12, value.month % 12 + 1, 1)
+
+
+def previous_month(value: date) -> date:
+    return date(value.year - (value.month == 1), (value.month - 2) % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{month.year:04d}-{month.month:02d}"
+
+
+def _day_and_hour(timestamps):
+    stamps = np.array(timestamps, dtype="datetime64[s]")
+    days = stamps.astype("datetime64[D]")
+    hours = (stamps - days).astype("timedelta64[h]").astype(np.int8)
+    return days.astype(np.int32), hours
+
+
+def _write_columns(directory: str, table: str, columns: dict, values: dict):
+    for name, dtype in columns.items():
+        np.save(os.path.join(directory, f"{table}.{name}.npy"), np.asarray(values[name], dtype=dtype))
+
+
+def export_month(db: Session, month: date, through: date, root: str = ANALYTICS_DIR) -> dict:
+    """Rewrite the partition for `month` with the orders before `through` (exclusive)."""
+    start = datetime.combine(month, time.min)
+    end = datetime.combine(min(next_month(month), through), time.min)
+    in_range = (
+        Order.order_date >= start,
+        Order.order_date < end,
+        *counted_orders(),
+    )
+
+    orders = db.execute(
+        select(Order.id, Order.order_date, Order.user_id, Order.total_amount)
+        .where(*in_range)
+        .order_by(Order.order_date, Order.id)
+    ).all()
+    items = db.execute(
+        select(OrderItem.order_id, Order.order_date, OrderItem.menu_item_id, OrderItem.quantity, OrderItem.subtotal)
+        .join(Order, Order.id == OrderItem.order_id)
+        .where(*in_range, OrderItem.menu_item_id.isnot(None))
+        .order_by(Order.order_date, Order.id, OrderItem.id)
+    ).all()
+
+    order_days, order_hours = _day_and_hour([row.order_date for row in orders])
+    item_days, item_hours = _day_and_hour([row.order_date for row in items])
+
+    name = partition_name(month)
+    final = os.path.join(root, name)
+    staging = final + ".tmp"
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+
+    _write_columns(staging, "orders", ORDER_COLUMNS, {
+        "order_id": [row.id for row in orders],
+        "day": order_days,
+        "hour": order_hours,
+        "user_id": [row.user_id if row.user_id is not None else -1 for row in orders],
+        "total": [row.total_amount or 0.0 for row in orders],
+    })
+    _write_columns(staging, "items", ITEM_COLUMNS, {
+        "order_id": [row.order_id for row in items],
+        "day": item_days,
+        "hour": item_hours,
+        "menu_item_id": [row.menu_item_id for row in items],
+        "quantity": [row.quantity or 0 for row in items],
+        "subtotal": [row.subtotal or 0.0 for row in items],
+    })
+    manifest = {
+        "month": name,
+        "through": end.date().isoformat(),
+        "orders": len(orders),
+        "items": len(items),
+        "exported_at": datetime.utcnow().isoformat(timespec="seconds"),
+    }
+    with open(os.path.join(staging, "manifest.json"), "w") as fh:
+        json.dump(manifest, fh)
+
+    # ✅ Swap the whole directory so readers never see half a partition
+    if os.path.exists(final):
+        retired = final + ".old"
+        shutil.rmtree(retired, ignore_errors=True)
+        os.replace(final, retired)
+        os.replace(staging, final)
+        shutil.rmtree(retired)
+    else:
+        os.replace(staging, final)
+    return manifest
+
+
+def export_dimensions(db: Session, root: str = ANALYTICS_DIR):
+    dimensions = {
+        "menu_items": {str(item_id): name for item_id, name in db.execute(select(MenuItem.id, MenuItem.name))},
+        "users": {str(user_id): username for user_id, username in db.execute(select(User.id, User.username))},
+    }
+    path = os.path.join(root, DIMENSIONS_FILE)
+    with open(path + ".tmp", "w") as fh:
+        json.dump(dimensions, fh)
+    os.replace(path + ".tmp", path)
+
+
+def export(db: Session, since: date = None, until: date = None, root: str = ANALYTICS_DIR):
+    """Export every month from `since` to `until` (inclusive, default: last month and this one)."""
+    through = datetime.utcnow().date()  # exclusive: today is still being written
+    until = month_start(until or through)
+    month = month_start(since or previous_month(until))
+
+    os.makedirs(root, exist_ok=True)
+    export_dimensions(db, root)
+    while month <= until and month < through:
+        manifest = export_month(db, month, through, root)
+        print(f"Exported {manifest['month']}: {manifest['orders']} orders, {manifest['items']} items")
+        month = next_month(month)
+
+
+if __name__ == "__main__":
+    from database import SessionLocal
+
+    def parse_month(value: str) -> date:
+        return datetime.strptime(value, "%Y-%m").date()
+
+    parser = argparse.ArgumentParser(description="Export closed orders to the columnar analytics store")
+    parser.add_argument("command", choices=["export"])
+    parser.add_argument("--since", type=parse_month, help="first month, YYYY-MM (default: last month)")
+    parser.add_argument("--until", type=parse_month, help="last month, YYYY-MM (default: this month)")
+    parser.add_argument("--root", default=ANALYTICS_DIR)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        export(db, args.since, args.until, args.root)
+    finally:
+        db.close()
@@ -0,0 +1,71 @@
+# reporting/result_cache.py
+# Finished report payloads, shared by every dashboard refresh in this process.
+#
+# Entries live REPORT_CACHE_TTL_SECONDS. Order writes call invalidate(), after which
+# an entry is only served until it is REPORT_CACHE_MIN_FRESH_SECONDS old: during
+# service the numbers refresh at that pace instead of once per order. Concurrent
+# misses for the same key share one computation (single-flight).
+#
+# Like the cache itself, invalidate() is per process: it only marks the entries of
+# the worker that handled the write. Other workers keep serving their cached reports
+# until those expire, i.e. for up to REPORT_CACHE_TTL_SECONDS.
+import asyncio
+import os
+import time
+from cache import TTLCache
+from metrics import Counter
+
+REPORT_CACHE_TTL_SECONDS = float(os.getenv("REPORT_CACHE_TTL_SECONDS", "300"))
+REPORT_CACHE_MIN_FRESH_SECONDS = float(os.getenv("REPORT_CACHE_MIN_FRESH_SECONDS", "15"))
+
+report_cache_requests = Counter(
+    "pos_report_cache_requests_total",
+    "Report cache lookups by result (hit, miss, shared = waited on an in-flight computation)",
+    ["endpoint", "result"],
+)
+
+
+class ReportCache:
+    def __init__(self, ttl: float = REPORT_CACHE_TTL_SECONDS, min_fresh: float = REPORT_CACHE_MIN_FRESH_SECONDS, maxsize: int = 128):
+        self.min_fresh = min_fresh
+        self._entries = TTLCache(maxsize=maxsize, ttl=ttl)  # key -> (computed_at, value)
+        self._inflight = {}  # key -> asyncio.Task
+        self._invalidated_at = float("-inf")
+
+    def invalidate(self):
+        self._invalidated_at = time.monotonic()
+
+    def clear(self):
+        self._entries.clear()
+        self._invalidated_at = float("-inf")
+
+    def _fresh(self, computed_at: float) -> bool:
+        return computed_at >= self._invalidated_at or time.monotonic() - computed_at < self.min_fresh
+
+    async def get_or_compute(self, key: tuple, compute):
+        """Cached value for `key` (first item names the endpoint), else `await compute()` once for all callers."""
+        entry = self._entries.get(key)
+        if entry is not None and self._fresh(entry[0]):
+            report_cache_requests.inc(endpoint=key[0], result="hit")
+            return entry[1]
+
+        task = self._inflight.get(key)
+        if task is None:
+            report_cache_requests.inc(endpoint=key[0], result="miss")
+            task = self._inflight[key] = asyncio.ensure_future(self._compute(key, compute))
+        else:
+            report_cache_requests.inc(endpoint=key[0], result="shared")
+        # Shielded: one caller disconnecting doesn't cancel the others' result
+        return await asyncio.shield(task)
+
+    async def _compute(self, key, compute):
+        started = time.monotonic()
+        try:
+            value = await compute()
+            self._entries.set(key, (started, value))
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+
+report_cache = ReportCache()
@@ -0,0 +1,211 @@
+# reporting/rollups.py
+# Pre-aggregated sales per day, per day/hour, per menu item per day and per staff
+# member per day. create_order adds each new order incrementally; status changes
+# and the rebuild command recompute whole days from the raw orders.
+#
+#   python -m reporting.rollups rebuild [--since 2024-01-01] [--until 2025-01-01]
+import argparse
+import copy
+import logging
+from datetime import date, datetime, time, timedelta
+from sqlalchemy import bindparam, delete, func, insert, or_, select, text
+from sqlalchemy.orm import Session
+from models import Order, OrderItem, DailySales, HourlySales, ItemDailySales, StaffDailySales
+from reporting.aggregates import order_day, order_hour
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_MODELS = (DailySales, HourlySales, ItemDailySales, StaffDailySales)
+
+# Orders in these statuses don't count towards sales figures. None, like the live
+# queries the rollups replaced: every order counts whatever its status. Adding one
+# changes what the reports show; rebuild the rollups afterwards.
+EXCLUDED_STATUSES = ()
+
+REBUILD_CHUNK_DAYS = 31
+
+
+def counts_towards_sales(status: str) -> bool:
+    return status not in EXCLUDED_STATUSES
+
+
+def counted_orders():
+    """WHERE conditions for the orders that count towards sales (none while nothing is excluded)."""
+    if not EXCLUDED_STATUSES:
+        return ()
+    return (or_(Order.status.is_(None), Order.status.notin_(EXCLUDED_STATUSES)),)
+
+
+# (dialect, table, columns, increments, greatest, least) -> text() statement
+_upsert_statements = {}
+
+
+def _upsert_statement(bind_dialect, table, keys, increments, greatest, least):
+    dialect = bind_dialect.name
+    if dialect == "mysql":
+        from sqlalchemy.dialects.mysql import insert as dialect_insert
+        stmt = dialect_insert(table)
+        new = stmt.inserted
+        bigger, smaller = func.greatest, func.least
+    else:
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        stmt = dialect_insert(table)
+        new = stmt.excluded
+        bigger, smaller = func.max, func.min  # SQLite's two-argument scalar forms
+
+    updates = {name: table.c[name] + new[name] for name in increments}
+    updates.update({name: bigger(func.coalesce(table.c[name], new[name]), new[name]) for name in greatest})
+    updates.update({name: smaller(func.coalesce(table.c[name], new[name]), new[name]) for name in least})
+
+    if dialect == "mysql":
+        stmt = stmt.on_duplicate_key_update(updates)
+    else:
+        stmt = stmt.on_conflict_do_update(index_elements=[c.name for c in table.primary_key], set_=updates)
+    # ✅ Dialect upserts have no SQLAlchemy cache key, so each execute would compile them
+    # again (four per order). Compile once to typed text(), which the engine does cache.
+    # A copy of the live dialect keeps its server-dependent syntax (MySQL 8.0.20+ row alias).
+    compiler = copy.copy(bind_dialect)
+    compiler.paramstyle, compiler.positional = "named", False
+    sql = str(stmt.compile(dialect=compiler, column_keys=list(keys)))
+    return text(sql).bindparams(*(bindparam(key, type_=table.c[key].type) for key in keys))
+
+
+def _upsert(db: Session, model, rows, increments=(), greatest=(), least=()):
+    if not rows:
+        return  # e.g. an order without line items
+    table = model.__table__
+    dialect = db.get_bind().dialect
+    key = (dialect.name, table.name, tuple(rows[0]), increments, greatest, least)
+    stmt = _upsert_statements.get(key)
+    if stmt is None:
+        stmt = _upsert_statements[key] = _upsert_statement(dialect, table, rows[0], increments, greatest, least)
+    db.execute(stmt, rows)
+
+
+def record_order(db: Session, order_date: datetime, user_id: int, total_amount: float, items):
+    """Add one new order to the rollups. `items` holds (menu_item_id, quantity, subtotal) tuples."""
+    record_orders(db, [(order_date, user_id, total_amount, items)])
+
+
+def record_orders(db: Session, orders):
+    """Add new orders, given as (order_date, user_id, total_amount, items) tuples, with one upsert per rollup."""
+    daily, hourly, staff, per_item = {}, {}, {}, {}
+    for order_date, user_id, total_amount, items in orders:
+        day, hour = order_date.date(), order_date.hour
+        count, sales, largest, smallest = daily.get(day, (0, 0, total_amount, total_amount))
+        daily[day] = (count + 1, sales + total_amount, max(largest, total_amount), min(smallest, total_amount))
+        count, sales = hourly.get((day, hour), (0, 0))
+        hourly[(day, hour)] = (count + 1, sales + total_amount)
+        count, sales = staff.get((day, user_id), (0, 0))
+        staff[(day, user_id)] = (count + 1, sales + total_amount)
+        for menu_item_id, quantity, subtotal in items:
+            qty, sales = per_item.get((day, menu_item_id), (0, 0))
+            per_item[(day, menu_item_id)] = (qty + quantity, sales + subtotal)
+
+    _upsert(db, DailySales, [
+        {"day": day, "order_count": count, "total_sales": sales, "max_order": largest, "min_order": smallest}
+        for day, (count, sales, largest, smallest) in sorted(daily.items())
+    ], increments=("order_count", "total_sales"), greatest=("max_order",), least=("min_order",))
+
+    _upsert(db, HourlySales, [
+        {"day": day, "hour": hour, "order_count": count, "total_sales": sales}
+        for (day, hour), (count, sales) in sorted(hourly.items())
+    ], increments=("order_count", "total_sales"))
+
+    _upsert(db, StaffDailySales, [
+        {"day": day, "user_id": user_id, "order_count": count, "total_sales": sales}
+        for (day, user_id), (count, sales) in sorted(staff.items())
+    ], increments=("order_count", "total_sales"))
+
+    # ✅ Sorted so concurrent orders lock the item rows in the same order
+    _upsert(db, ItemDailySales, [
+        {"day": day, "menu_item_id": menu_item_id, "quantity": qty, "total_sales": sales}
+        for (day, menu_item_id), (qty, sales) in sorted(per_item.items())
+    ], increments=("quantity", "total_sales"))
+
+
+def rebuild(db: Session, start: date, end: date):
+    """Recompute every rollup row for the days in [start, end) from the raw orders."""
+    db.flush()
+    for model in ROLLUP_MODELS:
+        db.execute(delete(model).where(model.day >= start, model.day < end))
+
+    day = order_day()
+    in_range = (
+        Order.order_date >= datetime.combine(start, time.min),
+        Order.order_date < datetime.combine(end, time.min),
+        *counted_orders(),
+    )
+
+    db.execute(insert(DailySales).from_select(
+        ["day", "order_count", "total_sales", "max_order", "min_order"],
+        select(day, func.count(Order.id), func.sum(Order.total_amount),
+               func.max(Order.total_amount), func.min(Order.total_amount))
+        .where(*in_range)
+        .group_by(day)
+    ))
+
+    hour = order_hour()
+    db.execute(insert(HourlySales).from_select(
+        ["day", "hour", "order_count", "total_sales"],
+        select(day, hour, func.count(Order.id), func.sum(Order.total_amount))
+        .where(*in_range)
+        .group_by(day, hour)
+    ))
+
+    db.execute(insert(StaffDailySales).from_select(
+        ["day", "user_id", "order_count", "total_sales"],
+        select(day, Order.user_id, func.count(Order.id), func.sum(Order.total_amount))
+        .where(*in_range, Order.user_id.isnot(None))
+        .group_by(day, Order.user_id)
+    ))
+
+    db.execute(insert(ItemDailySales).from_select(
+        ["day", "menu_item_id", "quantity", "total_sales"],
+        select(day, OrderItem.menu_item_id, func.sum(OrderItem.quantity), func.sum(OrderItem.subtotal))
+        .join(Order, Order.id == OrderItem.order_id)
+        .where(*in_range, OrderItem.menu_item_id.isnot(None))
+        .group_by(day, OrderItem.menu_item_id)
+    ))
+
+
+def refresh_day(db: Session, day: date):
+    rebuild(db, day, day + timedelta(days=1))
+
+
+def rebuild_all(db: Session, since: date = None, until: date = None):
+    """Rebuild [since, until); returns the (first, last) day rebuilt, or None when there were no orders."""
+    # Works through the history a month at a time so no single transaction gets huge
+    if since is None:
+        first = db.query(func.min(Order.order_date)).scalar()
+        if first is None:
+            return None
+        since = first.date()
+    until = until or datetime.utcnow().date() + timedelta(days=1)
+
+    start = since
+    while start < until:
+        end = min(start + timedelta(days=REBUILD_CHUNK_DAYS), until)
+        rebuild(db, start, end)
+        db.commit()
+        logger.info("Rebuilt sales rollups for %s .. %s", start, end - timedelta(days=1))
+        start = end
+    return since, until - timedelta(days=1)
+
+
+if __name__ == "__main__":
+    from database import Base, SessionLocal, engine
+
+    parser = argparse.ArgumentParser(description="Maintain the sales rollup tables")
+    parser.add_argument("command", choices=["rebuild"])
+    parser.add_argument("--since", type=date.fromisoformat, help="first day to rebuild (default: first order)")
+    parser.add_argument("--until", type=date.fromisoformat, help="day after the last one to rebuild (default: tomorrow)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    Base.metadata.create_all(engine, tables=[model.__table__ for model in ROLLUP_MODELS])
+    db = SessionLocal()
+    try:
+        rebuild_all(db, args.since, args.until)
+    finally:
+        db.close()
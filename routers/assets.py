@@ -1,52 +1,83 @@
 # routes/assets.py
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from database import get_db
+from typing import Literal, Optional
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_async_db
 from schemas import AssetCreate, AssetOut
-from models import Asset
+from models import Asset, User
+from bulk import UploadFormat, export_csv, import_upload
+from serializers import JSONBytesResponse, render_list, select_for
+from auth.dependencies import is_admin
 
 router = APIRouter()
 
-@router.post("/", response_model=AssetOut)
-def create_asset(asset: AssetCreate, db: Session = Depends(get_db)):
-    # Use model_dump() instead of dict() for Pydantic v2
-    db_asset = Asset(**asset.model_dump())
-    db.add(db_asset)
-    db.commit()
-    db.refresh(db_asset)
-    return db_asset
-
-@router.get("/", response_model=list[AssetOut])
-def list_assets(db: Session = Depends(get_db)):
-    return db.query(Asset).all()
 
-@router.get("/{asset_id}", response_model=AssetOut)
-def read_asset(asset_id: int, db: Session = Depends(get_db)):
+def get_asset_or_404(db, asset_id: int) -> Asset:
     asset = db.query(Asset).filter(Asset.id == asset_id).first()
     if not asset:
         raise HTTPException(status_code=404, detail="Asset not found")
     return asset
 
+
+@router.post("/", response_model=AssetOut)
+async def create_asset(asset: AssetCreate, db: AsyncSession = Depends(get_async_db)):
+    def create(db):
+        # Use model_dump() instead of dict() for Pydantic v2
+        db_asset = Asset(**asset.model_dump())
+        db.add(db_asset)
+        db.commit()
+        db.refresh(db_asset)
+        return db_asset
+
+    return await db.run_sync(create)
+
+# CSV with a header row (name,description,quantity,value,purchase_date,status) or one JSON object per line
+@router.post("/import")
+async def import_assets(
+    file: UploadFile = File(...),
+    format: Optional[UploadFormat] = Query(None, description="default: from the file name"),
+    on_error: Literal["abort", "skip"] = Query("abort", description="skip: import the valid rows anyway"),
+    db: AsyncSession = Depends(get_async_db),
+    admin: User = Depends(is_admin)
+):
+    return await import_upload(db, file, format, AssetCreate, Asset, on_error)
+
+# Declared before /{asset_id} so "export" isn't read as an id
+@router.get("/export")
+async def export_assets(admin: User = Depends(is_admin)):
+    columns = (Asset.id, Asset.name, Asset.description, Asset.quantity, Asset.value,
+               Asset.purchase_date, Asset.status, Asset.added_at, Asset.updated_at)
+    return await export_csv(columns, "assets.csv", order_by=(Asset.id,))
+
+@router.get("/", response_model=list[AssetOut])
+async def list_assets(db: AsyncSession = Depends(get_async_db)):
+    query = select_for(AssetOut, Asset)
+    return JSONBytesResponse(await db.run_sync(render_list, AssetOut, query))
+
+@router.get("/{asset_id}", response_model=AssetOut)
+async def read_asset(asset_id: int, db: AsyncSession = Depends(get_async_db)):
+    return await db.run_sync(get_asset_or_404, asset_id)
+
 @router.put("/{asset_id}", response_model=AssetOut)
-def update_asset(asset_id: int, asset_data: AssetCreate, db: Session = Depends(get_db)):
-    db_asset = db.query(Asset).filter(Asset.id == asset_id).first()
-    if not db_asset:
-        raise HTTPException(status_code=404, detail="Asset not found")
-    
-    # Use model_dump() instead of dict()
-    for field, value in asset_data.model_dump().items():
-        setattr(db_asset, field, value)
-    
-    db.commit()
-    db.refresh(db_asset)
-    return db_asset
+async def update_asset(asset_id: int, asset_data: AssetCreate, db: AsyncSession = Depends(get_async_db)):
+    def update(db):
+        db_asset = get_asset_or_404(db, asset_id)
+
+        # Use model_dump() instead of dict()
+        for field, value in asset_data.model_dump().items():
+            setattr(db_asset, field, value)
+
+        db.commit()
+        db.refresh(db_asset)
+        return db_asset
+
+    return await db.run_sync(update)
 
 @router.delete("/{asset_id}")
-def delete_asset(asset_id: int, db: Session = Depends(get_db)):
-    db_asset = db.query(Asset).filter(Asset.id == asset_id).first()
-    if not db_asset:
-        raise HTTPException(status_code=404, detail="Asset not found")
-    
-    db.delete(db_asset)
-    db.commit()
-    return {"detail": "Asset deleted successfully"}
\ No newline at end of file
+async def delete_asset(asset_id: int, db: AsyncSession = Depends(get_async_db)):
+    def delete(db):
+        db.delete(get_asset_or_404(db, asset_id))
+        db.commit()
+
+    await db.run_sync(delete)
+    return {"detail": "Asset deleted successfully"}
@@ -1,15 +1,18 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Header
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
 from auth.schemas import LoginRequest, LoginResponse
-from auth.auth import authenticate_user, create_session_token
-from database import get_db
+from auth.auth import authenticate_user, create_session_token, revoke_session_token, revoke_user_sessions
+from auth.dependencies import get_current_admin
+from database import get_async_db
+import models
 
 router = APIRouter()
 
 @router.post("/login", response_model=LoginResponse)
-def login(data: LoginRequest, db: Session = Depends(get_db)):
-    user = authenticate_user(data.username, data.password, db)
-    token = create_session_token(user.id)
+async def login(data: LoginRequest, db: AsyncSession = Depends(get_async_db)):
+    user = await authenticate_user(data.username, data.password, db)
+    token = await run_in_threadpool(create_session_token, user.id)
 
     return {
         "token": token,
@@ -22,3 +25,15 @@ def login(data: LoginRequest, db: Session = Depends(get_db)):
         }
     }
 
+
+@router.post("/logout")
+def logout(token: str = Header(...)):
+    revoke_session_token(token)
+    return {"detail": "Logged out"}
+
+
+# ------------------ Admin: Sign a user out everywhere ------------------
+@router.post("/revoke/{user_id}")
+def revoke_sessions(user_id: int, admin: models.User = Depends(get_current_admin)):
+    revoke_user_sessions(user_id)
+    return {"detail": f"All sessions for user {user_id} have been revoked"}
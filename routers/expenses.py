@@ -1,65 +1,104 @@
-from datetime import datetime, timedelta
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, Query
-from requests import Session
-from sqlalchemy import func
+from datetime import date, datetime, timedelta
+from typing import List, Literal
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
-from database import get_db
-from models import Expense
+from database import get_async_db, get_read_db
+from models import Expense, User
 from schemas import ExpenseCreate, ExpenseOut
+from bulk import UploadFormat, export_csv, import_upload
+from serializers import JSONBytesResponse, render_list, select_for
+from auth.dependencies import is_admin
 
 router = APIRouter()
 
 # --- API Router ---
 @router.post("/", response_model=ExpenseOut)
-def add_expense(expense: ExpenseCreate, db: Session = Depends(get_db)):
-    db_exp = Expense(**expense.dict())
-    db.add(db_exp)
-    db.commit()
-    db.refresh(db_exp)
-    return db_exp
+async def add_expense(expense: ExpenseCreate, db: AsyncSession = Depends(get_async_db)):
+    def create(db):
+        db_exp = Expense(**expense.dict())
+        db.add(db_exp)
+        db.commit()
+        db.refresh(db_exp)
+        return db_exp
+
+    return await db.run_sync(create)
+
+# CSV with a header row (category,amount,description,date) or one JSON object per line
+@router.post("/import")
+async def import_expenses(
+    file: UploadFile = File(...),
+    format: Optional[UploadFormat] = Query(None, description="default: from the file name"),
+    on_error: Literal["abort", "skip"] = Query("abort", description="skip: import the valid rows anyway"),
+    db: AsyncSession = Depends(get_async_db),
+    admin: User = Depends(is_admin)
+):
+    return await import_upload(db, file, format, ExpenseCreate, Expense, on_error)
+
+@router.get("/export")
+async def export_expenses(
+    start_date: Optional[datetime] = Query(None, description="inclusive"),
+    end_date: Optional[datetime] = Query(None, description="exclusive"),
+    admin: User = Depends(is_admin)
+):
+    where = []
+    if start_date:
+        where.append(Expense.date >= start_date)
+    if end_date:
+        where.append(Expense.date < end_date)
+    columns = (Expense.id, Expense.category, Expense.amount, Expense.description, Expense.date, Expense.created_at)
+    return await export_csv(columns, "expenses.csv", order_by=(Expense.date, Expense.id), where=where)
 
 @router.get("/", response_model=List[ExpenseOut])
-def list_expenses(db: Session = Depends(get_db)):
-    return db.query(Expense).order_by(Expense.date.desc()).all()
+async def list_expenses(db: AsyncSession = Depends(get_async_db)):
+    query = select_for(ExpenseOut, Expense).order_by(Expense.date.desc())
+    return JSONBytesResponse(await db.run_sync(render_list, ExpenseOut, query))
 
 @router.delete("/{expense_id}")
-def remove_expense(expense_id: int, db: Session = Depends(get_db)):
-    exp = db.query(Expense).filter(Expense.id == expense_id).first()
-    if not exp:
-        raise HTTPException(status_code=404, detail="Expense not found")
-    db.delete(exp)
-    db.commit()
+async def remove_expense(expense_id: int, db: AsyncSession = Depends(get_async_db)):
+    def delete(db):
+        exp = db.query(Expense).filter(Expense.id == expense_id).first()
+        if not exp:
+            raise HTTPException(status_code=404, detail="Expense not found")
+        db.delete(exp)
+        db.commit()
+
+    await db.run_sync(delete)
     return {"detail": f"Expense {expense_id} deleted"}
 
 
 
 @router.get("/summary")
-def get_expense_summary(
+async def get_expense_summary(
     period: Optional[str] = Query(None, description="one of: weekly, monthly"),
     start_date: Optional[str] = Query(None),
     end_date: Optional[str] = Query(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
-    query = db.query(Expense.category, func.sum(Expense.amount))
+    query = select(Expense.category, func.sum(Expense.amount))
 
     # Handle date filters
     if period == "weekly":
         from_date = datetime.utcnow() - timedelta(days=7)
-        query = query.filter(Expense.created_at >= from_date)
+        query = query.where(Expense.created_at >= from_date)
     elif period == "monthly":
         from_date = datetime.utcnow() - timedelta(days=30)
-        query = query.filter(Expense.created_at >= from_date)
+        query = query.where(Expense.created_at >= from_date)
     elif start_date and end_date:
         try:
             from_date = datetime.fromisoformat(start_date)
-            to_date = datetime.fromisoformat(end_date)
-            query = query.filter(Expense.created_at.between(from_date, to_date))
+            # ✅ Half-open range; a bare date as the end includes that whole day
+            try:
+                to_date = datetime.combine(date.fromisoformat(end_date) + timedelta(days=1), datetime.min.time())
+            except ValueError:
+                to_date = datetime.fromisoformat(end_date)
+            query = query.where(Expense.created_at >= from_date, Expense.created_at < to_date)
         except ValueError:
             return {"error": "Invalid date format. Use YYYY-MM-DD"}
 
     query = query.group_by(Expense.category)
-    results = query.all()
+    results = await db.run_sync(lambda db: db.execute(query).all())
 
     total = sum([amount for _, amount in results])
     return {
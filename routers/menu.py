@@ -1,67 +1,159 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from database import get_db
+import hashlib
+import os
+import threading
+from typing import List, Literal, Optional
+from fastapi import APIRouter, Depends, File, Header, HTTPException, Query, Response, UploadFile
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_async_db
 import models, schemas
 from auth.dependencies import is_admin
+from bulk import UploadFormat, export_csv, import_upload
+from cache import TTLCache
+from serializers import JSONBytesResponse, render_list, select_for
 
 router = APIRouter()
 
+# ------------------ Public menu cache ------------------
+# Pre-serialized /menu/public bodies per category. Menu writes below bump the
+# version and clear it; the TTL bounds how stale stock counts (changed by orders)
+# and other workers' edits can get.
+MENU_CACHE_TTL_SECONDS = float(os.getenv("MENU_CACHE_TTL_SECONDS", "30"))
+
+_menu_cache = TTLCache(maxsize=256, ttl=MENU_CACHE_TTL_SECONDS)  # category -> (etag, body)
+_menu_version = 0
+_menu_version_lock = threading.Lock()
+
+
+def invalidate_menu_cache():
+    global _menu_version
+    with _menu_version_lock:
+        _menu_version += 1
+        _menu_cache.clear()
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+def get_item_or_404(db, item_id: int) -> models.MenuItem:
+    item = db.query(models.MenuItem).filter(models.MenuItem.id == item_id).first()
+    if not item:
+        raise HTTPException(status_code=404, detail="Item not found")
+    return item
+
+
+def render_public_menu(db, category: Optional[str]) -> bytes:
+    query = select_for(schemas.MenuItemOut, models.MenuItem)  # Remove the is_active filter
+    if category:
+        query = query.where(models.MenuItem.category == category)
+    return render_list(db, schemas.MenuItemOut, query)
+
 # ------------------ Admin: Create Menu Item ------------------
 @router.post("/", response_model=schemas.MenuItemOut)
-def create_menu_item(item: schemas.MenuItemCreate, db: Session = Depends(get_db), admin: models.User = Depends(is_admin)):
-    db_item = models.MenuItem(**item.dict(),is_active=True)
-    db.add(db_item)
-    db.commit()
-    db.refresh(db_item)
-    return db_item
+async def create_menu_item(item: schemas.MenuItemCreate, db: AsyncSession = Depends(get_async_db), admin: models.User = Depends(is_admin)):
+    def create(db):
+        db_item = models.MenuItem(**item.dict(),is_active=True)
+        db.add(db_item)
+        db.commit()
+        invalidate_menu_cache()
+        db.refresh(db_item)
+        return db_item
+
+    return await db.run_sync(create)
+
+# ------------------ Admin: Bulk Import / Export ------------------
+# CSV with a header row (name,price,stock_quantity,category) or one JSON object per line
+@router.post("/import")
+async def import_menu_items(
+    file: UploadFile = File(...),
+    format: Optional[UploadFormat] = Query(None, description="default: from the file name"),
+    on_error: Literal["abort", "skip"] = Query("abort", description="skip: import the valid rows anyway"),
+    db: AsyncSession = Depends(get_async_db),
+    admin: models.User = Depends(is_admin)
+):
+    result = await import_upload(db, file, format, schemas.MenuItemCreate, models.MenuItem, on_error, is_active=True)
+    if result["inserted"]:
+        invalidate_menu_cache()
+    return result
+
+
+@router.get("/export")
+async def export_menu_items(admin: models.User = Depends(is_admin)):
+    columns = (models.MenuItem.id, models.MenuItem.name, models.MenuItem.price, models.MenuItem.stock_quantity,
+               models.MenuItem.category, models.MenuItem.is_active, models.MenuItem.created_at, models.MenuItem.updated_at)
+    return await export_csv(columns, "menu_items.csv", order_by=(models.MenuItem.id,))
 
 # ------------------ Admin: List Menu Items ------------------
 @router.get("/", response_model=List[schemas.MenuItemOut])
-def list_menu_items(db: Session = Depends(get_db), admin: models.User = Depends(is_admin)):
-    return db.query(models.MenuItem).filter(models.MenuItem.is_active==True).all()
+async def list_menu_items(db: AsyncSession = Depends(get_async_db), admin: models.User = Depends(is_admin)):
+    query = select_for(schemas.MenuItemOut, models.MenuItem).where(models.MenuItem.is_active == True)
+    return JSONBytesResponse(await db.run_sync(render_list, schemas.MenuItemOut, query))
 
 # everyone can view menu
 @router.get("/public", response_model=List[schemas.MenuItemOut])
-def get_active_menu_items(category: str = None, db: Session = Depends(get_db)):
-    query = db.query(models.MenuItem)  # Remove the is_active filter
-    if category:
-        query = query.filter(models.MenuItem.category == category)
-    return query.all()
+async def get_active_menu_items(
+    category: str = None,
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db)
+):
+    cached = _menu_cache.get(category)
+    if cached is None:
+        version = _menu_version
+        body = await db.run_sync(render_public_menu, category)
+        cached = ('"' + hashlib.sha256(body).hexdigest()[:32] + '"', body)
+        with _menu_version_lock:
+            # ✅ Don't store a body read before a concurrent menu edit
+            if version == _menu_version:
+                _menu_cache.set(category, cached)
+
+    etag, body = cached
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    return JSONBytesResponse(body, headers=headers)
 
 # ------------------ Admin: Update Menu Item ------------------
 @router.put("/{item_id}", response_model=schemas.MenuItemOut)
-def update_menu_item(item_id: int, updates: schemas.MenuItemCreate, db: Session = Depends(get_db), admin: models.User = Depends(is_admin)):
-    item = db.query(models.MenuItem).filter(models.MenuItem.id == item_id).first()
-    if not item:
-        raise HTTPException(status_code=404, detail="Item not found")
+async def update_menu_item(item_id: int, updates: schemas.MenuItemCreate, db: AsyncSession = Depends(get_async_db), admin: models.User = Depends(is_admin)):
+    def update(db):
+        item = get_item_or_404(db, item_id)
 
-    for key, value in updates.dict(exclude_unset=True).items():
-        setattr(item, key, value)
+        for key, value in updates.dict(exclude_unset=True).items():
+            setattr(item, key, value)
 
-    db.commit()
-    db.refresh(item)
-    return item
+        db.commit()
+        invalidate_menu_cache()
+        db.refresh(item)
+        return item
+
+    return await db.run_sync(update)
 
 # ------------------ Admin: Soft Delete Menu Item ------------------
 @router.delete("/{item_id}")
-def soft_delete_menu_item(item_id: int, db: Session = Depends(get_db), admin: models.User = Depends(is_admin)):
-    item = db.query(models.MenuItem).filter(models.MenuItem.id == item_id).first()
-    if not item:
-        raise HTTPException(status_code=404, detail="Item not found")
+async def soft_delete_menu_item(item_id: int, db: AsyncSession = Depends(get_async_db), admin: models.User = Depends(is_admin)):
+    def deactivate(db):
+        item = get_item_or_404(db, item_id)
+        item.is_active = False
+        db.commit()
+        invalidate_menu_cache()
+        return item
 
-    item.is_active = False
-    db.commit()
+    item = await db.run_sync(deactivate)
     return {"detail": f"Item '{item.name}' has been deactivated"}
 
 
 # ------------------ Admin: Permanently Delete Menu Item ------------------
 @router.delete("/{item_id}")
-def permanently_delete_menu_item(item_id: int, db: Session = Depends(get_db), admin: models.User = Depends(is_admin)):
-    item = db.query(models.MenuItem).filter(models.MenuItem.id == item_id).first()
-    if not item:
-        raise HTTPException(status_code=404, detail="Item not found")
+async def permanently_delete_menu_item(item_id: int, db: AsyncSession = Depends(get_async_db), admin: models.User = Depends(is_admin)):
+    def delete(db):
+        item = get_item_or_404(db, item_id)
+        db.delete(item)
+        db.commit()
+        invalidate_menu_cache()
+        return item
 
-    db.delete(item)
-    db.commit()
+    item = await db.run_sync(delete)
     return {"detail": f"Item '{item.name}' has been permanently deleted"}
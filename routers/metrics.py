@@ -0,0 +1,32 @@
+from anyio import to_thread
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+import metrics
+from auth import hashing
+
+
+def _threadpool_status():
+    # Sync endpoints and the sync database layer each hold one of these while they run
+    limiter = to_thread.current_default_thread_limiter()
+    yield ("limit",), limiter.total_tokens
+    yield ("busy",), limiter.borrowed_tokens
+    yield ("waiting",), limiter.statistics().tasks_waiting
+
+
+def _hashing_status():
+    stats = hashing.hash_stats()
+    yield ("workers",), stats["workers"]
+    yield ("in_flight",), stats["in_flight"]
+    yield ("queued",), stats["queue_depth"]
+
+
+metrics.Gauge("pos_threadpool_threads", "Starlette worker threadpool usage", ["state"], collect=_threadpool_status)
+metrics.Gauge("pos_password_hashing_jobs", "bcrypt pool workers and jobs", ["state"], collect=_hashing_status)
+
+router = APIRouter()
+
+
+# ------------------ Prometheus scrape endpoint ------------------
+@router.get("", response_class=PlainTextResponse, include_in_schema=False)
+async def scrape():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
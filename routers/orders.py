@@ -1,106 +1,523 @@
-from fastapi import APIRouter, Depends, HTTPException
+import base64
+import json
+import os
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, WebSocket, WebSocketException, status as http_status
+from fastapi.responses import StreamingResponse
+from starlette.websockets import WebSocketDisconnect
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from datetime import datetime, timedelta
-from typing import List
-from database import get_db
+from sqlalchemy import insert, select, tuple_
+from sqlalchemy.exc import IntegrityError
+from datetime import datetime, timedelta, timezone
+from typing import List, Literal, Optional
+from database import DB_ASYNC, get_async_db, get_read_db, read_sessionmaker
 import models, schemas
-from auth.dependencies import get_current_admin
+from auth.dependencies import get_current_admin, get_feed_user
+from broadcast import order_feed
+from stock import reserve_stock, run_with_retry_async
+from reporting import rollups
+from reporting.result_cache import report_cache
+from receipts import invalidate_receipt
+from serializers import JSONBytesResponse, as_dicts, dump_list
 
 router = APIRouter()
 
+STREAM_BATCH_SIZE = 1000
+ORDER_BATCH_CHUNK_SIZE = int(os.getenv("ORDER_BATCH_CHUNK_SIZE", "50"))  # orders per transaction in /orders/batch
+
 
 # ------------------ ✅ USER: Create Order ------------------
 @router.post("/", response_model=schemas.OrderOut)
-def create_order(order_data: schemas.OrderCreate, db: Session = Depends(get_db)):
+async def create_order(order_data: schemas.OrderCreate, db: AsyncSession = Depends(get_async_db)):
+    # ✅ Replayed transparently if MySQL picks this transaction as a deadlock victim
+    order = await run_with_retry_async(db, place_order, order_data)
+    report_cache.invalidate()
+    await order_feed.publish("order.created", order.model_dump(mode="json"))
+    return order
+
+
+def place_order(db: Session, order_data: schemas.OrderCreate) -> schemas.OrderOut:
     # ✅ Ensure user exists
-    user = db.query(models.User).filter(models.User.id == order_data.user_id).first()
+    user = db.query(models.User.id).filter(models.User.id == order_data.user_id).first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
+    # ✅ Resolve every menu item on the ticket in a single IN query
+    menu_ids = {item.menu_item_id for item in order_data.items}
+    menu_items = {
+        row.id: row
+        for row in db.query(models.MenuItem.id, models.MenuItem.price, models.MenuItem.stock_quantity)
+        .filter(models.MenuItem.id.in_(menu_ids))
+    }
+
     total_amount = 0
     order_items = []
+    qty_by_item = {}
 
     for item in order_data.items:
-        menu_item = db.query(models.MenuItem).filter(models.MenuItem.id == item.menu_item_id).first()
+        menu_item = menu_items.get(item.menu_item_id)
         if not menu_item:
             raise HTTPException(status_code=404, detail=f"Menu item ID {item.menu_item_id} not found.")
 
         qty = item.quantity or 1  # ✅ Default to 1 if not provided
-
-        # ✅ Optional: Adjust stock if available
-        if menu_item.stock_quantity is not None:
-            menu_item.stock_quantity = max(0, menu_item.stock_quantity - qty)
+        qty_by_item[menu_item.id] = qty_by_item.get(menu_item.id, 0) + qty
 
         subtotal = menu_item.price * qty
         total_amount += subtotal
 
-        order_items.append(models.OrderItem(
-            menu_item_id=item.menu_item_id,
-            quantity=qty,
-            unit_price=menu_item.price,
-            subtotal=subtotal
-        ))
+        order_items.append({
+            "menu_item_id": item.menu_item_id,
+            "quantity": qty,
+            "unit_price": menu_item.price,
+            "subtotal": subtotal,
+        })
 
+    now = datetime.utcnow()
     new_order = models.Order(
         user_id=order_data.user_id,
         total_amount=total_amount,
         status="completed",
-        order_date=datetime.utcnow(),
-        items=order_items
+        order_date=now,
+        created_at=now,
     )
-
     db.add(new_order)
+    db.flush()
+
+    # ✅ All line items go out as one executemany
+    for row in order_items:
+        row["order_id"] = new_order.id
+    item_ids = insert_order_items(db, order_items)
+
+    # ✅ Build the response before commit, from the rows just written: no refresh, no lazy load
+    response = schemas.OrderOut(
+        id=new_order.id, user_id=new_order.user_id, total_amount=total_amount,
+        status=new_order.status, order_date=now, created_at=now,
+        items=[schemas.OrderItemOut(id=item_id, **row) for item_id, row in zip(item_ids, order_items)],
+    )
+
+    # ✅ Reserve tracked stock atomically; oversell is rejected with a 409.
+    # Done last so the hot menu rows stay locked only until the commit below.
+    reserve_stock(db, {
+        item_id: qty for item_id, qty in qty_by_item.items()
+        if menu_items[item_id].stock_quantity is not None
+    })
+
+    # ✅ Keep the sales rollups in step (last, since today's rows are the hottest)
+    rollups.record_order(db, now, order_data.user_id, total_amount, [
+        (row["menu_item_id"], row["quantity"], row["subtotal"]) for row in order_items
+    ])
     db.commit()
-    db.refresh(new_order)
+    return response
+
+
+def insert_order_items(db: Session, rows) -> List[int]:
+    """Insert order_items `rows` for new orders as one executemany; returns their ids in the order given."""
+    # Auto-increment ids follow insertion order, and the orders are new, so sorted ids line up with `rows`
+    if db.get_bind().dialect.insert_executemany_returning:
+        return sorted(db.scalars(insert(models.OrderItem).returning(models.OrderItem.id), rows))
+    db.execute(insert(models.OrderItem), rows)  # MySQL has no RETURNING: read the ids back
+    return db.scalars(
+        select(models.OrderItem.id)
+        .where(models.OrderItem.order_id.in_({row["order_id"] for row in rows}))
+        .order_by(models.OrderItem.id)
+    ).all()
+
+
+# ------------------ ✅ USER: Batch of offline orders (till sync) ------------------
+# Tills queue orders while offline and replay them here. Every order carries a
+# client_order_id, so replaying a batch (or part of one) never creates duplicates.
+@router.post("/batch", response_model=List[schemas.OrderBatchResult])
+async def create_order_batch(batch: schemas.OrderBatchCreate, db: AsyncSession = Depends(get_async_db)):
+    order_batch = OrderBatch(batch.orders)
+    await db.run_sync(order_batch.prepare)
+    # ✅ Each chunk is its own transaction, so a deadlock replays only that chunk;
+    # the chunks before it are committed and keep their "created" results
+    for chunk in order_batch.chunks(ORDER_BATCH_CHUNK_SIZE):
+        await run_with_retry_async(db, order_batch.apply, chunk)
+    if order_batch.created:
+        report_cache.invalidate()
+        for order in order_batch.created:
+            await order_feed.publish("order.created", order.model_dump(mode="json"))
+    return order_batch.per_entry()
+
+
+def _as_utc_naive(value: Optional[datetime], now: datetime) -> datetime:
+    if value is None:
+        return now
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return min(value, now)  # a till clock running fast can't date orders in the future
+
 
-    for item in new_order.items:
-        db.refresh(item)
+class OrderBatch:
+    """Outcome of one /orders/batch request, filled in as its chunks commit."""
 
-    return new_order
+    def __init__(self, entries: List[schemas.OrderBatchEntry]):
+        self.entries = entries
+        self.first = {}  # client_order_id -> first entry carrying it
+        for entry in entries:
+            self.first.setdefault(entry.client_order_id, entry)
+        self.results = dict.fromkeys(self.first)  # client_order_id -> OrderBatchResult (None until decided)
+        self.created = []  # OrderOut for each newly created order
+        self.valid = []
+        self.menu_items = {}
+
+    def mark_existing(self, db: Session, keys):
+        # Orders already applied by an earlier replay
+        rows = db.execute(
+            select(models.Order.client_order_id, models.Order.id, models.Order.total_amount)
+            .where(models.Order.client_order_id.in_(keys))
+        ).all()
+        for key, order_id, total in rows:
+            self.results[key] = schemas.OrderBatchResult(client_order_id=key, status="duplicate", order_id=order_id, total_amount=total)
+        return {row[0] for row in rows}
+
+    def reject(self, key: str, error: str):
+        self.results[key] = schemas.OrderBatchResult(client_order_id=key, status="rejected", error=error)
+
+    def prepare(self, db: Session):
+        applied = self.mark_existing(db, list(self.first))
+        pending = [entry for key, entry in self.first.items() if key not in applied]
+
+        # ✅ Every user and menu item in the batch resolved in two IN queries
+        user_ids = {row[0] for row in db.execute(
+            select(models.User.id).where(models.User.id.in_({entry.user_id for entry in pending}))
+        )}
+        self.menu_items = {
+            row.id: row
+            for row in db.execute(
+                select(models.MenuItem.id, models.MenuItem.price, models.MenuItem.stock_quantity)
+                .where(models.MenuItem.id.in_({item.menu_item_id for entry in pending for item in entry.items}))
+            )
+        }
+
+        for entry in pending:
+            missing = [item.menu_item_id for item in entry.items if item.menu_item_id not in self.menu_items]
+            if entry.user_id not in user_ids:
+                self.reject(entry.client_order_id, "User not found")
+            elif missing:
+                self.reject(entry.client_order_id, f"Menu item ID {missing[0]} not found.")
+            else:
+                self.valid.append(entry)
+        db.commit()
+
+    def chunks(self, size: int):
+        for start in range(0, len(self.valid), size):
+            yield self.valid[start:start + size]
+
+    def apply(self, db: Session, chunk):
+        # A replay after a deadlock skips whatever an earlier attempt already decided
+        chunk = [entry for entry in chunk if self.results[entry.client_order_id] is None]
+        if not chunk:
+            return
+        try:
+            created = _insert_order_chunk(db, chunk, self.menu_items)
+        except IntegrityError:
+            # A concurrent replay of some of these orders got there first; anything
+            # else (e.g. a user or menu item deleted meanwhile) is a real error
+            db.rollback()
+            if not self.mark_existing(db, [entry.client_order_id for entry in chunk]):
+                raise
+            return self.apply(db, chunk)
+        except HTTPException as exc:
+            if exc.status_code != 409:
+                raise
+            if len(chunk) > 1:
+                # Not enough stock for the whole chunk: apply its orders one at a
+                # time so only the ones that can't be covered are rejected
+                for entry in chunk:
+                    self.apply(db, [entry])
+                return
+            self.reject(chunk[0].client_order_id, exc.detail)
+            return
+        for order, key in created:
+            self.created.append(order)
+            self.results[key] = schemas.OrderBatchResult(
+                client_order_id=key, status="created", order_id=order.id, total_amount=order.total_amount
+            )
+
+    def per_entry(self) -> List[schemas.OrderBatchResult]:
+        # The first entry with a client_order_id gets its outcome; repeats of it are duplicates
+        return [
+            self.results[entry.client_order_id] if entry is self.first[entry.client_order_id]
+            else self.results[entry.client_order_id].model_copy(update={"status": "duplicate"})
+            for entry in self.entries
+        ]
+
+
+def _insert_order_chunk(db: Session, entries, menu_items):
+    """Insert `entries` as one transaction; returns [(OrderOut, client_order_id)]."""
+    if not entries:
+        return []
+    now = datetime.utcnow()
+    orders, lines, qty_by_item = [], {}, {}
+    for entry in entries:
+        items = []
+        for item in entry.items:
+            menu_item = menu_items[item.menu_item_id]
+            qty = item.quantity or 1
+            items.append({"menu_item_id": menu_item.id, "quantity": qty,
+                          "unit_price": menu_item.price, "subtotal": menu_item.price * qty})
+            if menu_item.stock_quantity is not None:
+                qty_by_item[menu_item.id] = qty_by_item.get(menu_item.id, 0) + qty
+        lines[entry.client_order_id] = items
+        orders.append({
+            "client_order_id": entry.client_order_id,
+            "user_id": entry.user_id,
+            "total_amount": sum(row["subtotal"] for row in items),
+            "status": "completed",
+            "order_date": _as_utc_naive(entry.order_date, now),
+            "created_at": now,
+        })
+
+    # ✅ Orders and their line items as two executemany inserts; ids read back by key
+    db.execute(insert(models.Order), orders)
+    order_ids = dict(db.execute(
+        select(models.Order.client_order_id, models.Order.id)
+        .where(models.Order.client_order_id.in_(lines))
+    ).all())
+    item_rows = [{**row, "order_id": order_ids[key]} for key, items in lines.items() for row in items]
+    item_ids = insert_order_items(db, item_rows)
+
+    reserve_stock(db, qty_by_item)
+    rollups.record_orders(db, [
+        (order["order_date"], order["user_id"], order["total_amount"],
+         [(row["menu_item_id"], row["quantity"], row["subtotal"]) for row in lines[order["client_order_id"]]])
+        for order in orders
+    ])
+
+    # ✅ Response items from the rows just written, in the order the till sent them
+    items_by_order = {}
+    for item_id, row in zip(item_ids, item_rows):
+        items_by_order.setdefault(row["order_id"], []).append(schemas.OrderItemOut(id=item_id, **row))
+    db.commit()
+    return [
+        (schemas.OrderOut(id=order_ids[order["client_order_id"]], items=items_by_order.get(order_ids[order["client_order_id"]], []),
+                          **{key: order[key] for key in ("user_id", "total_amount", "status", "order_date", "created_at")}),
+         order["client_order_id"])
+        for order in orders
+    ]
 
 
 # ------------------ ✅ ADMIN: List All Orders ------------------
+def encode_cursor(order_date: datetime, order_id: int) -> str:
+    return base64.urlsafe_b64encode(f"{order_date.isoformat()}|{order_id}".encode()).decode()
+
+
+def decode_cursor(cursor: str):
+    try:
+        order_date, order_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(order_date), int(order_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def order_filters(start_date, end_date, status, user_id):
+    filters = []
+    if start_date:
+        filters.append(models.Order.order_date >= start_date)
+    if end_date:
+        filters.append(models.Order.order_date < end_date)
+    if status:
+        filters.append(models.Order.status == status)
+    if user_id:
+        filters.append(models.Order.user_id == user_id)
+    return filters
+
+
+ORDER_COLUMNS = (
+    models.Order.id, models.Order.user_id, models.Order.total_amount, models.Order.status,
+    models.Order.order_date, models.Order.created_at,
+)
+ITEM_COLUMNS = (
+    models.OrderItem.id, models.OrderItem.menu_item_id, models.OrderItem.quantity,
+    models.OrderItem.unit_price, models.OrderItem.subtotal,
+)
+
+
+def order_export_query(filters):
+    # ✅ One orders+items query read through a server-side cursor; rows for the same
+    # order arrive together, so only the order being assembled is held in memory.
+    return (
+        select(
+            *ORDER_COLUMNS,
+            models.OrderItem.id.label("item_id"), models.OrderItem.menu_item_id,
+            models.OrderItem.quantity, models.OrderItem.unit_price, models.OrderItem.subtotal,
+        )
+        .outerjoin(models.OrderItem, models.OrderItem.order_id == models.Order.id)
+        .where(*filters)
+        .order_by(models.Order.order_date.desc(), models.Order.id.desc(), models.OrderItem.id)
+        .execution_options(stream_results=True, yield_per=STREAM_BATCH_SIZE)
+    )
+
+
+class NdjsonOrderWriter:
+    """Folds joined order/item rows into one NDJSON line per order, handed out in batches."""
+
+    def __init__(self):
+        self.current = None
+        self.lines = []
+
+    def feed(self, row):
+        # Unpacked by position: attribute lookups on every joined row added up
+        order_id, user_id, total_amount, status, order_date, created_at, item_id, menu_item_id, quantity, unit_price, subtotal = row
+        if self.current is None or self.current["id"] != order_id:
+            self.finish()
+            self.current = {
+                "id": order_id, "user_id": user_id, "total_amount": total_amount, "status": status,
+                "order_date": order_date, "created_at": created_at, "items": [],
+            }
+        if item_id is not None:
+            self.current["items"].append({
+                "id": item_id, "menu_item_id": menu_item_id, "quantity": quantity,
+                "unit_price": unit_price, "subtotal": subtotal,
+            })
+
+    def finish(self):
+        if self.current is not None:
+            self.lines.append(schemas.OrderOut.model_validate(self.current).model_dump_json())
+            self.current = None
+
+    def take(self) -> str:
+        # One chunk per batch of orders rather than one ASGI message per order
+        chunk = "".join(line + "\n" for line in self.lines)
+        self.lines = []
+        return chunk
+
+
+def stream_orders_ndjson(session_factory, filters):
+    # Opens its own session: the request's session is closed before streaming starts.
+    db = session_factory()
+    try:
+        writer = NdjsonOrderWriter()
+        for row in db.execute(order_export_query(filters)):
+            writer.feed(row)
+            if len(writer.lines) >= STREAM_BATCH_SIZE:
+                yield writer.take()
+        writer.finish()
+        yield writer.take()
+    finally:
+        db.close()
+
+
+async def stream_orders_ndjson_async(session_factory, filters):
+    async with session_factory() as db:
+        writer = NdjsonOrderWriter()
+        async for row in await db.stream(order_export_query(filters)):
+            writer.feed(row)
+            if len(writer.lines) >= STREAM_BATCH_SIZE:
+                yield writer.take()
+        writer.finish()
+        yield writer.take()
+
+
+def render_order_page(db: Session, filters, limit: int):
+    # ✅ Column tuples instead of ORM objects: the page of orders, then all their items
+    # in one IN query, encoded straight to JSON bytes. Returns (body, next cursor).
+    orders = as_dicts(db.execute(
+        select(*ORDER_COLUMNS)
+        .where(*filters)
+        .order_by(models.Order.order_date.desc(), models.Order.id.desc())
+        .limit(limit + 1)
+    ))
+    next_cursor = None
+    if len(orders) > limit:
+        orders = orders[:limit]
+        next_cursor = encode_cursor(orders[-1]["order_date"], orders[-1]["id"])
+
+    items_by_order = {}
+    if orders:
+        items = db.execute(
+            select(models.OrderItem.order_id, *ITEM_COLUMNS)
+            .where(models.OrderItem.order_id.in_([order["id"] for order in orders]))
+            .order_by(models.OrderItem.id)
+        )
+        keys = list(items.keys())[1:]
+        for order_id, *values in items:
+            items_by_order.setdefault(order_id, []).append(dict(zip(keys, values)))
+    for order in orders:
+        order["items"] = items_by_order.get(order["id"], [])
+    return dump_list(schemas.OrderOut, orders), next_cursor
+
+
 @router.get("/", response_model=List[schemas.OrderOut])
-def list_orders(db: Session = Depends(get_db), admin: models.User = Depends(get_current_admin)):
-    return db.query(models.Order).order_by(models.Order.order_date.desc()).all()
+async def list_orders(
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor header from the previous page"),
+    start_date: Optional[datetime] = Query(None, description="inclusive"),
+    end_date: Optional[datetime] = Query(None, description="exclusive"),
+    status: Optional[str] = None,
+    user_id: Optional[int] = None,
+    format: Literal["json", "ndjson"] = Query("json", description="ndjson streams every matching order (exports)"),
+    db: AsyncSession = Depends(get_read_db),
+    admin: models.User = Depends(get_current_admin)
+):
+    filters = order_filters(start_date, end_date, status, user_id)
+
+    if format == "ndjson":
+        session_factory = await read_sessionmaker()
+        stream = stream_orders_ndjson_async if DB_ASYNC else stream_orders_ndjson
+        lines = stream(session_factory, filters)
+        return StreamingResponse(lines, media_type="application/x-ndjson")
+
+    # ✅ Keyset pagination on (order_date, id), newest first
+    if cursor:
+        filters.append(tuple_(models.Order.order_date, models.Order.id) < tuple_(*decode_cursor(cursor)))
+
+    body, next_cursor = await db.run_sync(render_order_page, filters, limit)
+    return JSONBytesResponse(body, headers={"X-Next-Cursor": next_cursor} if next_cursor else None)
 
 # ------------------ ✅ ADMIN: Update Order Status ------------------
 @router.put("/{order_id}")
-def update_order_status(
+async def update_order_status(
     order_id: int,
     status: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     admin: models.User = Depends(get_current_admin)
 ):
-    order = db.query(models.Order).filter(models.Order.id == order_id).first()
-    if not order:
-        raise HTTPException(status_code=404, detail="Order not found")
-    
-    order.status = status
-    db.commit()
+    def update(db):
+        order = db.query(models.Order).filter(models.Order.id == order_id).first()
+        if not order:
+            raise HTTPException(status_code=404, detail="Order not found")
+
+        previous_status = order.status
+        order.status = status
+
+        # ✅ Recompute that day's rollups when the order moves in or out of the sales figures
+        if order.order_date and rollups.counts_towards_sales(previous_status) != rollups.counts_towards_sales(status):
+            rollups.refresh_day(db, order.order_date.date())
+        db.commit()
+        return {
+            "id": order.id, "status": status, "previous_status": previous_status,
+            "total_amount": order.total_amount,
+            "order_date": order.order_date.isoformat() if order.order_date else None,
+        }
+
+    event = await db.run_sync(update)
+    report_cache.invalidate()
+    invalidate_receipt(order_id)
+    await order_feed.publish("order.status", event)
     return {"detail": f"Order {order_id} status updated to '{status}'"}
 
 
 # ------------------ ✅ ADMIN: View Order Stats ------------------
 @router.get("/stats")
-def order_stats(db: Session = Depends(get_db), admin: models.User = Depends(get_current_admin)):
+async def order_stats(db: AsyncSession = Depends(get_read_db), admin: models.User = Depends(get_current_admin)):
     today = datetime.utcnow().date()
     week_ago = today - timedelta(days=7)
     month_ago = today.replace(day=1)
 
-    total_today = db.query(func.count(models.Order.id))\
-        .filter(func.date(models.Order.order_date) == today).scalar()
-
-    total_week = db.query(func.count(models.Order.id))\
-        .filter(models.Order.order_date >= week_ago).scalar()
+    # ✅ At most ~31 pre-aggregated day rows instead of scanning orders
+    days = await db.run_sync(lambda db: db.query(models.DailySales.day, models.DailySales.order_count, models.DailySales.total_sales)
+        .filter(models.DailySales.day >= min(week_ago, month_ago), models.DailySales.day < today + timedelta(days=1))
+        .all())
 
-    total_month = db.query(func.count(models.Order.id))\
-        .filter(models.Order.order_date >= month_ago).scalar()
+    total_today = sum(count for day, count, _ in days if day == today)
+    total_week = sum(count for day, count, _ in days if day >= week_ago)
+    total_month = sum(count for day, count, _ in days if day >= month_ago)
 
     # ✅ NEW: Total amount sold today
-    total_sales_today = db.query(func.sum(models.Order.total_amount))\
-        .filter(func.date(models.Order.order_date) == today).scalar() or 0
+    total_sales_today = sum(sales for day, _, sales in days if day == today)
 
     return {
         "today": total_today,
@@ -108,3 +525,54 @@ def order_stats(db: Session = Depends(get_db), admin: models.User = Depends(get_
         "this_month": total_month,
         "total_sales_today": total_sales_today  # ✅ include this in return
     }
+
+
+# ------------------ ✅ Live feed (kitchen display / dashboard) ------------------
+# Pushes `order.created` and `order.status` events as they happen. Reconnect with the
+# last event id (SSE does this by itself via Last-Event-ID) to get what was missed;
+# a `reset` event means the gap is too old and the client should reload once.
+async def sse_events(last_event_id: Optional[str]):
+    subscription = order_feed.subscribe(last_event_id)
+    try:
+        yield "retry: 3000\n\n"
+        async for event in subscription:
+            if event is None:
+                yield ": keep-alive\n\n"
+                continue
+            event_id = f"id: {event['id']}\n" if event["id"] else ""
+            yield f"{event_id}event: {event['type']}\ndata: {json.dumps(event['data'])}\n\n"
+    finally:
+        order_feed.unsubscribe(subscription)
+
+
+@router.get("/feed")
+async def order_feed_sse(
+    last_event_id: Optional[str] = Query(None, description="resume after this event"),
+    last_event_id_header: Optional[str] = Header(None, alias="Last-Event-ID"),
+    user: models.User = Depends(get_feed_user)
+):
+    return StreamingResponse(
+        sse_events(last_event_id_header or last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.websocket("/feed/ws")
+async def order_feed_ws(websocket: WebSocket, token: Optional[str] = None, last_event_id: Optional[str] = None):
+    try:
+        await get_feed_user(token=websocket.headers.get("token"), token_param=token)
+    except HTTPException as exc:
+        raise WebSocketException(code=http_status.WS_1008_POLICY_VIOLATION, reason=exc.detail)
+
+    await websocket.accept()
+    subscription = order_feed.subscribe(last_event_id)
+    try:
+        async for event in subscription:
+            # Heartbeats double as the disconnect check: the send fails once the client is gone
+            await websocket.send_json(event if event is not None else {"type": "keep-alive"})
+        await websocket.close(code=http_status.WS_1013_TRY_AGAIN_LATER, reason="Fell behind; resume from the last event id")
+    except WebSocketDisconnect:
+        pass
+    finally:
+        order_feed.unsubscribe(subscription)
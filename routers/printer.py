@@ -1,13 +1,81 @@
 # routers/printer.py
-import sys
+from typing import Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_async_db
+import models
+from auth.dependencies import get_current_user
+from print_queue import PrinterError, PrinterUnavailable, print_queue
+import receipts, schemas
 
-if sys.platform == "win32":
-    from .print_windows import router
-elif sys.platform.startswith("linux"):
+router = APIRouter()
+
+
+class PrintRequest(BaseModel):
+    text: str
+    printer_name: Optional[str] = None  # default printer when omitted
+
+
+# ------------------ ✅ Queue a receipt ------------------
+# Returns as soon as the job is queued; poll /printer/jobs/{job_id} for the outcome.
+async def queue_print(payload, printer_name: Optional[str]) -> dict:
     try:
-        import cups  # Check if pycups is available
-        from .print_linux import router
-    except ImportError:
-        from .print_stub import router
-else:
-    from .print_stub import router
+        job = await run_in_threadpool(print_queue.submit, payload, printer_name)
+    except PrinterUnavailable as exc:
+        raise HTTPException(status_code=501, detail=f"🖨️ {exc}")
+    except PrinterError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    except Exception as exc:
+        raise HTTPException(status_code=500, detail=str(exc))
+    return {"message": "Print job queued", **job.as_dict()}
+
+
+@router.post("/print", status_code=202)
+async def print_text(payload: PrintRequest):
+    return await queue_print(payload.text, payload.printer_name)
+
+
+# ------------------ ✅ Job status ------------------
+@router.get("/jobs/{job_id}")
+async def print_job_status(job_id: str):
+    job = print_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Print job not found")
+    return job.as_dict()
+
+
+# ------------------ ✅ Order receipts (rendered server-side) ------------------
+async def get_receipt_or_404(db: AsyncSession, order_id: int) -> receipts.Receipt:
+    # Reprints come straight from the cache: no query, no render
+    receipt = receipts.cached_receipt(order_id)
+    if receipt is None:
+        receipt = await db.run_sync(receipts.build_receipt, order_id)
+        if receipt is None:
+            raise HTTPException(status_code=404, detail="Order not found")
+    return receipt
+
+
+@router.get("/receipts/{order_id}", response_model=schemas.OrderReceipt)
+async def get_receipt(
+    order_id: int,
+    format: Literal["json", "escpos"] = Query("json", description="escpos returns the printer bytes"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    receipt = await get_receipt_or_404(db, order_id)
+    if format == "escpos":
+        return Response(content=receipt.escpos, media_type="application/octet-stream")
+    return receipt.data
+
+
+@router.post("/receipts/{order_id}/print", status_code=202)
+async def print_receipt(
+    order_id: int,
+    printer_name: Optional[str] = Query(None, description="default printer when omitted"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    receipt = await get_receipt_or_404(db, order_id)
+    return {"order_id": order_id, **await queue_print(receipt.escpos, printer_name)}
@@ -1,12 +1,13 @@
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-from datetime import datetime, timedelta
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from datetime import date, datetime, timedelta
 from enum import Enum
-from typing import Literal, Tuple
-from database import get_db
-from models import Order, OrderItem, MenuItem, User
+from typing import Literal, Optional, Tuple
+from database import read_session
+from models import User
 from auth.dependencies import get_current_admin
+from reporting import aggregates
+from reporting.result_cache import report_cache
 
 router = APIRouter()
 
@@ -26,129 +27,97 @@ def get_period_range(period: PeriodEnum) -> Tuple[datetime, datetime]:
     return start, today
 
 @router.get("/insights")
-def sales_insights(
+async def sales_insights(
     period: PeriodEnum = Query(PeriodEnum.weekly, description="weekly | monthly | all"),
-    db: Session = Depends(get_db),
     admin: User = Depends(get_current_admin)
 ):
-    print("Period received: ", period)
-    start_date, end_date = get_period_range(period)
-
-    busiest_day = db.query(func.date(Order.order_date), func.count(Order.id))\
-        .filter(Order.order_date >= start_date)\
-        .group_by(func.date(Order.order_date))\
-        .order_by(func.count(Order.id).desc())\
-        .first()
-
-    busiest_hour = db.query(func.concat(func.hour(Order.order_date), ':00'), func.count(Order.id))\
-        .filter(Order.order_date >= start_date)\
-        .group_by(func.hour(Order.order_date))\
-        .order_by(func.count(Order.id).desc())\
-        .first()
-
-    top_item = db.query(MenuItem.name, func.sum(OrderItem.quantity))\
-        .join(MenuItem, MenuItem.id == OrderItem.menu_item_id)\
-        .join(Order, Order.id == OrderItem.order_id)\
-        .filter(Order.order_date >= start_date)\
-        .group_by(MenuItem.name)\
-        .order_by(func.sum(OrderItem.quantity).desc())\
-        .first()
-
-    poor_item = db.query(MenuItem.name, func.sum(OrderItem.quantity))\
-        .join(MenuItem, MenuItem.id == OrderItem.menu_item_id)\
-        .join(Order, Order.id == OrderItem.order_id)\
-        .filter(Order.order_date >= start_date)\
-        .group_by(MenuItem.name)\
-        .order_by(func.sum(OrderItem.quantity).asc())\
-        .first()
-
-    best_staff = db.query(User.username, func.sum(Order.total_amount))\
-        .join(User, User.id == Order.user_id)\
-        .filter(Order.order_date >= start_date)\
-        .group_by(User.username)\
-        .order_by(func.sum(Order.total_amount).desc())\
-        .first()
-
-    poor_staff = db.query(User.username, func.sum(Order.total_amount))\
-        .join(User, User.id == Order.user_id)\
-        .filter(User.username != "admin", Order.order_date >= start_date)\
-        .group_by(User.username)\
-        .order_by(func.sum(Order.total_amount).asc())\
-        .first()
-
-    highest_day = db.query(func.date(Order.order_date), func.sum(Order.total_amount))\
-        .filter(Order.order_date >= start_date)\
-        .group_by(func.date(Order.order_date))\
-        .order_by(func.sum(Order.total_amount).desc())\
-        .first()
-
-    lowest_day = db.query(func.date(Order.order_date), func.sum(Order.total_amount))\
-        .filter(Order.order_date >= start_date)\
-        .group_by(func.date(Order.order_date))\
-        .order_by(func.sum(Order.total_amount).asc())\
-        .first()
-
-    highest_order = db.query(func.max(Order.total_amount))\
-        .filter(Order.order_date >= start_date)\
-        .scalar()
-
-    lowest_order = db.query(func.min(Order.total_amount))\
-        .filter(Order.order_date >= start_date)\
-        .scalar()
-
-    return {
-        "period": period.value,
-        "busiest_day": busiest_day[0].isoformat() if busiest_day else None,
-        "busiest_hour": busiest_hour[0] if busiest_hour else None,
-        "top_selling_item": {
-            "name": top_item[0],
-            "quantity": int(top_item[1])
-        } if top_item else None,
-        "poor_selling_item": {
-            "name": poor_item[0],
-            "quantity": int(poor_item[1])
-        } if poor_item else None,
-        "best_performing_staff": {
-            "username": best_staff[0],
-            "total_sales": float(best_staff[1])
-        } if best_staff else None,
-        "poor_performing_staff": {
-            "username": poor_staff[0],
-            "total_sales": float(poor_staff[1])
-        } if poor_staff else None,
-        "highest_sales_day": {
-            "date": highest_day[0].isoformat(),
-            "total": float(highest_day[1])
-        } if highest_day else None,
-        "lowest_sales_day": {
-            "date": lowest_day[0].isoformat(),
-            "total": float(lowest_day[1])
-        } if lowest_day else None,
-        "highest_order_amount": float(highest_order) if highest_order else 0,
-        "lowest_order_amount": float(lowest_order) if lowest_order else 0
-    }
+    async def compute():
+        start_date, end_date = get_period_range(period)
+        async with read_session() as db:
+            return {"period": period.value, **await db.run_sync(aggregates.sales_insights, start_date, end_date)}
+
+    # ✅ Same period on the same UTC day (the days orders and rollups use) -> same cached payload
+    return await report_cache.get_or_compute(("insights", period.value, datetime.utcnow().date()), compute)
 
 @router.get("/chart-data")
-def chart_data(
+async def chart_data(
     period: Literal["weekly", "monthly", "all"] = Query("weekly"),
-    db: Session = Depends(get_db),
     admin: User = Depends(get_current_admin)
 ):
-    print("Received chart period:", period, type(period))  # 🐞 Debug log
-    start_date, end_date = get_period_range(PeriodEnum(period))  # ✅ safely cast to Enum
+    async def compute():
+        start_date, end_date = get_period_range(PeriodEnum(period))  # ✅ safely cast to Enum
+        async with read_session() as db:
+            results = await db.run_sync(aggregates.daily_totals, start_date, end_date)
+
+        chart = [{"date": day.isoformat(), "total": float(total)} for day, total in results]
+
+        return {
+            "period": period,  # ✅ No `.value` here, it's already a string
+            "chart_data": chart
+        }
+
+    return await report_cache.get_or_compute(("chart-data", period, datetime.utcnow().date()), compute)
+
+
+# ------------------ ✅ History: columnar export (reporting/columnar.py) ------------------
+# Multi-year questions answered from the nightly export without touching MySQL.
+# Covers everything up to the last export (yesterday, when the export runs nightly).
+def analytics():
+    # numpy loads with the first history request instead of at worker boot
+    from reporting import analytics
+    return analytics
+
+
+async def history_range(start_date: Optional[date], end_date: Optional[date]):
+    # Lists the export directory and reads its manifest: off the event loop, like the queries
+    covered = await run_in_threadpool(lambda: analytics().coverage())
+    if covered["through"] is None:
+        raise HTTPException(status_code=404, detail="No analytics export yet (python -m reporting.columnar export)")
+    start_date = start_date or date.fromisoformat(covered["start"])
+    end_date = end_date or date.fromisoformat(covered["through"]) - timedelta(days=1)
+    if end_date < start_date:
+        raise HTTPException(status_code=400, detail="end_date is before start_date")
+    return start_date, end_date, {"start_date": start_date, "end_date": end_date, "exported_through": covered["through"]}
+
+
+@router.get("/history/insights")
+async def history_insights(
+    start_date: Optional[date] = Query(None, description="default: first exported day"),
+    end_date: Optional[date] = Query(None, description="inclusive; default: last exported day"),
+    admin: User = Depends(get_current_admin)
+):
+    start_date, end_date, meta = await history_range(start_date, end_date)
+    return {**meta, **await run_in_threadpool(analytics().sales_insights, start_date, end_date)}
 
-    results = db.query(
-        func.date(Order.order_date).label("day"),
-        func.sum(Order.total_amount).label("total")
-    ).filter(Order.order_date >= start_date)\
-     .group_by(func.date(Order.order_date))\
-     .order_by(func.date(Order.order_date))\
-     .all()
 
-    chart = [{"date": row.day.isoformat(), "total": float(row.total)} for row in results]
+@router.get("/history/chart-data")
+async def history_chart_data(
+    start_date: Optional[date] = Query(None),
+    end_date: Optional[date] = Query(None),
+    admin: User = Depends(get_current_admin)
+):
+    start_date, end_date, meta = await history_range(start_date, end_date)
+    results = await run_in_threadpool(analytics().daily_totals, start_date, end_date)
+    return {**meta, "chart_data": [{"date": day.isoformat(), "total": total} for day, total in results]}
 
-    return {
-        "period": period,  # ✅ No `.value` here, it's already a string
-        "chart_data": chart
-    }
 
+@router.get("/history/heatmap")
+async def history_heatmap(
+    start_date: Optional[date] = Query(None),
+    end_date: Optional[date] = Query(None),
+    limit: int = Query(20, ge=1, le=500, description="best-selling items to include"),
+    admin: User = Depends(get_current_admin)
+):
+    start_date, end_date, meta = await history_range(start_date, end_date)
+    return {**meta, **await run_in_threadpool(analytics().item_hour_heatmap, start_date, end_date, limit)}
+
+
+@router.get("/history/baskets")
+async def history_baskets(
+    start_date: Optional[date] = Query(None),
+    end_date: Optional[date] = Query(None),
+    limit: int = Query(20, ge=1, le=500, description="item pairs to return"),
+    admin: User = Depends(get_current_admin)
+):
+    start_date, end_date, meta = await history_range(start_date, end_date)
+    return {**meta, **await run_in_threadpool(analytics().basket_pairs, start_date, end_date, limit)}
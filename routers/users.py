@@ -1,86 +1,118 @@
 from typing import List
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from database import get_db
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_async_db
 import models, schemas
-from auth.dependencies import get_current_admin 
-from auth.auth import get_password_hash
+from serializers import JSONBytesResponse, render_list, select_for
+from auth import hashing
+from auth.dependencies import get_current_admin, invalidate_cached_user
+from auth.auth import revoke_user_sessions
 
 router = APIRouter()
 
+
+def get_user_or_404(db, user_id: int) -> models.User:
+    user = db.query(models.User).filter(models.User.id == user_id).first()
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    return user
+
 # ------------------ Admin: Create User ------------------
 @router.post("/", response_model=schemas.UserOut)
-def create_user(user: schemas.UserCreate, db: Session = Depends(get_db), admin: models.User = Depends(get_current_admin)):
-    existing_user = db.query(models.User).filter(models.User.username == user.username).first()
-    if existing_user:
-        raise HTTPException(status_code=400, detail="Username already exists")
-
-    new_user = models.User(
-        username=user.username,
-        password_hash=get_password_hash(user.password),
-        role=user.role or "staff",
-    )
-    db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
-    return new_user
+async def create_user(user: schemas.UserCreate, db: AsyncSession = Depends(get_async_db), admin: models.User = Depends(get_current_admin)):
+    # ✅ bcrypt runs on the hashing pool, outside the database work
+    password_hash = await hashing.hash_password_async(user.password)
+
+    def create(db):
+        existing_user = db.query(models.User).filter(models.User.username == user.username).first()
+        if existing_user:
+            raise HTTPException(status_code=400, detail="Username already exists")
+
+        new_user = models.User(
+            username=user.username,
+            password_hash=password_hash,
+            role=user.role or "staff",
+        )
+        db.add(new_user)
+        db.commit()
+        db.refresh(new_user)
+        return new_user
+
+    return await db.run_sync(create)
 
 # ------------------ Admin: List Users ------------------
 @router.get("/", response_model=List[schemas.UserOut])
-def list_users(db: Session = Depends(get_db), admin: models.User = Depends(get_current_admin)):
-    return db.query(models.User).all()
+async def list_users(db: AsyncSession = Depends(get_async_db), admin: models.User = Depends(get_current_admin)):
+    query = select_for(schemas.UserOut, models.User)
+    return JSONBytesResponse(await db.run_sync(render_list, schemas.UserOut, query))
 
 # ------------------ Admin: Update User ------------------
 @router.put("/{user_id}", response_model=schemas.UserOut)
-def update_user(
+async def update_user(
     user_id: int,
     updates: schemas.UserUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     admin: models.User = Depends(get_current_admin)
 ):
-    user = db.query(models.User).filter(models.User.id == user_id).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
+    password_hash = await hashing.hash_password_async(updates.password) if updates.password else None
 
-    # ✅ Check for duplicate username if it's being updated
-    if updates.username:
-        existing = db.query(models.User).filter(
-            models.User.username == updates.username,
-            models.User.id != user_id  # Exclude current user
-        ).first()
-        if existing:
-            raise HTTPException(status_code=400, detail="Username already in use")
-        user.username = updates.username
-
-    # ✅ Update password if provided
-    if updates.password:
-        user.password_hash = get_password_hash(updates.password)
-
-    db.commit()
-    db.refresh(user)
-    return user
+    def update(db):
+        user = get_user_or_404(db, user_id)
+
+        # ✅ Check for duplicate username if it's being updated
+        if updates.username:
+            existing = db.query(models.User).filter(
+                models.User.username == updates.username,
+                models.User.id != user_id  # Exclude current user
+            ).first()
+            if existing:
+                raise HTTPException(status_code=400, detail="Username already in use")
+            user.username = updates.username
+
+        # ✅ Update password if provided
+        if password_hash:
+            user.password_hash = password_hash
+
+        db.commit()
+        invalidate_cached_user(user.id)
+        db.refresh(user)
+        return user
+
+    return await db.run_sync(update)
 
 
 # ------------------ Admin: Soft Delete User ------------------
 @router.delete("/{user_id}")
-def soft_delete_user(user_id: int, db: Session = Depends(get_db), admin: models.User = Depends(get_current_admin)):
-    user = db.query(models.User).filter(models.User.id == user_id).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-
-    user.is_active = False
-    db.commit()
+async def soft_delete_user(user_id: int, db: AsyncSession = Depends(get_async_db), admin: models.User = Depends(get_current_admin)):
+    def deactivate(db):
+        user = get_user_or_404(db, user_id)
+        user.is_active = False
+        db.commit()
+        invalidate_cached_user(user.id)
+        return user
+
+    user = await db.run_sync(deactivate)
+    await run_in_threadpool(revoke_user_sessions, user.id)
     return {"detail": f"User {user.username} has been deactivated"}
 
 # ------------------ Admin: Update Their Own Credentials ------------------
 @router.put("/me/update", response_model=schemas.UserOut)
-def update_own_admin_credentials(updates: schemas.UserUpdate, db: Session = Depends(get_db), admin: models.User = Depends(get_current_admin)):
-    admin.username = updates.username or admin.username
-    if updates.password:
-        admin.password_hash = get_password_hash(updates.password)
-    db.commit()
-    db.refresh(admin)
-    return admin
+async def update_own_admin_credentials(updates: schemas.UserUpdate, db: AsyncSession = Depends(get_async_db), current: models.User = Depends(get_current_admin)):
+    password_hash = await hashing.hash_password_async(updates.password) if updates.password else None
+
+    def update(db):
+        # `current` is a cached snapshot, so change the real row
+        admin = db.query(models.User).filter(models.User.id == current.id).first()
+        admin.username = updates.username or admin.username
+        if password_hash:
+            admin.password_hash = password_hash
+        db.commit()
+        invalidate_cached_user(admin.id)
+        db.refresh(admin)
+        return admin
+
+    return await db.run_sync(update)
 
 # we are trying 
 # not to log in
@@ -88,15 +120,19 @@ def update_own_admin_credentials(updates: schemas.UserUpdate, db: Session = Depe
 
 
 @router.patch("/{user_id}/toggle-active")
-def toggle_user_active(
+async def toggle_user_active(
     user_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: models.User = Depends(get_current_admin),
 ):
-    user = db.query(models.User).filter(models.User.id == user_id).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-
-    user.is_active = not user.is_active
-    db.commit()
-    return {"status": "updated", "is_active": user.is_active}
+    def toggle(db):
+        user = get_user_or_404(db, user_id)
+        user.is_active = not user.is_active
+        db.commit()
+        invalidate_cached_user(user.id)
+        return user.is_active
+
+    is_active = await db.run_sync(toggle)
+    if not is_active:
+        await run_in_threadpool(revoke_user_sessions, user_id)
+    return {"status": "updated", "is_active": is_active}
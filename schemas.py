@@ -1,6 +1,6 @@
 from enum import Enum
-from pydantic import BaseModel
-from typing import List, Optional
+from pydantic import BaseModel, ConfigDict, Field
+from typing import List, Literal, Optional
 from datetime import date, datetime
 
 # ------------------ User ------------------
@@ -17,8 +17,7 @@ class UserOut(BaseModel):
     is_active: bool
     created_at: datetime  # ✅ DB default = CURRENT_TIMESTAMP
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class UserUpdate(BaseModel):
@@ -44,8 +43,7 @@ class MenuItemOut(BaseModel):
     created_at: datetime  # ✅ DB default = CURRENT_TIMESTAMP
     updated_at: datetime  # ✅ DB default = CURRENT_TIMESTAMP
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 # ------------------ Orders ------------------
@@ -63,6 +61,23 @@ class OrderCreate(BaseModel):  # for admin order creation
     items: List[OrderItemCreate]
 
 
+class OrderBatchEntry(OrderCreate):
+    client_order_id: str = Field(..., min_length=1, max_length=64)  # generated by the till; makes replays safe
+    order_date: Optional[datetime] = None  # when the till took the order (default: now)
+
+
+class OrderBatchCreate(BaseModel):
+    orders: List[OrderBatchEntry] = Field(..., max_length=500)
+
+
+class OrderBatchResult(BaseModel):
+    client_order_id: str
+    status: Literal["created", "duplicate", "rejected"]
+    order_id: Optional[int] = None
+    total_amount: Optional[float] = None
+    error: Optional[str] = None
+
+
 class OrderItemOut(BaseModel):
     id: int
     menu_item_id: int
@@ -70,8 +85,7 @@ class OrderItemOut(BaseModel):
     unit_price: float
     subtotal: float
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class OrderOut(BaseModel):
@@ -83,8 +97,7 @@ class OrderOut(BaseModel):
     created_at: Optional[datetime] = None  # ✅ DB default = CURRENT_TIMESTAMP
     items: List[OrderItemOut]
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class OrderReceipt(BaseModel):  # 👈 for /user order receipt response
@@ -93,6 +106,7 @@ class OrderReceipt(BaseModel):  # 👈 for /user order receipt response
     total_amount: float
     served_by: str
     served_at: str
+    status: Optional[str] = None
 
 
 class ItemStats(BaseModel):
@@ -130,8 +144,7 @@ class ExpenseOut(ExpenseBase):
     date: Optional[datetime] = None
     created_at: Optional[datetime] = None  # ✅ Include created_at field
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 # ------------------ Assets ------------------
@@ -161,5 +174,4 @@ class AssetOut(BaseModel):
     added_at: datetime  # ✅ DB default = CURRENT_TIMESTAMP
     updated_at: Optional[datetime] = None  # ✅ auto-update column
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
@@ -0,0 +1,44 @@
+# serializers.py
+# Fast JSON for the list endpoints. Rows are read as plain column tuples (no ORM
+# objects to hydrate and track), validated against the response schema and encoded
+# to JSON bytes in one pydantic-core pass, then sent as they are. FastAPI's default
+# path validates ORM objects, converts the result back to Python values and encodes
+# it again with json.dumps. The routes keep their response_model for the API docs.
+from functools import lru_cache
+from typing import List
+from fastapi import Response
+from pydantic import TypeAdapter
+from sqlalchemy import select
+
+
+class JSONBytesResponse(Response):
+    """Body that is already encoded JSON."""
+    media_type = "application/json"
+
+
+@lru_cache(maxsize=None)
+def list_adapter(schema) -> TypeAdapter:
+    # Building the validator/serializer is the expensive part; once per schema
+    return TypeAdapter(List[schema])
+
+
+def dump_list(schema, rows) -> bytes:
+    """Dicts (or ORM objects) as a JSON array of `schema`."""
+    adapter = list_adapter(schema)
+    return adapter.dump_json(adapter.validate_python(rows, from_attributes=True))
+
+
+def as_dicts(result):
+    # Plain dicts validate about twice as fast as Row objects read by attribute
+    keys = list(result.keys())
+    return [dict(zip(keys, row)) for row in result]
+
+
+def select_for(schema, model):
+    """SELECT of just the model columns `schema` returns."""
+    return select(*(getattr(model, name) for name in schema.model_fields))
+
+
+def render_list(db, schema, query) -> bytes:
+    """Run `query` (through db.run_sync) and encode its rows as a `schema` array."""
+    return dump_list(schema, as_dicts(db.execute(query)))
@@ -1,8 +1,78 @@
+# startup.py
+# Deploy-time setup and the boot-time schema check.
+#
+# Creating tables and the admin account happens once per deploy, before the workers
+# start (`python manage.py setup`), not in every worker: workers used to race on
+# create_all and paid for a reflection pass and a bcrypt hash on every boot and reload.
+# A worker only checks that the database is at the newest migration, with one query.
+# The newest revision itself is cached in SCHEMA_CACHE_PATH, keyed on the migration
+# files, so workers don't load alembic (half a second) to find it.
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import inspect, text
 from sqlalchemy.orm import Session
-from database import SessionLocal
+
+from database import Base, SessionLocal, engine
 from models import User
 from utils import hash_password
-from datetime import datetime
+
+SCHEMA_CHECK = os.getenv("SCHEMA_CHECK", "strict")  # strict: refuse to start on an old schema, warn: log it, off
+SCHEMA_CACHE_PATH = os.getenv("SCHEMA_CACHE_PATH", os.path.join(tempfile.gettempdir(), "pos_schema_head.json"))
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+VERSIONS_DIR = os.path.join(ROOT, "migrations", "versions")
+
+logger = logging.getLogger(__name__)
+
+
+class SchemaOutOfDate(RuntimeError):
+    pass
+
+
+# ------------------ ✅ Migrations (python manage.py migrate) ------------------
+def alembic_config():
+    from alembic.config import Config
+    return Config(os.path.join(ROOT, "alembic.ini"))
+
+
+def migrate():
+    """Bring the schema to the newest migration; safe to run on every deploy.
+
+    Returns the (first, last) day of sales rollups it had to backfill, if any.
+    """
+    from alembic import command
+    from reporting import rollups
+
+    existing = set(inspect(engine).get_table_names())
+    # Rollup tables new to a database that already has orders start out empty
+    backfill = "orders" in existing and any(
+        model.__tablename__ not in existing for model in rollups.ROLLUP_MODELS
+    )
+    if not existing - {"alembic_version"}:
+        # Fresh database: the models are the newest schema, nothing to replay
+        Base.metadata.create_all(bind=engine)
+        command.stamp(alembic_config(), "head")
+    else:
+        # Tables that predate the migrations first (the migrations index them); like the
+        # existing ones, migrations check for what create_all may already have made
+        Base.metadata.create_all(bind=engine)
+        command.upgrade(alembic_config(), "head")
+    backfilled = None
+    if backfill:
+        db = SessionLocal()
+        try:
+            backfilled = rollups.rebuild_all(db)
+        finally:
+            db.close()
+    _save_head(_script_head())
+    return backfilled
+
 
 def initialize_admin():
     db: Session = SessionLocal()
@@ -20,3 +90,58 @@ def initialize_admin():
             db.commit()
     finally:
         db.close()
+
+
+# ------------------ ✅ Boot-time check ------------------
+def _fingerprint() -> str:
+    entries = sorted(
+        (entry.name, entry.stat().st_mtime_ns, entry.stat().st_size)
+        for entry in os.scandir(VERSIONS_DIR) if entry.name.endswith(".py")
+    )
+    return hashlib.sha256(repr(entries).encode()).hexdigest()
+
+
+def _script_head() -> str:
+    from alembic.script import ScriptDirectory
+    return ScriptDirectory.from_config(alembic_config()).get_current_head()
+
+
+def _save_head(head: str):
+    try:
+        with open(SCHEMA_CACHE_PATH, "w") as fh:
+            json.dump({"fingerprint": _fingerprint(), "head": head}, fh)
+    except OSError:
+        logger.warning("Could not write %s; workers will read the migrations themselves", SCHEMA_CACHE_PATH)
+
+
+def head_revision() -> str:
+    fingerprint = _fingerprint()
+    try:
+        with open(SCHEMA_CACHE_PATH) as fh:
+            cached = json.load(fh)
+        if cached.get("fingerprint") == fingerprint:
+            return cached["head"]
+    except (OSError, ValueError, KeyError):
+        pass
+    head = _script_head()
+    _save_head(head)
+    return head
+
+
+def current_revision() -> Optional[str]:
+    with engine.connect() as conn:
+        if not inspect(conn).has_table("alembic_version"):
+            return None
+        return conn.execute(text("SELECT version_num FROM alembic_version")).scalar()
+
+
+def verify_schema(mode: str = SCHEMA_CHECK):
+    if mode == "off":
+        return
+    head, current = head_revision(), current_revision()
+    if current == head:
+        return
+    message = f"Database schema is at {current or 'no revision'}, the code expects {head}; run `python manage.py migrate`"
+    if mode == "strict":
+        raise SchemaOutOfDate(message)
+    logger.warning(message)
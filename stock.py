@@ -0,0 +1,69 @@
+# stock.py
+import asyncio
+import os
+import random
+from fastapi import HTTPException
+from sqlalchemy import case, or_, update
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+import models
+
+# MySQL: ER_LOCK_DEADLOCK, ER_LOCK_WAIT_TIMEOUT
+LOCK_CONFLICT_CODES = {1213, 1205}
+MAX_RETRIES = int(os.getenv("ORDER_DEADLOCK_RETRIES", "3"))
+
+
+def is_lock_conflict(exc: OperationalError) -> bool:
+    args = getattr(exc.orig, "args", ())
+    if args and args[0] in LOCK_CONFLICT_CODES:
+        return True
+    return "database is locked" in str(exc.orig)  # SQLite stand-in
+
+
+def reserve_stock(db: Session, quantities: dict):
+    """Atomically take `quantities` ({menu_item_id: qty}) out of stock or raise 409.
+
+    One conditional UPDATE decrements every tracked item only where enough stock
+    is left. InnoDB locks the rows in primary-key order, so concurrent tickets
+    touching the same items always queue in the same order.
+    """
+    if not quantities:
+        return
+
+    needed = case(quantities, value=models.MenuItem.id)
+    result = db.execute(
+        update(models.MenuItem)
+        .where(
+            models.MenuItem.id.in_(quantities),
+            or_(models.MenuItem.stock_quantity.is_(None), models.MenuItem.stock_quantity >= needed),
+        )
+        .values(stock_quantity=models.MenuItem.stock_quantity - needed)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount == len(quantities):
+        return
+
+    db.rollback()
+    short = db.query(models.MenuItem.name, models.MenuItem.stock_quantity)\
+        .filter(models.MenuItem.id.in_(quantities), models.MenuItem.stock_quantity < needed)\
+        .all()
+    detail = ", ".join(f"{name} (only {stock} left)" for name, stock in short) or "stock changed, please retry"
+    raise HTTPException(status_code=409, detail=f"Insufficient stock: {detail}")
+
+
+async def run_with_retry_async(db, fn, *args):
+    """Run `fn(db, *args)` as one transaction (one `db.run_sync`), replaying it on deadlocks / lock timeouts.
+
+    The backoff between attempts is an asyncio sleep, so it doesn't block the loop.
+    """
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            return await db.run_sync(fn, *args)
+        except OperationalError as exc:
+            await db.rollback()
+            if attempt == MAX_RETRIES or not is_lock_conflict(exc):
+                raise
+            await asyncio.sleep(random.uniform(0, 0.01 * 2 ** attempt))
+        except Exception:
+            await db.rollback()
+            raise
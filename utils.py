@@ -1,9 +1,9 @@
-from passlib.context import CryptContext
+from auth import hashing
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = hashing.pwd_context
 
 def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+    return hashing.hash_password(password)
 
 def verify_password(plain: str, hashed: str) -> bool:
-    return pwd_context.verify(plain, hashed)
+    return hashing.verify_password(plain, hashed)